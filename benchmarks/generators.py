@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+# Synthetic documents in the examples/basic.vxdoc layout:
+#   manifest.json, nodes/*.json, layers/*.json, assets/*, collab/presence.json
+# Every generator is deterministic for a given seed, so runs on different
+# commits measure the same input.
+
+Stroke = List[Tuple[float, float]]
+
+
+def _write_json(path: Path, data: Any) -> None:
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def write_document(
+    path: Path,
+    nodes: Sequence[Dict[str, Any]],
+    layers: Sequence[Dict[str, Any]],
+    assets: Optional[Dict[str, bytes]] = None,
+    name: str = "benchmark",
+) -> Path:
+    """Write a directory-style .vxdoc; node and layer files sort in list order."""
+    path = Path(path)
+    for sub in ("nodes", "layers", "assets", "collab"):
+        (path / sub).mkdir(parents=True, exist_ok=True)
+    _write_json(path / "manifest.json", {
+        "name": name,
+        "schema_version": "0.1.0",
+        "type": "vxdoc",
+        "description": "Synthetic benchmark document",
+    })
+    width = len(str(max(len(nodes), len(layers), 1)))
+    for i, node in enumerate(nodes):
+        _write_json(path / "nodes" / f"{i:0{width}d}-{node['id']}.json", node)
+    for i, layer in enumerate(layers):
+        _write_json(path / "layers" / f"{i:0{width}d}-{layer['id']}.json", layer)
+    for rel, data in (assets or {}).items():
+        (path / "assets" / rel).write_bytes(data)
+    _write_json(path / "collab" / "presence.json", {"active": []})
+    return path
+
+
+def _color(rng: random.Random) -> str:
+    return "#%06x" % rng.randrange(0x1000000)
+
+
+def layered_document(path: Path, layers: int, size: int = 512, blur: bool = True, seed: int = 0) -> Path:
+    """``layers`` layers, each a fill (optionally blurred) with a cycling blend mode."""
+    rng = random.Random(seed)
+    modes = ["normal", "multiply", "screen", "overlay", "add", "difference"]
+    nodes, layer_specs = [], []
+    for i in range(layers):
+        w, h = size - rng.randrange(size // 4), size - rng.randrange(size // 4)
+        fill = {"id": f"fill-{i}", "type": "solid_color", "params": {"color": _color(rng), "width": w, "height": h}}
+        nodes.append(fill)
+        source = fill["id"]
+        if blur:
+            nodes.append({"id": f"blur-{i}", "type": "blur_plus", "inputs": {"image": f"ref://{source}"},
+                          "params": {"radius": 1 + i % 6}})
+            source = f"blur-{i}"
+        layer_specs.append({
+            "id": f"layer-{i}", "name": f"Layer {i}", "source_node": source,
+            "opacity": 1.0 if i == 0 else round(rng.uniform(0.3, 1.0), 2),
+            "blend": "normal" if i == 0 else modes[i % len(modes)],
+        })
+    return write_document(path, nodes, layer_specs, name=f"layered-{layers}")
+
+
+def deep_document(path: Path, depth: int, size: int = 256, seed: int = 0) -> Path:
+    """A single chain ``depth`` nodes long: blur, fade and compose, repeated."""
+    rng = random.Random(seed)
+    nodes = [
+        {"id": "base", "type": "solid_color", "params": {"color": _color(rng), "width": size, "height": size}},
+        {"id": "spot", "type": "solid_color", "params": {"color": _color(rng), "width": size // 2, "height": size // 2}},
+    ]
+    prev = "base"
+    for i in range(depth):
+        kind = i % 3
+        if kind == 0:
+            node = {"id": f"n{i}", "type": "blur_plus", "inputs": {"image": f"ref://{prev}"}, "params": {"radius": 1}}
+        elif kind == 1:
+            node = {"id": f"n{i}", "type": "opacity", "inputs": {"image": f"ref://{prev}"}, "params": {"opacity": 0.9}}
+        else:
+            node = {"id": f"n{i}", "type": "compose", "inputs": {"a": f"ref://{prev}", "b": "ref://spot"},
+                    "params": {"mode": "screen"}}
+        nodes.append(node)
+        prev = node["id"]
+    layers = [{"id": "layer-0", "name": "Chain", "source_node": prev, "opacity": 1.0, "blend": "normal"}]
+    return write_document(path, nodes, layers, name=f"deep-{depth}")
+
+
+def wide_document(path: Path, width: int, size: int = 256, seed: int = 0) -> Path:
+    """``width`` independent blurred branches stacked into one layer."""
+    rng = random.Random(seed)
+    nodes = [{"id": "bg", "type": "solid_color", "params": {"color": _color(rng), "width": size, "height": size}}]
+    prev = "bg"
+    for i in range(width):
+        nodes += [
+            {"id": f"fill-{i}", "type": "solid_color", "params": {"color": _color(rng), "width": size, "height": size}},
+            {"id": f"blur-{i}", "type": "blur_plus", "inputs": {"image": f"ref://fill-{i}"},
+             "params": {"radius": 1 + i % 8}},
+            {"id": f"fade-{i}", "type": "opacity", "inputs": {"image": f"ref://blur-{i}"}, "params": {"opacity": 0.3}},
+            {"id": f"stack-{i}", "type": "compose", "inputs": {"a": f"ref://{prev}", "b": f"ref://fade-{i}"}},
+        ]
+        prev = f"stack-{i}"
+    layers = [{"id": "layer-0", "name": "Stack", "source_node": prev, "opacity": 1.0, "blend": "normal"}]
+    return write_document(path, nodes, layers, name=f"wide-{width}")
+
+
+def random_strokes(count: int, points: int = 32, extent: float = 2048.0, seed: int = 0) -> List[Stroke]:
+    """Brush strokes as random walks, like ``ToolState.strokes``."""
+    rng = random.Random(seed)
+    strokes = []
+    for _ in range(count):
+        x, y = rng.uniform(0, extent), rng.uniform(0, extent)
+        stroke = []
+        for _ in range(points):
+            x = min(extent, max(0.0, x + rng.uniform(-12, 12)))
+            y = min(extent, max(0.0, y + rng.uniform(-12, 12)))
+            stroke.append((round(x, 2), round(y, 2)))
+        strokes.append(stroke)
+    return strokes
+
+
+def stroke_document(path: Path, strokes: int, points: int = 32, seed: int = 0) -> Path:
+    """One fill layer plus a stroke layer carrying ``strokes`` brush strokes."""
+    nodes = [{"id": "paper", "type": "solid_color", "params": {"color": "#ffffff", "width": 2048, "height": 2048}}]
+    layers = [
+        {"id": "layer-0", "name": "Paper", "source_node": "paper", "opacity": 1.0, "blend": "normal"},
+        {"id": "layer-1", "name": "Ink", "source_node": "paper", "opacity": 1.0, "blend": "normal",
+         "visible": False, "strokes": random_strokes(strokes, points, seed=seed)},
+    ]
+    return write_document(path, nodes, layers, name=f"strokes-{strokes}")
+
+
+def asset_document(path: Path, assets: int, asset_bytes: int, seed: int = 0) -> Path:
+    """A minimal document carrying ``assets`` binary files of ``asset_bytes`` each.
+
+    Half of each asset is incompressible noise and half is zeros, so archive
+    benchmarks exercise both deflate paths.
+    """
+    rng = random.Random(seed)
+    nodes = [{"id": "node-1", "type": "solid_color", "params": {"color": "#808080", "width": 64, "height": 64}}]
+    layers = [{"id": "layer-1", "name": "Base", "source_node": "node-1", "opacity": 1.0, "blend": "normal"}]
+    noise = asset_bytes // 2
+    files = {f"asset-{i:04d}.bin": rng.randbytes(noise) + bytes(asset_bytes - noise) for i in range(assets)}
+    return write_document(path, nodes, layers, assets=files, name=f"assets-{assets}")
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .scenarios import SCENARIOS
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        import numpy
+
+        numpy_version: Optional[str] = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": numpy_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def run_scenarios(
+    names: Optional[Iterable[str]] = None,
+    scale: float = 1.0,
+    repeat: int = 5,
+    warmup: int = 1,
+) -> Dict[str, Any]:
+    """Time each scenario ``repeat`` times (after ``warmup`` untimed runs).
+
+    Returns a JSON-ready dict: ``meta`` describes the run and machine,
+    ``results`` maps scenario names to timings in seconds (or a skip reason).
+    """
+    names = list(names) if names is not None else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise KeyError(f"unknown scenarios: {unknown} (available: {sorted(SCENARIOS)})")
+    results: Dict[str, Any] = {}
+    for name in names:
+        sc = SCENARIOS[name]
+        missing = sc.missing()
+        if missing:
+            results[name] = {"description": sc.description, "skipped": f"missing modules: {', '.join(missing)}"}
+            continue
+        with tempfile.TemporaryDirectory(prefix=f"vxbench-{name}-") as tmp:
+            fn = sc.setup(Path(tmp), scale)
+            for _ in range(warmup):
+                fn()
+            times: List[float] = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - t0)
+        results[name] = {
+            "description": sc.description,
+            "times": times,
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.fmean(times),
+        }
+    meta = {**environment(), "scale": scale, "repeat": repeat, "warmup": warmup}
+    return {"meta": meta, "results": results}
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Per-scenario median ratios (new / old); < 1 means faster."""
+    rows = []
+    for name, after in new["results"].items():
+        before = old["results"].get(name)
+        if not before or "median" not in before or "median" not in after:
+            continue
+        rows.append({
+            "scenario": name,
+            "old": before["median"],
+            "new": after["median"],
+            "ratio": after["median"] / before["median"] if before["median"] > 0 else float("inf"),
+        })
+    return rows
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="python -m benchmarks", description="PicaDeli benchmark suite")
+    sub = p.add_subparsers(dest="cmd")
+
+    pr = sub.add_parser("run", help="Run scenarios and emit JSON (default command)")
+    pr.add_argument("scenarios", nargs="*", help="Scenario names (default: all)")
+    pr.add_argument("-o", "--output", help="Write JSON here instead of stdout")
+    pr.add_argument("--scale", type=float, default=1.0, help="Input size factor (default: 1.0)")
+    pr.add_argument("--repeat", type=int, default=5, help="Timed runs per scenario (default: 5)")
+    pr.add_argument("--warmup", type=int, default=1, help="Untimed runs first (default: 1)")
+
+    pc = sub.add_parser("compare", help="Compare two result files")
+    pc.add_argument("old")
+    pc.add_argument("new")
+
+    sub.add_parser("list", help="List scenarios")
+    return p
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in ("run", "compare", "list", "-h", "--help"):
+        argv.insert(0, "run")
+    args = build_parser().parse_args(argv)
+    if args.cmd == "list":
+        for name, sc in SCENARIOS.items():
+            extra = f" (requires {', '.join(sc.requires)})" if sc.requires else ""
+            print(f"{name:<24} {sc.description}{extra}")
+        return 0
+    if args.cmd == "compare":
+        old = json.loads(Path(args.old).read_text(encoding="utf-8"))
+        new = json.loads(Path(args.new).read_text(encoding="utf-8"))
+        for row in compare(old, new):
+            print(f"{row['scenario']:<24} {row['old'] * 1e3:>10.2f} ms -> {row['new'] * 1e3:>10.2f} ms  x{row['ratio']:.2f}")
+        return 0
+    try:
+        data = run_scenarios(args.scenarios or None, scale=args.scale, repeat=args.repeat, warmup=args.warmup)
+    except KeyError as exc:
+        print(f"error: {exc.args[0]}", file=sys.stderr)
+        return 2
+    text = json.dumps(data, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
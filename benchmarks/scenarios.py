@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from . import generators
+
+
+Timed = Callable[[], Any]
+SetupFn = Callable[[Path, float], Timed]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A benchmark: ``setup(workdir, scale)`` builds the input and returns the timed call.
+
+    Only the returned callable is timed; ``scale`` shrinks or grows the
+    synthetic input (1.0 is the reference size used for comparisons).
+    """
+
+    name: str
+    description: str
+    setup: SetupFn
+    requires: Tuple[str, ...] = ()  # optional modules; missing ones skip the scenario
+
+    def missing(self) -> List[str]:
+        return [mod for mod in self.requires if importlib.util.find_spec(mod) is None]
+
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str, description: str, requires: Tuple[str, ...] = ()) -> Callable[[SetupFn], SetupFn]:
+    def deco(setup: SetupFn) -> SetupFn:
+        if name in SCENARIOS:
+            raise ValueError(f"scenario already registered: {name}")
+        SCENARIOS[name] = Scenario(name, description, setup, requires)
+        return setup
+
+    return deco
+
+
+def scaled(n: int, scale: float, minimum: int = 1) -> int:
+    return max(minimum, int(round(n * scale)))
+
+
+def register_plugins() -> None:
+    from plugins.examples.blur_plus import plugin as blur
+
+    try:
+        blur.register_plugin()
+    except ValueError:
+        pass  # already registered in this process
+
+
+@scenario("validate_path", "vxcli validate on a 200-layer document")
+def _validate(workdir: Path, scale: float) -> Timed:
+    from cli.vxcli import validate_path
+
+    doc = generators.layered_document(workdir / "validate.vxdoc", scaled(200, scale), blur=False)
+
+    def run() -> bool:
+        with contextlib.redirect_stderr(io.StringIO()):
+            ok = validate_path(doc)
+        if not ok:
+            raise RuntimeError(f"generated document does not validate: {doc}")
+        return ok
+
+    return run
+
+
+@scenario("validate_batch", "vxcli validate --jobs 0 over 400 small documents")
+def _validate_batch(workdir: Path, scale: float) -> Timed:
+    from cli.validate import find_documents, validate_many
+
+    root = workdir / "archive"
+    for i in range(scaled(400, scale)):
+        generators.layered_document(root / f"doc{i:04d}.vxdoc", 2, size=16, blur=False, seed=i)
+
+    def run() -> int:
+        reports = list(validate_many(find_documents([str(root)]), jobs=os.cpu_count() or 1))
+        bad = [r.path for r in reports if not r.ok]
+        if bad:
+            raise RuntimeError(f"generated documents do not validate: {bad[:3]}")
+        return len(reports)
+
+    return run
+
+
+@scenario("validate_zipped", "vxcli validate on a zipped document with 64 x 1 MB assets, in place")
+def _validate_zipped(workdir: Path, scale: float) -> Timed:
+    from cli.validate import check_document
+
+    doc = generators.asset_document(workdir / "zipped-src.vxdoc", scaled(64, scale), scaled(1 << 20, scale, 1024))
+    archive = workdir / "zipped.vxdoc"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        for path in sorted(doc.rglob("*")):
+            if path.is_file():
+                zf.write(path, path.relative_to(doc).as_posix())
+
+    def run() -> None:
+        issues = check_document(archive)
+        if issues:
+            raise RuntimeError(f"generated archive does not validate: {issues}")
+
+    return run
+
+
+@scenario("load_document", "parse nodes/layers of a 200-layer document")
+def _load(workdir: Path, scale: float) -> Timed:
+    from node_engine.document import load_document
+
+    doc = generators.layered_document(workdir / "load.vxdoc", scaled(200, scale))
+    return lambda: load_document(doc)
+
+
+def _evaluate_setup(doc: Path, workers: int = 1) -> Timed:
+    from node_engine.document import load_document
+    from node_engine.evaluator import Evaluator
+    from node_engine.image import materialize
+    from node_engine.scheduler import Scheduler
+
+    register_plugins()
+    document = load_document(doc)
+    targets = [layer.source_node for layer in document.layers]
+
+    def run() -> None:
+        if workers > 1:
+            with Scheduler(max_workers=workers) as sched:
+                outputs = Evaluator(document.graph, scheduler=sched).evaluate(targets)
+        else:
+            outputs = Evaluator(document.graph).evaluate(targets)
+        for nid in targets:
+            materialize(outputs[nid])
+
+    return run
+
+
+@scenario("evaluate_deep", "cold evaluation of a 60-node blur/fade/compose chain")
+def _evaluate_deep(workdir: Path, scale: float) -> Timed:
+    return _evaluate_setup(generators.deep_document(workdir / "deep.vxdoc", scaled(60, scale), scaled(256, scale, 16)))
+
+
+@scenario("evaluate_wide", "cold evaluation of 32 independent blurred branches, serial")
+def _evaluate_wide(workdir: Path, scale: float) -> Timed:
+    return _evaluate_setup(generators.wide_document(workdir / "wide.vxdoc", scaled(32, scale), scaled(256, scale, 16)))
+
+
+@scenario("evaluate_wide_parallel", "evaluate_wide on a thread pool (one worker per CPU)")
+def _evaluate_wide_parallel(workdir: Path, scale: float) -> Timed:
+    doc = generators.wide_document(workdir / "wide-par.vxdoc", scaled(32, scale), scaled(256, scale, 16))
+    return _evaluate_setup(doc, workers=os.cpu_count() or 1)
+
+
+@scenario("evaluate_region", "256x256 viewport of a 2048x2048 wide document, cold tiles")
+def _evaluate_region(workdir: Path, scale: float) -> Timed:
+    from node_engine.document import load_document
+    from node_engine.evaluator import Evaluator
+
+    register_plugins()
+    size = scaled(2048, scale, 64)
+    document = load_document(generators.wide_document(workdir / "region.vxdoc", scaled(16, scale), size))
+    target = document.layers[0].source_node
+    view = min(256, size // 2)
+    return lambda: Evaluator(document.graph).evaluate_region(target, (size // 3, size // 3, view, view))
+
+
+@scenario("generate_fbm", "5-octave fBm noise over a 1024² canvas in 256² tiles")
+def _generate_fbm(workdir: Path, scale: float) -> Timed:
+    from node_engine.evaluator import Evaluator
+    from node_engine.graph import Graph, Node
+    from node_engine.image import materialize
+
+    size = scaled(1024, scale, 64)
+    graph = Graph([Node("clouds", "fbm", {"width": size, "height": size, "scale": 96, "seed": 1})])
+    return lambda: materialize(Evaluator(graph).view("clouds", tile_size=256))
+
+
+@scenario("resample", "Lanczos downscale plus a 30-degree rotate of a 1024² noise image")
+def _resample(workdir: Path, scale: float) -> Timed:
+    from node_engine.evaluator import Evaluator
+    from node_engine.graph import Graph, Node
+    from node_engine.image import materialize
+
+    size = scaled(1024, scale, 64)
+    graph = Graph([
+        Node("src", "noise", {"width": size, "height": size, "scale": 24, "seed": 2}),
+        Node("small", "scale", {"factor": 0.37, "filter": "lanczos"}, {"image": "src"}),
+        Node("turned", "rotate", {"angle": 30}, {"image": "src"}),
+    ])
+
+    def run() -> None:
+        ev = Evaluator(graph)
+        materialize(ev.view("small"))
+        materialize(ev.view("turned"))
+
+    return run
+
+
+@scenario("rasterize_paths", "fill 200 random 32-point pen paths into a 2048² mask, flattening cached")
+def _rasterize_paths(workdir: Path, scale: float) -> Timed:
+    from node_engine.vector import polyline_path, rasterize
+
+    size = scaled(2048, scale, 64)
+    path = polyline_path(generators.random_strokes(scaled(200, scale), extent=float(size)))
+    return lambda: rasterize(path, (0, 0, size, size), rule="evenodd")
+
+
+@scenario("composite", "flatten 24 evaluated 1024² layers with mixed blend modes")
+def _composite(workdir: Path, scale: float) -> Timed:
+    from node_engine.compositor import composite
+    from node_engine.document import load_document
+    from node_engine.evaluator import Evaluator
+    from node_engine.render import canvas_size, document_layers
+
+    register_plugins()
+    doc = generators.layered_document(workdir / "composite.vxdoc", scaled(24, scale), scaled(1024, scale, 32))
+    layers = document_layers(load_document(doc), Evaluator(load_document(doc).graph))
+    width, height = canvas_size(layers)
+    return lambda: composite(layers, width, height)
+
+
+@scenario("render_bands", "stream a 24-layer document to PNG in 256-row bands")
+def _render_bands(workdir: Path, scale: float) -> Timed:
+    from node_engine.document import load_document
+    from node_engine.export import export_document
+
+    register_plugins()
+    doc = generators.layered_document(workdir / "bands.vxdoc", scaled(24, scale), scaled(1024, scale, 32))
+    document = load_document(doc)
+    return lambda: export_document(document, workdir / "bands.png")
+
+
+@scenario("render_bands_warm", "render_bands again from a warm persistent disk cache (new process)")
+def _render_bands_warm(workdir: Path, scale: float) -> Timed:
+    from node_engine.cache import DiskCache
+    from node_engine.document import load_document
+    from node_engine.export import export_document
+
+    register_plugins()
+    doc = generators.layered_document(workdir / "warm.vxdoc", scaled(24, scale), scaled(1024, scale, 32))
+    document = load_document(doc)
+    export_document(document, workdir / "warm.png", disk=DiskCache(workdir / "cache"))
+    # A fresh DiskCache rescans the directory, as a new vxcli invocation would
+    return lambda: export_document(document, workdir / "warm.png", disk=DiskCache(workdir / "cache"))
+
+
+@scenario("render_sweep", "64 colour variants of the top layer of an 8-layer blurred document")
+def _render_sweep(workdir: Path, scale: float) -> Timed:
+    from node_engine.document import load_document
+    from node_engine.render import render_sweep
+    from node_engine.sweep import parse_sweep
+
+    register_plugins()
+    layers = scaled(8, scale, 2)
+    document = load_document(generators.layered_document(workdir / "sweep.vxdoc", layers, scaled(512, scale, 32)))
+    colors = ["#%02x%02x%02x" % (i * 4, 255 - i * 4, 128) for i in range(scaled(64, scale, 2))]
+    variants = parse_sweep({"product": {f"fill-{layers - 1}.color": colors}})
+
+    def run() -> None:
+        for _ in render_sweep(document, variants):
+            pass
+
+    return run
+
+
+@scenario("zip_unzip", "zip and unzip a document with 64 x 1 MB assets using zipfile")
+def _zip_unzip(workdir: Path, scale: float) -> Timed:
+    # A plain zipfile round trip, the reference for repack_one_node (vxcli zip);
+    # vxcli pack/unpack are measured by store_revisions
+    doc = generators.asset_document(workdir / "assets.vxdoc", scaled(64, scale), scaled(1 << 20, scale, 1024))
+    archive, out = workdir / "assets.zip", workdir / "unpacked.vxdoc"
+
+    def run() -> None:
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            for path in sorted(doc.rglob("*")):
+                if path.is_file():
+                    zf.write(path, path.relative_to(doc).as_posix())
+        shutil.rmtree(out, ignore_errors=True)
+        with zipfile.ZipFile(archive) as zf:
+            zf.extractall(out)
+
+    return run
+
+
+@scenario("repack_one_node", "re-save a zipped document with 64 x 1 MB assets after a one-node edit")
+def _repack_one_node(workdir: Path, scale: float) -> Timed:
+    from cli.archive import zip_document
+
+    doc = generators.asset_document(workdir / "repack.vxdoc", scaled(64, scale), scaled(1 << 20, scale, 1024))
+    archive = workdir / "repack.zip.vxdoc"
+    zip_document(doc, archive)
+    node = sorted((doc / "nodes").glob("*.json"))[0]
+    edits = iter(range(1 << 30))
+
+    def run() -> None:
+        data = json.loads(node.read_text(encoding="utf-8"))
+        data["params"]["width"] = 64 + next(edits) % 64
+        node.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        zip_document(doc, archive)
+
+    return run
+
+
+@scenario("store_revisions", "pack and unpack 16 revisions sharing 64 x 1 MB assets via the asset store")
+def _store_revisions(workdir: Path, scale: float) -> Timed:
+    from cli.pack import AssetStore, pack_document, unpack_document
+
+    src = generators.asset_document(workdir / "revision.vxdoc", scaled(64, scale), scaled(1 << 20, scale, 1024))
+    revisions = scaled(16, scale, 2)
+
+    def run() -> None:
+        root = workdir / "store-run"
+        shutil.rmtree(root, ignore_errors=True)
+        store = AssetStore(root / "store")
+        for i in range(revisions):
+            packed = root / f"r{i}.vxdoc"
+            pack_document(src, store, packed)
+            unpack_document(packed, store, root / f"r{i}-unpacked.vxdoc")
+
+    return run
+
+
+@scenario("overlay_paint", "paint 2000 brush strokes on the Qt canvas overlay (offscreen)", requires=("PySide6",))
+def _overlay_paint(workdir: Path, scale: float) -> Timed:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6 import QtGui, QtWidgets
+
+    from ui_qt.overlay import CanvasOverlay
+    from ui_qt.tools import ToolState
+
+    doc = generators.stroke_document(workdir / "strokes.vxdoc", scaled(2000, scale))
+    layer = json.loads(sorted((doc / "layers").glob("*.json"))[-1].read_text(encoding="utf-8"))
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    host = QtWidgets.QWidget()
+    state = ToolState(scale=0.5, origin=(0.0, 0.0), artboard=(0.0, 0.0, 2048.0, 2048.0))
+    state.strokes = [[tuple(pt) for pt in stroke] for stroke in layer["strokes"]]
+    overlay = CanvasOverlay(host, state)
+    overlay.auto_fit = False
+    overlay.resize(1024, 1024)
+    target = QtGui.QImage(1024, 1024, QtGui.QImage.Format.Format_ARGB32_Premultiplied)
+
+    def run() -> None:
+        overlay.render(target)
+        app.processEvents()
+
+    return run
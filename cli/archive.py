@@ -0,0 +1,311 @@
+"""Writing a directory .vxdoc to a zip archive, incrementally.
+
+``zip_document`` compares every file with the entry of the same name in
+the existing archive by SHA-256, which each entry we write carries in a
+private extra field. Unchanged entries are copied compressed, byte for
+byte, so saving after a one-node edit only deflates that node's JSON and
+assets cost a hash rather than a recompression. Entries without a digest
+(archives zipped by other tools) are reused only when their decompressed
+bytes equal the file. The new archive is written next to the old
+one and renamed over it, so readers see either the old or the new
+archive and never a half-written central directory.
+
+Entries are written by hand (zipfile has no raw-copy API); the layout is
+plain zip with Zip64 records only when sizes or offsets need them.
+"""
+
+import hashlib
+import os
+import shutil
+import struct
+import time
+import zipfile
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from .validate import archive_prefix
+
+DEFAULT_LEVEL = 6
+_CHUNK = 1 << 20
+
+_LOCAL = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END = struct.Struct("<IHHHHIIH")
+_END64 = struct.Struct("<IQHHIIQQQQ")
+_LOCATOR64 = struct.Struct("<IIQI")
+_LOCAL_SIG, _CENTRAL_SIG, _END_SIG = 0x04034B50, 0x02014B50, 0x06054B50
+_END64_SIG, _LOCATOR64_SIG = 0x06064B50, 0x07064B50
+_U32, _U16 = 0xFFFFFFFF, 0xFFFF
+# Entries this close to 4 GiB get Zip64 sizes up front: deflate can expand
+# incompressible data slightly, and the header is written before the data
+_ZIP64_MARGIN = 1 << 24
+_UTF8 = 0x800
+_MADE_BY_UNIX = 3 << 8
+# Private extra field ("VX") holding the SHA-256 of an entry's uncompressed data
+_SHA256_EXTRA = 0x5856
+
+
+@dataclass
+class _Entry:
+    name: str
+    method: int
+    crc: int
+    csize: int
+    usize: int
+    date_time: Tuple[int, int, int, int, int, int]
+    external_attr: int
+    offset: int = 0
+    zip64: bool = False
+    sha256: bytes = b""
+
+
+@dataclass
+class RepackStats:
+    copied: int = 0  # unchanged entries copied compressed
+    compressed: int = 0  # new or changed entries deflated
+    removed: int = 0  # entries of the old archive no longer in the document
+    copied_bytes: int = 0
+    compressed_bytes: int = 0  # uncompressed size of the deflated entries
+
+
+def file_sha256(path: Path) -> bytes:
+    """SHA-256 digest of the file at ``path``."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                return h.digest()
+            h.update(chunk)
+
+
+def entry_sha256(info: zipfile.ZipInfo) -> Optional[bytes]:
+    """The SHA-256 ``zip_document`` recorded for an entry, if any."""
+    extra, i = info.extra, 0
+    while i + 4 <= len(extra):
+        tag, size = struct.unpack_from("<HH", extra, i)
+        if tag == _SHA256_EXTRA and size == 32:
+            return extra[i + 4:i + 36]
+        i += 4 + size
+    return None
+
+
+def _same_content(zf: zipfile.ZipFile, info: zipfile.ZipInfo, path: Path) -> bool:
+    # Entries without a digest: CRC-32 can collide, so compare the actual bytes
+    with zf.open(info) as old, open(path, "rb") as f:
+        while True:
+            chunk = f.read(_CHUNK)
+            if chunk != old.read(len(chunk)):
+                return False
+            if not chunk:
+                return True
+
+
+def _dos_time(date_time: Tuple[int, ...]) -> Tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    return (hour << 11) | (minute << 5) | (second // 2), ((max(year, 1980) - 1980) << 9) | (month << 5) | day
+
+
+def _file_time(path: Path) -> Tuple[int, int, int, int, int, int]:
+    return time.localtime(os.stat(path).st_mtime)[:6]
+
+
+def _zip64_extra(*values: int) -> bytes:
+    return struct.pack(f"<HH{len(values)}Q", 0x0001, 8 * len(values), *values)
+
+
+def _write_local(out: BinaryIO, entry: _Entry) -> None:
+    entry.offset = out.tell()
+    name = entry.name.encode("utf-8")
+    flags = _UTF8 if not entry.name.isascii() else 0
+    dostime, dosdate = _dos_time(entry.date_time)
+    if entry.zip64:
+        extra = _zip64_extra(entry.usize, entry.csize)
+        csize = usize = _U32
+    else:
+        extra, csize, usize = b"", entry.csize, entry.usize
+    out.write(_LOCAL.pack(_LOCAL_SIG, 45 if entry.zip64 else 20, flags, entry.method, dostime, dosdate,
+                          entry.crc, csize, usize, len(name), len(extra)))
+    out.write(name + extra)
+
+
+def _write_central(out: BinaryIO, entries: List[_Entry]) -> None:
+    start = out.tell()
+    for entry in entries:
+        name = entry.name.encode("utf-8")
+        flags = _UTF8 if not entry.name.isascii() else 0
+        dostime, dosdate = _dos_time(entry.date_time)
+        big = [v for v in (entry.usize, entry.csize) if entry.zip64] + [entry.offset] * (entry.offset >= _U32)
+        extra = _zip64_extra(*big) if big else b""
+        if entry.sha256:
+            extra += struct.pack("<HH", _SHA256_EXTRA, 32) + entry.sha256
+        version = 45 if big else 20
+        out.write(_CENTRAL.pack(
+            _CENTRAL_SIG, _MADE_BY_UNIX | version, version, flags, entry.method, dostime, dosdate, entry.crc,
+            _U32 if entry.zip64 else entry.csize, _U32 if entry.zip64 else entry.usize,
+            len(name), len(extra), 0, 0, 0, entry.external_attr, min(entry.offset, _U32),
+        ))
+        out.write(name + extra)
+    end = out.tell()
+    size, count = end - start, len(entries)
+    if count >= _U16 or size >= _U32 or start >= _U32:
+        out.write(_END64.pack(_END64_SIG, 44, _MADE_BY_UNIX | 45, 45, 0, 0, count, count, size, start))
+        out.write(_LOCATOR64.pack(_LOCATOR64_SIG, 0, end, 1))
+    out.write(_END.pack(_END_SIG, 0, 0, min(count, _U16), min(count, _U16), min(size, _U32), min(start, _U32), 0))
+
+
+def _copy_entry(out: BinaryIO, src: BinaryIO, info: zipfile.ZipInfo, entry: _Entry) -> None:
+    # The old local header may carry different extras; only its data is reused
+    src.seek(info.header_offset)
+    header = src.read(_LOCAL.size)
+    if len(header) != _LOCAL.size or _LOCAL.unpack(header)[0] != _LOCAL_SIG:
+        raise zipfile.BadZipFile(f"bad local header for {info.filename}")
+    *_, name_len, extra_len = _LOCAL.unpack(header)
+    src.seek(info.header_offset + _LOCAL.size + name_len + extra_len)
+    _write_local(out, entry)
+    remaining = info.compress_size
+    while remaining:
+        chunk = src.read(min(_CHUNK, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"truncated entry {info.filename}")
+        out.write(chunk)
+        remaining -= len(chunk)
+
+
+def _deflate_entry(out: BinaryIO, path: Path, entry: _Entry, level: int) -> None:
+    # Header first with placeholder sizes, then patched once the data is written
+    _write_local(out, entry)
+    data_start = out.tell()
+    comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+    digest = hashlib.sha256()
+    crc = size = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+            digest.update(chunk)
+            size += len(chunk)
+            out.write(comp.compress(chunk))
+    out.write(comp.flush())
+    end = out.tell()
+    entry.crc, entry.usize, entry.csize, entry.sha256 = crc, size, end - data_start, digest.digest()
+    if not entry.zip64 and max(entry.usize, entry.csize) >= _U32:
+        raise zipfile.LargeZipFile(f"{entry.name} grew past 4 GiB while being archived")
+    out.seek(entry.offset)
+    _write_local(out, entry)
+    out.seek(end)
+
+
+def _document_files(doc: Path) -> Tuple[Dict[str, Path], List[str]]:
+    # Archive names of every file, plus empty folders (which need their own entry)
+    files: Dict[str, Path] = {}
+    empty: List[str] = []
+    for root, dirs, names in os.walk(doc):
+        dirs.sort()
+        rel = Path(root).relative_to(doc).as_posix()
+        base = "" if rel == "." else f"{rel}/"
+        for name in sorted(names):
+            files[base + name] = Path(root) / name
+        if base and not dirs and not names:
+            empty.append(base)
+    return files, empty
+
+
+def _reusable(zf: zipfile.ZipFile, info: zipfile.ZipInfo, path: Path) -> Optional[bytes]:
+    # The file's SHA-256 when the old entry holds exactly its bytes, else None
+    if info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) or info.flag_bits & 0x1 \
+            or info.file_size != os.path.getsize(path):
+        return None
+    recorded = entry_sha256(info)
+    if recorded is not None:
+        digest = file_sha256(path)
+        return digest if digest == recorded else None
+    try:
+        if not _same_content(zf, info, path):
+            return None
+    except (zipfile.BadZipFile, zlib.error, OSError):
+        return None
+    return file_sha256(path)
+
+
+def zip_document(doc: Path, archive: Path, level: int = DEFAULT_LEVEL) -> RepackStats:
+    """Write directory document ``doc`` to ``archive`` (entries at the archive root).
+
+    When ``archive`` exists, entries whose content matches the file (by
+    recorded SHA-256, or byte for byte when the entry has none) are copied
+    without recompressing; a damaged old archive is ignored and everything
+    is compressed afresh.
+    """
+    doc, archive = Path(doc), Path(archive)
+    if not doc.is_dir():
+        raise NotADirectoryError(f"not a directory-style .vxdoc: {doc}")
+    files, empty = _document_files(doc)
+    stats = RepackStats()
+
+    old: Optional[zipfile.ZipFile] = None
+    previous: Dict[str, zipfile.ZipInfo] = {}
+    if archive.exists():
+        try:
+            old = zipfile.ZipFile(archive)
+        except (zipfile.BadZipFile, OSError):
+            old = None
+        if old is not None:
+            prefix = archive_prefix(old.namelist())
+            previous = {i.filename[len(prefix):]: i for i in old.infolist() if i.filename.startswith(prefix)}
+
+    # Created with the usual umask-derived mode, unlike mkstemp's 0600
+    tmp = archive.parent / f".{archive.name}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_CREAT | os.O_EXCL | os.O_RDWR | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        with os.fdopen(fd, "w+b") as out:
+            src = open(archive, "rb") if old is not None else None
+            try:
+                entries: List[_Entry] = []
+                for name, path in files.items():
+                    mode = os.stat(path).st_mode
+                    info = previous.get(name)
+                    digest = _reusable(old, info, path) if info is not None else None
+                    if digest is not None:
+                        entry = _Entry(name, info.compress_type, info.CRC, info.compress_size, info.file_size,
+                                       info.date_time, (mode & 0xFFFF) << 16,
+                                       zip64=max(info.compress_size, info.file_size) >= _U32 - _ZIP64_MARGIN,
+                                       sha256=digest)
+                        _copy_entry(out, src, info, entry)
+                        stats.copied += 1
+                        stats.copied_bytes += info.file_size
+                    else:
+                        size = os.path.getsize(path)
+                        entry = _Entry(name, zipfile.ZIP_DEFLATED, 0, 0, 0, _file_time(path), (mode & 0xFFFF) << 16,
+                                       zip64=size >= _U32 - _ZIP64_MARGIN)
+                        _deflate_entry(out, path, entry, level)
+                        stats.compressed += 1
+                        stats.compressed_bytes += entry.usize
+                    entries.append(entry)
+                for name in empty:
+                    entry = _Entry(name, zipfile.ZIP_STORED, 0, 0, 0, _file_time(doc / name), (0o40755 << 16) | 0x10)
+                    _write_local(out, entry)
+                    entries.append(entry)
+                _write_central(out, entries)
+            finally:
+                if src is not None:
+                    src.close()
+            out.flush()
+            os.fsync(out.fileno())
+        if old is not None:
+            old.close()
+            shutil.copymode(archive, tmp)
+        os.replace(tmp, archive)
+    except BaseException:
+        if old is not None:
+            old.close()
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    stats.removed = len({n for n in previous if not n.endswith("/")} - set(files))
+    return stats
@@ -0,0 +1,267 @@
+"""Content-addressed asset storage for ``vxcli pack`` / ``vxcli unpack``.
+
+Packing moves a document's ``assets/`` files into a shared ``AssetStore``,
+one file per distinct content (named by its SHA-256), and records each
+asset in the manifest as ``"assets": {"<path>": {"sha256": ..., "size": ...}}``.
+Identical assets across documents or revisions are stored once. Unpacking
+materializes ``assets/`` again by reflinking or hardlinking from the store,
+falling back to a copy, so restoring a revision costs no extra disk.
+
+Store objects are read-only. A hardlinked asset shares its inode with the
+store, so an editor must replace the file rather than write into it (the
+permission bits make an in-place write fail instead of silently changing
+every document that shares the asset).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .schema import load_validator
+
+STORE_DIR_ENV = "VX_STORE_DIR"
+LINK_MODES = ("auto", "reflink", "hardlink", "copy")
+_CHUNK = 1 << 20
+# Linux FICLONE ioctl: share extents with the source (btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+
+class PackError(ValueError):
+    """A document cannot be packed or unpacked."""
+
+
+@dataclass
+class PackStats:
+    files: int = 0
+    bytes: int = 0
+    new_files: int = 0  # not already in the store
+    new_bytes: int = 0
+    links: Dict[str, int] = field(default_factory=dict)  # link mode -> files (unpack)
+
+
+def file_digest(path: Path) -> Tuple[str, int]:
+    """SHA-256 hex digest and size of the file at ``path``."""
+    h = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+            size += len(chunk)
+    return h.hexdigest(), size
+
+
+class AssetStore:
+    """Files keyed by SHA-256 under ``root``, shared by any number of documents.
+
+    Objects are written to a temporary name and renamed into place, so
+    concurrent packers sharing a store never see partial objects.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root) / "sha256"
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+
+    def __contains__(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def put(self, source: Path, digest: Optional[str] = None) -> Tuple[str, int, bool]:
+        """Add the file at ``source``; (digest, size, newly stored)."""
+        if digest is None:
+            digest, size = file_digest(source)
+        else:
+            size = os.path.getsize(source)
+        dest = self.path(digest)
+        if dest.exists():
+            return digest, size, False
+        dest.parent.mkdir(exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(source, tmp)
+            os.chmod(tmp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp, dest)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        return digest, size, True
+
+    def materialize(self, digest: str, dest: Path, mode: str = "auto") -> str:
+        """Create ``dest`` with the content of object ``digest``; returns the link mode used."""
+        if mode not in LINK_MODES:
+            raise PackError(f"unknown link mode: {mode!r} (expected one of {LINK_MODES})")
+        source = self.path(digest)
+        if not source.exists():
+            raise PackError(f"asset {digest} is not in the store {self.root.parent}")
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists() or dest.is_symlink():
+            dest.unlink()
+        if mode in ("auto", "reflink") and _reflink(source, dest):
+            return "reflink"
+        if mode == "reflink":
+            raise PackError(f"cannot reflink {dest}: not supported by this filesystem")
+        if mode in ("auto", "hardlink"):
+            try:
+                os.link(source, dest)
+                return "hardlink"
+            except OSError:
+                if mode == "hardlink":
+                    raise
+        shutil.copyfile(source, dest)
+        return "copy"
+
+
+def _reflink(source: Path, dest: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:  # not on POSIX
+        return False
+    try:
+        with open(source, "rb") as src, open(dest, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return True
+    except OSError:
+        try:
+            dest.unlink()
+        except OSError:
+            pass
+        return False
+
+
+def _read_manifest(doc: Path) -> dict:
+    try:
+        manifest = json.loads((doc / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise PackError(f"cannot read {doc / 'manifest.json'}: {exc}") from None
+    errors = load_validator("manifest").errors(manifest)
+    if errors:
+        raise PackError(f"invalid manifest.json: {'; '.join(errors)}")
+    return manifest
+
+
+def _write_manifest(doc: Path, manifest: dict) -> None:
+    path = doc / "manifest.json"
+    fd, tmp = tempfile.mkstemp(dir=doc, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(json.dumps(manifest, indent=2) + "\n")
+    os.replace(tmp, path)
+
+
+def _loose_assets(doc: Path) -> Dict[str, Path]:
+    # Asset files still in the folder (.gitkeep placeholders are not assets)
+    root = doc / "assets"
+    return {
+        p.relative_to(root).as_posix(): p
+        for p in sorted(root.rglob("*"))
+        if p.is_file() and p.name != ".gitkeep"
+    }
+
+
+def _copy_document(src: Path, dest: Path) -> None:
+    # Everything but the asset files (the caller places those); .gitkeep placeholders are kept
+    if dest.exists():
+        raise PackError(f"output already exists: {dest}")
+    shutil.copytree(src, dest, ignore=lambda d, names: names if Path(d) == src / "assets" else [])
+    for keep in sorted((src / "assets").rglob(".gitkeep")):
+        target = dest / keep.relative_to(src)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(keep, target)
+
+
+def pack_document(src: Path, store: AssetStore, dest: Optional[Path] = None) -> PackStats:
+    """Move the assets of directory document ``src`` into ``store``.
+
+    Writes the packed document to ``dest`` (``src`` is left alone), or packs
+    ``src`` in place. Assets already recorded in the manifest are kept;
+    loose files in ``assets/`` are added, replacing entries of the same path.
+    """
+    src = Path(src)
+    if not src.is_dir():
+        raise PackError(f"not a directory-style .vxdoc: {src}")
+    manifest = _read_manifest(src)
+    entries = dict(manifest.get("assets") or {})
+    missing = sorted(rel for rel, entry in entries.items() if entry.get("sha256") not in store)
+    if missing:
+        raise PackError(f"assets missing from the store: {', '.join(missing)}")
+    loose = _loose_assets(src)
+    stats = PackStats()
+    for rel, path in loose.items():
+        digest, size, new = store.put(path)
+        entries[rel] = {"sha256": digest, "size": size}
+        stats.new_files += new
+        stats.new_bytes += size if new else 0
+    for entry in entries.values():
+        stats.files += 1
+        stats.bytes += int(entry.get("size", 0))
+    manifest["assets"] = dict(sorted(entries.items()))
+
+    if dest is None:
+        _write_manifest(src, manifest)
+        for path in loose.values():
+            path.unlink()
+        _prune_empty(src / "assets")
+    else:
+        dest = Path(dest)
+        _copy_document(src, dest)
+        try:
+            _write_manifest(dest, manifest)
+        except BaseException:
+            shutil.rmtree(dest, ignore_errors=True)
+            raise
+    return stats
+
+
+def unpack_document(src: Path, store: AssetStore, dest: Path, mode: str = "auto") -> PackStats:
+    """Write a self-contained copy of packed document ``src`` to ``dest``,
+    with every stored asset restored under ``assets/``."""
+    src, dest = Path(src), Path(dest)
+    if not src.is_dir():
+        raise PackError(f"not a directory-style .vxdoc: {src}")
+    manifest = _read_manifest(src)
+    entries = manifest.pop("assets", None) or {}
+    missing = sorted(rel for rel, entry in entries.items() if entry.get("sha256") not in store)
+    if missing:
+        raise PackError(f"assets missing from the store: {', '.join(missing)}")
+    _copy_document(src, dest)
+    stats = PackStats()
+    try:
+        for rel, path in _loose_assets(src).items():
+            if rel not in entries:
+                (dest / "assets" / rel).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(path, dest / "assets" / rel)
+        for rel, entry in entries.items():
+            target = dest / "assets" / rel
+            if not target.resolve().is_relative_to((dest / "assets").resolve()):
+                raise PackError(f"asset path escapes the document: {rel!r}")
+            used = store.materialize(entry["sha256"], target, mode)
+            stats.links[used] = stats.links.get(used, 0) + 1
+            stats.files += 1
+            stats.bytes += int(entry.get("size", 0))
+        _write_manifest(dest, manifest)
+    except BaseException:
+        shutil.rmtree(dest, ignore_errors=True)
+        raise
+    return stats
+
+
+def _prune_empty(root: Path) -> None:
+    # Remove subfolders emptied by packing, deepest first; keep root itself
+    for path in sorted((p for p in root.rglob("*") if p.is_dir()), key=lambda p: len(p.parts), reverse=True):
+        try:
+            path.rmdir()
+        except OSError:
+            pass
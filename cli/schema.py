@@ -0,0 +1,299 @@
+"""A small JSON Schema compiler for the document schemas in ``/schemas``.
+
+A schema is compiled once into a tree of closures, one per keyword, and
+the compiled validator is cached per process, so checking thousands of
+node files costs a few function calls per value rather than a walk over
+the schema dict each time. Every violation in a file is reported, each
+with a JSON pointer to the offending value; pointers are only rendered
+for values that fail, so valid files pay nothing for them.
+
+Only the keywords our schemas use are supported; anything else is
+rejected at compile time rather than silently ignored.
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SCHEMA_DIR = Path(__file__).resolve().parents[1] / "schemas"
+
+# Where a value sits: None for the document root, else (parent, key)
+Where = Optional[Tuple[Any, Any]]
+Check = Callable[[Any, Where, List[str]], None]
+
+_TYPES: Dict[str, Tuple[type, ...]] = {
+    "object": (dict,),
+    "array": (list,),
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "null": (type(None),),
+}
+# Keywords that only describe a schema
+_ANNOTATIONS = {"$schema", "$id", "$comment", "title", "description", "default", "examples", "$defs", "definitions"}
+
+
+class SchemaError(ValueError):
+    """A schema uses an unsupported keyword or is malformed."""
+
+
+class Validator:
+    """A compiled schema: ``errors(instance)`` lists every violation."""
+
+    def __init__(self, schema: Dict[str, Any]) -> None:
+        self.schema = schema
+        self._refs: Dict[str, Check] = {}
+        self._check = self._compile(schema)
+
+    def errors(self, instance: Any) -> List[str]:
+        out: List[str] = []
+        self._check(instance, None, out)
+        return out
+
+    def is_valid(self, instance: Any) -> bool:
+        return not self.errors(instance)
+
+    def _compile(self, schema: Any) -> Check:
+        if schema is True or schema == {}:
+            return lambda value, path, out: None
+        if schema is False:
+            return lambda value, path, out: out.append(f"{_pointer(path)}: no value is allowed here")
+        if not isinstance(schema, dict):
+            raise SchemaError(f"schema must be an object or boolean, got {schema!r}")
+        checks: List[Check] = []
+        for key, arg in schema.items():
+            if key in _ANNOTATIONS or key == "additionalProperties":
+                continue
+            compile_keyword = getattr(self, f"_kw_{key.lstrip('$')}", None)
+            if compile_keyword is None:
+                raise SchemaError(f"unsupported schema keyword: {key}")
+            checks.append(compile_keyword(arg, schema))
+        if "additionalProperties" in schema:
+            checks.append(self._kw_additionalProperties(schema["additionalProperties"], schema))
+        if len(checks) == 1:
+            return checks[0]
+
+        def check(value: Any, path: Where, out: List[str]) -> None:
+            for c in checks:
+                c(value, path, out)
+
+        return check
+
+    def _kw_ref(self, ref: str, schema: Dict[str, Any]) -> Check:
+        if not ref.startswith("#/"):
+            raise SchemaError(f"only local $ref is supported, got {ref!r}")
+
+        def check(value: Any, path: Where, out: List[str]) -> None:
+            # Resolved on first use, so recursive definitions compile
+            if ref not in self._refs:
+                target: Any = self.schema
+                for part in ref[2:].split("/"):
+                    try:
+                        target = target[part]
+                    except (KeyError, TypeError):
+                        raise SchemaError(f"unresolvable $ref: {ref}") from None
+                self._refs[ref] = self._compile(target)
+            self._refs[ref](value, path, out)
+
+        return check
+
+    def _kw_type(self, arg: Any, schema: Dict[str, Any]) -> Check:
+        names = [arg] if isinstance(arg, str) else list(arg)
+        unknown = [n for n in names if n not in _TYPES]
+        if unknown:
+            raise SchemaError(f"unknown type: {unknown}")
+        types = tuple(t for n in names for t in _TYPES[n])
+        # bool is an int in Python but not in JSON
+        allow_bool = "boolean" in names
+        expected = " or ".join(names)
+
+        def check(value: Any, path: Where, out: List[str]) -> None:
+            if not isinstance(value, types) or (value is True or value is False) and not allow_bool:
+                out.append(f"{_pointer(path)}: expected {expected}, got {_type_name(value)}")
+
+        return check
+
+    def _kw_enum(self, arg: List[Any], schema: Dict[str, Any]) -> Check:
+        def check(value: Any, path: Where, out: List[str]) -> None:
+            if not any(_equal(value, option) for option in arg):
+                out.append(f"{_pointer(path)}: {value!r} is not one of {arg!r}")
+
+        return check
+
+    def _kw_const(self, arg: Any, schema: Dict[str, Any]) -> Check:
+        def check(value: Any, path: Where, out: List[str]) -> None:
+            if not _equal(value, arg):
+                out.append(f"{_pointer(path)}: expected {arg!r}, got {value!r}")
+
+        return check
+
+    def _kw_required(self, arg: List[str], schema: Dict[str, Any]) -> Check:
+        def check(value: Any, path: Where, out: List[str]) -> None:
+            if isinstance(value, dict):
+                for key in arg:
+                    if key not in value:
+                        out.append(f"{_pointer(path)}: missing required property {key!r}")
+
+        return check
+
+    def _kw_properties(self, arg: Dict[str, Any], schema: Dict[str, Any]) -> Check:
+        props = {name: self._compile(sub) for name, sub in arg.items()}
+
+        def check(value: Any, path: Where, out: List[str]) -> None:
+            if isinstance(value, dict):
+                for name, sub in props.items():
+                    if name in value:
+                        sub(value[name], (path, name), out)
+
+        return check
+
+    def _kw_patternProperties(self, arg: Dict[str, Any], schema: Dict[str, Any]) -> Check:
+        patterns = [(re.compile(p), self._compile(sub)) for p, sub in arg.items()]
+
+        def check(value: Any, path: Where, out: List[str]) -> None:
+            if isinstance(value, dict):
+                for name, item in value.items():
+                    for pattern, sub in patterns:
+                        if pattern.search(name):
+                            sub(item, (path, name), out)
+
+        return check
+
+    def _kw_additionalProperties(self, arg: Any, schema: Dict[str, Any]) -> Check:
+        known = set(schema.get("properties", {}))
+        patterns = [re.compile(p) for p in schema.get("patternProperties", {})]
+        sub = self._compile(arg)
+
+        def check(value: Any, path: Where, out: List[str]) -> None:
+            if isinstance(value, dict):
+                for name, item in value.items():
+                    if name not in known and not any(p.search(name) for p in patterns):
+                        if arg is False:
+                            out.append(f"{_pointer(path)}: unexpected property {name!r}")
+                        else:
+                            sub(item, (path, name), out)
+
+        return check
+
+    def _kw_items(self, arg: Any, schema: Dict[str, Any]) -> Check:
+        sub = self._compile(arg)
+
+        def check(value: Any, path: Where, out: List[str]) -> None:
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    sub(item, (path, i), out)
+
+        return check
+
+    def _kw_minItems(self, arg: int, schema: Dict[str, Any]) -> Check:
+        return _bound(list, len, lambda n: n < arg, f"must have at least {arg} items")
+
+    def _kw_maxItems(self, arg: int, schema: Dict[str, Any]) -> Check:
+        return _bound(list, len, lambda n: n > arg, f"must have at most {arg} items")
+
+    def _kw_minLength(self, arg: int, schema: Dict[str, Any]) -> Check:
+        return _bound(str, len, lambda n: n < arg, f"must be at least {arg} characters")
+
+    def _kw_maxLength(self, arg: int, schema: Dict[str, Any]) -> Check:
+        return _bound(str, len, lambda n: n > arg, f"must be at most {arg} characters")
+
+    def _kw_minimum(self, arg: float, schema: Dict[str, Any]) -> Check:
+        return _bound((int, float), float, lambda v: v < arg, f"must be >= {arg}")
+
+    def _kw_maximum(self, arg: float, schema: Dict[str, Any]) -> Check:
+        return _bound((int, float), float, lambda v: v > arg, f"must be <= {arg}")
+
+    def _kw_exclusiveMinimum(self, arg: float, schema: Dict[str, Any]) -> Check:
+        return _bound((int, float), float, lambda v: v <= arg, f"must be > {arg}")
+
+    def _kw_exclusiveMaximum(self, arg: float, schema: Dict[str, Any]) -> Check:
+        return _bound((int, float), float, lambda v: v >= arg, f"must be < {arg}")
+
+    def _kw_pattern(self, arg: str, schema: Dict[str, Any]) -> Check:
+        pattern = re.compile(arg)
+
+        def check(value: Any, path: Where, out: List[str]) -> None:
+            if isinstance(value, str) and not pattern.search(value):
+                out.append(f"{_pointer(path)}: {value!r} does not match {arg!r}")
+
+        return check
+
+    def _kw_allOf(self, arg: List[Any], schema: Dict[str, Any]) -> Check:
+        subs = [self._compile(s) for s in arg]
+
+        def check(value: Any, path: Where, out: List[str]) -> None:
+            for sub in subs:
+                sub(value, path, out)
+
+        return check
+
+    def _kw_anyOf(self, arg: List[Any], schema: Dict[str, Any]) -> Check:
+        return self._combine(arg, lambda n: n >= 1, "must match at least one of the anyOf schemas")
+
+    def _kw_oneOf(self, arg: List[Any], schema: Dict[str, Any]) -> Check:
+        return self._combine(arg, lambda n: n == 1, "must match exactly one of the oneOf schemas")
+
+    def _combine(self, arg: List[Any], accept: Callable[[int], bool], message: str) -> Check:
+        subs = [self._compile(s) for s in arg]
+
+        def check(value: Any, path: Where, out: List[str]) -> None:
+            matched = 0
+            for sub in subs:
+                errors: List[str] = []
+                sub(value, path, errors)
+                matched += not errors
+            if not accept(matched):
+                out.append(f"{_pointer(path)}: {message}")
+
+        return check
+
+
+def _bound(types: Any, measure: Callable[[Any], float], fails: Callable[[float], bool], message: str) -> Check:
+    def check(value: Any, path: Where, out: List[str]) -> None:
+        if isinstance(value, types) and not isinstance(value, bool) and fails(measure(value)):
+            out.append(f"{_pointer(path)}: {message}")
+
+    return check
+
+
+def _equal(a: Any, b: Any) -> bool:
+    # JSON equality: 1 == 1.0, but true != 1
+    return a == b and isinstance(a, bool) == isinstance(b, bool)
+
+
+def _pointer(path: Where) -> str:
+    # The JSON pointer for a location, "/" for the root
+    parts: List[str] = []
+    while path is not None:
+        path, key = path
+        parts.append(str(key).replace("~", "~0").replace("/", "~1"))
+    return "/" + "/".join(reversed(parts))
+
+
+def _type_name(value: Any) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    for name, types in _TYPES.items():
+        if isinstance(value, types):
+            return name
+    return type(value).__name__
+
+
+@lru_cache(maxsize=None)
+def load_validator(name: str, schema_dir: Path = SCHEMA_DIR) -> Validator:
+    """The compiled validator for ``<schema_dir>/<name>.schema.json``, compiled once per process."""
+    path = Path(schema_dir) / f"{name}.schema.json"
+    try:
+        schema = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+        raise SchemaError(f"cannot load schema {path}: {exc}") from None
+    return Validator(schema)
+
+
+def validate_json(name: str, text: str) -> Tuple[Any, List[str]]:
+    """Parse ``text`` and check it against schema ``name``; (data, violations)."""
+    data = json.loads(text)
+    return data, load_validator(name).errors(data)
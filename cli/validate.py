@@ -0,0 +1,278 @@
+"""Document validation for ``vxcli validate``, one document or thousands.
+
+``check_document`` returns coded issues instead of printing, so results can
+be reported as JSON; ``validate_many`` fans documents out to worker
+processes in small batches and yields reports as they finish. The
+manifest and every node and layer file are checked against the schemas in
+``/schemas`` (see ``cli.schema``).
+"""
+
+import glob
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Set, Union
+
+from .schema import load_validator
+
+REQUIRED_ENTRIES = ("manifest.json", "nodes", "layers", "assets", "collab")
+# Schema (schemas/<name>.schema.json) for the JSON files in each folder
+FOLDER_SCHEMAS = (("nodes", "node"), ("layers", "layer"))
+# Documents handed to a worker at a time, and batches kept in flight per worker
+BATCH_SIZE = 16
+BATCHES_PER_WORKER = 2
+
+
+@dataclass(frozen=True)
+class Issue:
+    code: str
+    message: str
+
+
+@dataclass
+class Report:
+    path: str
+    status: str  # "valid", "invalid", or "error" when the validator itself failed
+    errors: List[Issue] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "valid"
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["seconds"] = round(self.seconds, 6)
+        return json.dumps(data)
+
+
+class _Directory:
+    """A directory-style .vxdoc."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def has(self, name: str) -> bool:
+        return (self.root / name).exists()
+
+    def json_entries(self, folder: str) -> List[str]:
+        try:
+            with os.scandir(self.root / folder) as it:
+                return sorted(f"{folder}/{e.name}" for e in it if e.name.endswith(".json"))
+        except NotADirectoryError:
+            return []
+
+    def read_text(self, name: str) -> str:
+        # Plain string paths: pathlib overhead adds up over thousands of node files
+        with open(os.path.join(self.root, name), encoding="utf-8") as f:
+            return f.read()
+
+    def close(self) -> None:
+        pass
+
+
+def archive_prefix(names: List[str]) -> str:
+    """The folder all document entries sit under ("" for the archive root)."""
+    tops = {n.split("/", 1)[0] for n in names}
+    if "manifest.json" not in names and len(tops) == 1 and f"{next(iter(tops))}/manifest.json" in names:
+        return f"{next(iter(tops))}/"
+    return ""
+
+
+class _Archive:
+    """A zipped .vxdoc, read in place.
+
+    Opening reads only the central directory; ``read_text`` decompresses a
+    single entry, so asset payloads are never touched. Entries may sit at
+    the archive root or under one top-level folder (a zipped directory).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.zf = zipfile.ZipFile(path)
+        names = [n for n in self.zf.namelist() if not n.startswith("__MACOSX/")]
+        self.prefix = archive_prefix(names)
+        self.names: Set[str] = set()
+        self.folders: Set[str] = set()
+        for name in names:
+            if not name.startswith(self.prefix):
+                continue
+            rel = name[len(self.prefix):].rstrip("/")
+            if rel:
+                self.names.add(rel)
+            parts = rel.split("/")
+            self.folders.update("/".join(parts[:i]) for i in range(1, len(parts)))
+            if name.endswith("/"):
+                self.folders.add(rel)
+
+    def has(self, name: str) -> bool:
+        return name in self.names or name in self.folders
+
+    def json_entries(self, folder: str) -> List[str]:
+        return sorted(n for n in self.names
+                      if n.startswith(f"{folder}/") and n.endswith(".json") and "/" not in n[len(folder) + 1:])
+
+    def read_text(self, name: str) -> str:
+        with self.zf.open(self.prefix + name) as f:
+            return f.read().decode("utf-8")
+
+    def close(self) -> None:
+        self.zf.close()
+
+
+def check_document(path: Path) -> List[Issue]:
+    """Problems with the .vxdoc at ``path`` (a directory or a zip); empty when valid.
+
+    Checks for manifest.json and the required subfolders/files referenced by
+    the README, then checks the manifest and every node and layer file
+    against its schema. A missing entry or unreadable manifest stops the
+    check; otherwise every problem in every file is reported.
+    """
+    if not path.exists():
+        return [Issue("not_found", f"path not found: {path}")]
+    if path.is_dir():
+        doc = _Directory(path)
+    else:
+        try:
+            doc = _Archive(path)
+        except (zipfile.BadZipFile, OSError) as exc:
+            return [Issue("bad_archive", f"not a zip archive or directory: {exc}")]
+    try:
+        return _check(doc, path)
+    finally:
+        doc.close()
+
+
+def _check(doc: Union[_Directory, _Archive], path: Path) -> List[Issue]:
+    missing = [name for name in REQUIRED_ENTRIES if not doc.has(name)]
+    if missing:
+        return [Issue("missing_entry", f"missing required entry: {path / m}") for m in missing]
+
+    try:
+        manifest = json.loads(doc.read_text("manifest.json"))
+    except Exception as exc:
+        return [Issue("manifest_json", f"manifest.json not valid JSON: {exc}")]
+    issues = _schema_issues("manifest", "manifest.json", manifest)
+
+    # Basic presence check for at least one node/layer file
+    entries = {folder: doc.json_entries(folder) for folder, _ in FOLDER_SCHEMAS}
+    if not all(entries.values()):
+        issues.append(Issue("empty_document", "expected at least one node and one layer JSON"))
+    for folder, schema in FOLDER_SCHEMAS:
+        for name in entries[folder]:
+            try:
+                data = json.loads(doc.read_text(name))
+            except Exception as exc:
+                issues.append(Issue("entry_json", f"{name} not valid JSON: {exc}"))
+                continue
+            issues += _schema_issues(schema, name, data)
+
+    # If presence file exists, ensure it's JSON
+    try:
+        json.loads(doc.read_text("collab/presence.json"))
+    except Exception as exc:
+        issues.append(Issue("presence_json", f"collab/presence.json invalid JSON: {exc}"))
+    return issues
+
+
+def _schema_issues(schema: str, name: str, data: Any) -> List[Issue]:
+    # Validators are compiled once per process and shared by every document
+    return [Issue("schema", f"{name}: {error}") for error in load_validator(schema).errors(data)]
+
+
+def validate_one(path: str) -> Report:
+    start = time.perf_counter()
+    try:
+        errors = check_document(Path(path))
+        status = "invalid" if errors else "valid"
+    except Exception as exc:
+        errors, status = [Issue("internal", f"{type(exc).__name__}: {exc}")], "error"
+    return Report(path, status, errors, time.perf_counter() - start)
+
+
+def _validate_batch(paths: List[str]) -> List[Report]:
+    return [validate_one(p) for p in paths]
+
+
+def is_document(path: Path) -> bool:
+    return path.suffix == ".vxdoc" or (path / "manifest.json").exists()
+
+
+def find_documents(targets: Iterable[str]) -> Iterator[str]:
+    """Documents named by ``targets``: paths, directories searched for
+    ``*.vxdoc`` (without descending into documents), or glob patterns.
+
+    Lazy, so validation can start while a large tree is still being walked.
+    Paths that do not exist are passed through (and reported as not found).
+    """
+    seen: Set[str] = set()
+
+    def expand(target: str) -> Iterator[str]:
+        path = Path(target)
+        if is_document(path) or not path.is_dir():
+            yield target
+            return
+        for root, dirs, files in os.walk(target):
+            dirs.sort()
+            for name in [d for d in dirs if d.endswith(".vxdoc")]:
+                dirs.remove(name)
+                yield os.path.join(root, name)
+            for name in sorted(files):
+                if name.endswith(".vxdoc"):
+                    yield os.path.join(root, name)
+
+    for target in targets:
+        matches = sorted(glob.glob(target, recursive=True)) if glob.has_magic(target) else [target]
+        for match in matches:
+            for doc in expand(match):
+                if doc not in seen:
+                    seen.add(doc)
+                    yield doc
+
+
+def _batches(paths: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch: List[str] = []
+    for path in paths:
+        batch.append(path)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def validate_many(paths: Iterable[str], jobs: int = 1) -> Iterator[Report]:
+    """Reports for ``paths``, in completion order when ``jobs`` > 1.
+
+    Workers get ``BATCH_SIZE`` documents per task and only a few batches per
+    worker are queued at once, so memory stays flat however many documents
+    there are and results stream out as batches complete.
+    """
+    if jobs <= 1:
+        for path in paths:
+            yield validate_one(path)
+        return
+    batches = _batches(paths, BATCH_SIZE)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending: Dict[Future, List[str]] = {}
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < jobs * BATCHES_PER_WORKER:
+                batch = next(batches, None)
+                if batch is None:
+                    exhausted = True
+                else:
+                    pending[pool.submit(_validate_batch, batch)] = batch
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                batch = pending.pop(fut)
+                try:
+                    reports = fut.result()
+                except Exception as exc:  # a worker died; don't lose the batch silently
+                    reports = [Report(p, "error", [Issue("internal", f"{type(exc).__name__}: {exc}")]) for p in batch]
+                yield from reports
@@ -1,73 +1,77 @@
 import argparse
-import json
+import glob
+import os
 import sys
+import time
+import zipfile
 from pathlib import Path
 
+from .archive import DEFAULT_LEVEL, zip_document
+from .pack import LINK_MODES, STORE_DIR_ENV, AssetStore, PackError, pack_document, unpack_document
+from .validate import check_document, find_documents, is_document, validate_many
+
 
 def validate_path(path: Path) -> bool:
-    """Minimal validator for a directory-style .vxdoc.
+    """Minimal validator for a directory-style .vxdoc; errors go to stderr.
 
-    Checks for manifest.json and required subfolders/files referenced by README.
+    See ``validate.check_document`` for the checks.
     """
-    if not path.exists():
-        print(f"error: path not found: {path}", file=sys.stderr)
-        return False
-
-    if path.is_file():
-        print("error: expected a directory-style .vxdoc for now", file=sys.stderr)
-        return False
-
-    manifest = path / "manifest.json"
-    nodes_dir = path / "nodes"
-    layers_dir = path / "layers"
-    assets_dir = path / "assets"
-    collab_dir = path / "collab"
-
-    missing = [p for p in [manifest, nodes_dir, layers_dir, assets_dir, collab_dir] if not p.exists()]
-    if missing:
-        for m in missing:
-            print(f"error: missing required entry: {m}", file=sys.stderr)
-        return False
+    issues = check_document(path)
+    for issue in issues:
+        print(f"error: {issue.message}", file=sys.stderr)
+    return not issues
 
-    try:
-        data = json.loads(manifest.read_text(encoding="utf-8"))
-    except Exception as exc:
-        print(f"error: manifest.json not valid JSON: {exc}", file=sys.stderr)
-        return False
-
-    required_keys = ["name", "schema_version", "type"]
-    for key in required_keys:
-        if key not in data:
-            print(f"error: manifest missing key: {key}", file=sys.stderr)
-            return False
-
-    if data.get("type") != "vxdoc":
-        print("error: manifest.type must be 'vxdoc'", file=sys.stderr)
-        return False
-
-    # Basic presence check for at least one node/layer file
-    has_node = any(nodes_dir.glob("*.json"))
-    has_layer = any(layers_dir.glob("*.json"))
-    if not (has_node and has_layer):
-        print("error: expected at least one node and one layer JSON", file=sys.stderr)
-        return False
-
-    # If presence file exists, ensure it's JSON
-    presence = collab_dir / "presence.json"
-    try:
-        json.loads(presence.read_text(encoding="utf-8"))
-    except Exception as exc:
-        print(f"error: collab/presence.json invalid JSON: {exc}", file=sys.stderr)
-        return False
 
-    return True
+def cmd_validate(args: argparse.Namespace) -> int:
+    paths = args.paths
+    only = Path(paths[0])
+    single = len(paths) == 1 and not glob.has_magic(paths[0]) and (is_document(only) or not only.is_dir())
+    if single and not args.json and args.jobs is None:
+        ok = validate_path(Path(paths[0]))
+        print("valid" if ok else "invalid")
+        return 0 if ok else 1
 
+    # Batch mode: one JSON line per document on stdout, a summary on stderr
+    jobs = (os.cpu_count() or 1) if args.jobs == 0 else (args.jobs or 1)
+    counts = {"valid": 0, "invalid": 0, "error": 0}
+    start = time.perf_counter()
+    for report in validate_many(find_documents(paths), jobs=jobs):
+        counts[report.status] += 1
+        print(report.to_json(), flush=True)
+    total = sum(counts.values())
+    print(
+        f"checked {total} documents in {time.perf_counter() - start:.1f}s: "
+        f"{counts['valid']} valid, {counts['invalid']} invalid, {counts['error']} errors",
+        file=sys.stderr,
+    )
+    if total == 0:
+        print("error: no documents found", file=sys.stderr)
+        return 2
+    if counts["error"]:
+        return 2
+    return 1 if counts["invalid"] else 0
 
-def cmd_validate(args: argparse.Namespace) -> int:
-    path = Path(args.path)
-    ok = validate_path(path)
-    print("valid" if ok else "invalid")
-    return 0 if ok else 1
+
+def cmd_zip(args: argparse.Namespace) -> int:
+    path, output = Path(args.path), Path(args.output)
+    if not path.is_dir():
+        print(f"error: not a directory-style .vxdoc: {path}", file=sys.stderr)
+        return 1
+    if not validate_path(path):
+        print("error: cannot zip invalid document", file=sys.stderr)
+        return 1
+    start = time.perf_counter()
+    try:
+        st = zip_document(path, output, level=args.level)
+    except (OSError, zipfile.BadZipFile, zipfile.LargeZipFile) as exc:
+        print(f"error: zip failed: {exc}", file=sys.stderr)
+        return 1
+    print(
+        f"wrote {output} in {time.perf_counter() - start:.2f}s: {st.compressed} entries compressed "
+        f"({st.compressed_bytes / 1e6:.1f} MB), {st.copied} unchanged copied ({st.copied_bytes / 1e6:.1f} MB), "
+        f"{st.removed} removed"
+    )
+    return 0
 
 
 def cmd_serve(args: argparse.Namespace) -> int:
@@ -75,23 +79,223 @@ def cmd_serve(args: argparse.Namespace) -> int:
     if not validate_path(path):
         print("error: cannot serve invalid document", file=sys.stderr)
         return 1
+    if not path.is_dir():
+        print("error: cannot serve a zipped .vxdoc yet; unzip it first", file=sys.stderr)
+        return 1
     print(f"Serving {path} (stub) — press Ctrl+C to quit")
     # In a future iteration, start a WebSocket and file watcher here.
     return 0
 
 
+def _asset_store(args: argparse.Namespace):
+    root = args.store or os.environ.get(STORE_DIR_ENV)
+    if not root:
+        print(f"error: no asset store; pass --store or set ${STORE_DIR_ENV}", file=sys.stderr)
+        return None
+    return AssetStore(Path(root))
+
+
+def cmd_pack(args: argparse.Namespace) -> int:
+    path = Path(args.path)
+    if not validate_path(path):
+        print("error: cannot pack invalid document", file=sys.stderr)
+        return 1
+    store = _asset_store(args)
+    if store is None:
+        return 2
+    try:
+        st = pack_document(path, store, Path(args.output) if args.output else None)
+    except (PackError, OSError) as exc:
+        print(f"error: pack failed: {exc}", file=sys.stderr)
+        return 1
+    print(
+        f"packed {st.files} assets ({st.bytes / 1e6:.1f} MB) into {store.root.parent}: "
+        f"{st.new_files} new ({st.new_bytes / 1e6:.1f} MB), {st.files - st.new_files} already stored"
+    )
+    return 0
+
+
+def cmd_unpack(args: argparse.Namespace) -> int:
+    path = Path(args.path)
+    if not validate_path(path):
+        print("error: cannot unpack invalid document", file=sys.stderr)
+        return 1
+    store = _asset_store(args)
+    if store is None:
+        return 2
+    try:
+        st = unpack_document(path, store, Path(args.output), mode=args.link)
+    except (PackError, OSError) as exc:
+        print(f"error: unpack failed: {exc}", file=sys.stderr)
+        return 1
+    links = ", ".join(f"{n} {mode}" for mode, n in sorted(st.links.items())) or "none"
+    print(f"unpacked {st.files} assets ({st.bytes / 1e6:.1f} MB) to {args.output}: {links}")
+    return 0
+
+
+def _disk_cache(args: argparse.Namespace):
+    from node_engine.cache import CACHE_DIR_ENV, DiskCache
+
+    root = args.cache_dir or os.environ.get(CACHE_DIR_ENV)
+    if not root or args.no_cache:
+        return None
+    return DiskCache(Path(root), budget_bytes=args.cache_size * 1024 * 1024)
+
+
+def cmd_render(args: argparse.Namespace) -> int:
+    # Imported here so validate/serve keep working without NumPy installed
+    from node_engine.animation import AnimationError, parse_frames
+    from node_engine.document import load_document
+    from node_engine.export import export_document, export_frames, export_sweep
+    from node_engine.sweep import SweepError, load_sweep
+
+    path = Path(args.path)
+    if not validate_path(path):
+        print("error: cannot render invalid document", file=sys.stderr)
+        return 1
+    if not path.is_dir():
+        print("error: cannot render a zipped .vxdoc yet; unzip it first", file=sys.stderr)
+        return 1
+    try:
+        frames = parse_frames(args.frames) if args.frames else None
+        variants = load_sweep(Path(args.sweep)) if args.sweep else None
+    except (AnimationError, SweepError, OSError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    output = Path(args.output)
+    try:
+        disk = _disk_cache(args)
+        doc = load_document(path)
+        opts = dict(fmt=args.format, band_height=args.band_height, disk=disk)
+        if frames is not None:
+            written = export_frames(doc, output, frames, **opts)
+        elif variants is not None:
+            written = export_sweep(doc, output, variants, **opts)
+        else:
+            width, height = export_document(doc, output, **opts)
+    except Exception as exc:
+        print(f"error: render failed: {exc}", file=sys.stderr)
+        return 1
+    if disk is not None:
+        st = disk.stats()
+        print(f"disk cache: {st.hits} hits, {st.misses} misses, {st.bytes / 1e6:.1f} MB in {disk.root}")
+    if frames is None and variants is None:
+        print(f"wrote {args.output} ({width}x{height})")
+    else:
+        kind = "frames" if frames is not None else "variants"
+        print(f"wrote {len(written)} {kind}: {written[0]} .. {written[-1]}")
+    return 0
+
+
+def cmd_profile(args: argparse.Namespace) -> int:
+    from node_engine.document import load_document
+    from node_engine.render import profile_document
+    from node_engine.scheduler import Scheduler
+
+    path = Path(args.path)
+    if not validate_path(path):
+        print("error: cannot profile invalid document", file=sys.stderr)
+        return 1
+    if not path.is_dir():
+        print("error: cannot profile a zipped .vxdoc yet; unzip it first", file=sys.stderr)
+        return 1
+    scheduler = Scheduler(max_workers=args.workers) if args.workers > 1 else None
+    try:
+        profiler = profile_document(load_document(path), scheduler=scheduler)
+    except Exception as exc:
+        print(f"error: render failed: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        if scheduler is not None:
+            scheduler.close()
+    output = Path(args.output or f"{path.stem}.{args.format}.json")
+    profiler.write(output, args.format)
+    print(f"{'node':<24} {'type':<16} {'self ms':>9} {'cpu ms':>9} {'tiles':>6} {'MB':>8} {'hit/miss':>9}")
+    for prof in list(profiler.summary().values())[: args.top]:
+        print(
+            f"{prof.node:<24} {prof.type:<16} {prof.self_wall * 1e3:>9.2f} {prof.cpu * 1e3:>9.2f} "
+            f"{prof.tiles:>6} {prof.nbytes / 1e6:>8.2f} {prof.cache_hits:>4}/{prof.cache_misses:<4}"
+        )
+    print(f"wrote {output}")
+    return 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(prog="vxcli", description="PicaDeli CLI (scaffold)")
     sub = p.add_subparsers(dest="cmd", required=True)
 
-    pv = sub.add_parser("validate", help="Validate a directory-style .vxdoc")
-    pv.add_argument("path", help="Path to .vxdoc directory")
+    pv = sub.add_parser(
+        "validate", help="Validate .vxdoc documents",
+        description="Validate one document, or many as JSON lines (path, status, errors, seconds). "
+        "Exit status: 0 all valid, 1 some invalid, 2 nothing found or a validator error.",
+    )
+    pv.add_argument("paths", nargs="+", metavar="path", help=".vxdoc (directory or zip), directory to search, or glob pattern")
+    pv.add_argument("--jobs", "-j", type=int, help="Validate in N worker processes (0: one per CPU)")
+    pv.add_argument("--json", action="store_true", help="JSON lines even for a single document")
     pv.set_defaults(func=cmd_validate)
 
+    pz = sub.add_parser(
+        "zip", help="Save a .vxdoc directory as a zipped .vxdoc",
+        description="Write the document to a zip archive. When the archive exists, only new or changed "
+        "files are compressed; unchanged entries are copied as they are, and the archive is replaced atomically.",
+    )
+    pz.add_argument("path", help="Path to .vxdoc directory")
+    pz.add_argument("-o", "--output", required=True, help="Zipped .vxdoc to create or update")
+    pz.add_argument("--level", type=int, choices=range(10), default=DEFAULT_LEVEL, metavar="0-9",
+                    help=f"Deflate level for new or changed entries (default: {DEFAULT_LEVEL})")
+    pz.set_defaults(func=cmd_zip)
+
     ps = sub.add_parser("serve", help="Serve a .vxdoc (stub)")
     ps.add_argument("path", help="Path to .vxdoc directory")
     ps.set_defaults(func=cmd_serve)
 
+    pr = sub.add_parser("render", help="Render a .vxdoc to PNG or raw RGBA, band by band")
+    pr.add_argument("path", help="Path to .vxdoc directory")
+    pr.add_argument("-o", "--output", required=True, help="Output file (.png, or raw RGBA8 otherwise)")
+    pr.add_argument("--format", choices=["png", "raw"], help="Override the format inferred from --output")
+    pr.add_argument("--band-height", type=int, default=256, help="Rows rendered per band (default: 256)")
+    many = pr.add_mutually_exclusive_group()
+    many.add_argument(
+        "--frames", metavar="A:B[:STEP]",
+        help="Render frames A..B (inclusive); --output may contain {frame} or ####, else .0001 is appended",
+    )
+    many.add_argument(
+        "--sweep", metavar="PARAMS_JSON",
+        help="Render every variant in PARAMS_JSON, sharing unswept nodes; --output may contain {name}",
+    )
+    pr.add_argument("--cache-dir", help="Persistent tile cache shared between runs (default: $VX_CACHE_DIR)")
+    pr.add_argument("--cache-size", type=int, default=4096, help="Disk cache size limit in MB (default: 4096)")
+    pr.add_argument("--no-cache", action="store_true", help="Ignore --cache-dir and $VX_CACHE_DIR")
+    pr.set_defaults(func=cmd_render)
+
+    pk = sub.add_parser(
+        "pack", help="Move a .vxdoc's assets into a shared content-addressed store",
+        description="Store each asset once by SHA-256 and reference it from the manifest. "
+        "Assets already in the store (from other documents or revisions) are not stored again.",
+    )
+    pk.add_argument("path", help="Path to .vxdoc directory")
+    pk.add_argument("-o", "--output", help="Write the packed document here (default: pack in place)")
+    pk.add_argument("--store", help=f"Asset store directory (default: ${STORE_DIR_ENV})")
+    pk.set_defaults(func=cmd_pack)
+
+    pu = sub.add_parser("unpack", help="Restore a packed .vxdoc's assets from the store")
+    pu.add_argument("path", help="Path to packed .vxdoc directory")
+    pu.add_argument("-o", "--output", required=True, help="Unpacked document to create")
+    pu.add_argument("--store", help=f"Asset store directory (default: ${STORE_DIR_ENV})")
+    pu.add_argument(
+        "--link", choices=LINK_MODES, default="auto",
+        help="How assets are restored: auto tries reflink, then hardlink, then copy (default: auto)",
+    )
+    pu.set_defaults(func=cmd_unpack)
+
+    pp = sub.add_parser("profile", help="Render a .vxdoc and write a per-node trace")
+    pp.add_argument("path", help="Path to .vxdoc directory")
+    pp.add_argument("-o", "--output", help="Trace file (default: <doc>.<format>.json)")
+    pp.add_argument("--format", choices=["chrome", "speedscope"], default="chrome", help="Trace format")
+    pp.add_argument("--workers", type=int, default=1, help="Evaluate on N threads (default: 1)")
+    pp.add_argument("--top", type=int, default=10, help="Slowest nodes to print (default: 10)")
+    pp.set_defaults(func=cmd_profile)
+
     return p
 
 
@@ -99,8 +303,3 @@ def main(argv=None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
     return args.func(args)
-
-
-if __name__ == "__main__":
-    raise SystemExit(main())
-
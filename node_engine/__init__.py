@@ -1,2 +1 @@
-__all__ = ["simple_eval"]
-
+__all__ = ["simple_eval", "graph", "document", "image", "formats", "color", "animation", "noise", "resample", "vector", "nodes", "cache", "tiles", "scheduler", "evaluator", "compositor", "optimizer", "sweep", "profiler", "render", "export"]
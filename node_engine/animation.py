@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Tuple
+
+from .simple_eval import hex_to_rgb
+
+
+# A param value may be animated by replacing it with a keyframe track:
+#   {"keyframes": [[0, 0.2], [24, 1.0]], "interp": "linear"}
+# Numbers, lists of numbers and "#rrggbb" colours interpolate linearly
+# between keys; other values (and "interp": "step") hold until the next key.
+# Before the first key and after the last, the nearest key's value is used.
+KEYFRAMES = "keyframes"
+INTERPOLATIONS = ("linear", "step")
+# Param injected into the kernels of time-dependent node types
+FRAME_PARAM = "frame"
+
+
+class AnimationError(ValueError):
+    """A keyframe track or frame range is malformed."""
+
+
+def is_animated(value: Any) -> bool:
+    return isinstance(value, dict) and KEYFRAMES in value
+
+
+def has_animation(params: Mapping[str, Any]) -> bool:
+    return any(is_animated(v) for v in params.values())
+
+
+def _track(value: Dict[str, Any]) -> Tuple[List[Tuple[float, Any]], str]:
+    keys = value[KEYFRAMES]
+    interp = value.get("interp", "linear")
+    if interp not in INTERPOLATIONS:
+        raise AnimationError(f"unknown interpolation: {interp!r} (expected one of {INTERPOLATIONS})")
+    if not isinstance(keys, (list, tuple)) or not keys:
+        raise AnimationError("keyframes must be a non-empty list of [frame, value] pairs")
+    track = []
+    for key in keys:
+        if not isinstance(key, (list, tuple)) or len(key) != 2 or not isinstance(key[0], (int, float)):
+            raise AnimationError(f"invalid keyframe: {key!r} (expected [frame, value])")
+        track.append((float(key[0]), key[1]))
+    track.sort(key=lambda k: k[0])
+    return track, interp
+
+
+def _is_hex(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith("#") and len(value) in (4, 7)
+
+
+def _lerp(a: Any, b: Any, t: float) -> Any:
+    if isinstance(a, bool) or isinstance(b, bool):
+        return a
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a + (b - a) * t
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)) and len(a) == len(b):
+        return [_lerp(x, y, t) for x, y in zip(a, b)]
+    if _is_hex(a) and _is_hex(b):
+        mixed = (round(x + (y - x) * t) for x, y in zip(hex_to_rgb(a), hex_to_rgb(b)))
+        return "#%02x%02x%02x" % tuple(mixed)
+    return a
+
+
+def value_at(value: Any, frame: float) -> Any:
+    """The value of a (possibly animated) param at ``frame``."""
+    if not is_animated(value):
+        return value
+    track, interp = _track(value)
+    if frame <= track[0][0]:
+        return track[0][1]
+    for (f0, v0), (f1, v1) in zip(track, track[1:]):
+        if frame < f1:
+            return v0 if interp == "step" else _lerp(v0, v1, (frame - f0) / (f1 - f0))
+    return track[-1][1]
+
+
+def params_at(params: Dict[str, Any], frame: float, time_dependent: bool = False) -> Dict[str, Any]:
+    """``params`` with every keyframe track resolved at ``frame``.
+
+    Time-dependent kernels also get the frame itself as ``params["frame"]``.
+    Static params are returned as-is (not copied).
+    """
+    if not time_dependent and not has_animation(params):
+        return params
+    out = {name: value_at(value, frame) for name, value in params.items()}
+    if time_dependent:
+        out[FRAME_PARAM] = frame
+    return out
+
+
+def parse_frames(spec: str) -> range:
+    """Parse ``a:b`` (inclusive) or ``a:b:step`` into frame numbers; ``n`` is a single frame."""
+    parts = spec.split(":")
+    try:
+        nums = [int(p) for p in parts]
+    except ValueError:
+        raise AnimationError(f"invalid frame range: {spec!r} (expected a:b or a:b:step)") from None
+    if len(nums) == 1:
+        nums = [nums[0], nums[0]]
+    if len(nums) not in (2, 3):
+        raise AnimationError(f"invalid frame range: {spec!r} (expected a:b or a:b:step)")
+    start, end = nums[0], nums[1]
+    step = nums[2] if len(nums) == 3 else 1
+    if step <= 0 or end < start:
+        raise AnimationError(f"invalid frame range: {spec!r} (need a <= b and a positive step)")
+    return range(start, end + 1, step)
+
@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+from .image import ConstantImage, Image, PatchImage, nbytes_of
+
+
+DEFAULT_BUDGET_BYTES = 512 * 1024 * 1024
+DEFAULT_DISK_BUDGET_BYTES = 4 * 1024 * 1024 * 1024
+# Environment variable naming a persistent cache directory (see ``DiskCache``)
+CACHE_DIR_ENV = "VX_CACHE_DIR"
+
+
+def params_hash(params: Mapping[str, Any]) -> str:
+    """Stable hash of a node's params (key order does not matter)."""
+    blob = json.dumps(params, sort_keys=True, separators=(",", ":"), default=repr)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def node_key(node_type: str, params: Mapping[str, Any], input_keys: Mapping[str, str]) -> str:
+    """Content address of a node output: type, params hash and the keys of its inputs.
+
+    Input keys are themselves node keys, so two nodes with identical upstream
+    subgraphs share a key regardless of their ids.
+    """
+    h = hashlib.sha1()
+    h.update(node_type.encode("utf-8"))
+    h.update(b"\0")
+    h.update(params_hash(params).encode("ascii"))
+    for name in sorted(input_keys):
+        h.update(b"\0")
+        h.update(name.encode("utf-8"))
+        h.update(b"=")
+        h.update(input_keys[name].encode("ascii"))
+    return h.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+    budget_bytes: int = 0
+    disk_hits: int = 0  # hits served by the disk tier (included in ``hits``)
+    pinned_bytes: int = 0  # held by ``NodeCache.pin``, outside ``budget_bytes``
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": self.entries,
+            "bytes": self.bytes,
+            "budget_bytes": self.budget_bytes,
+            "disk_hits": self.disk_hits,
+            "pinned_bytes": self.pinned_bytes,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class NodeCache:
+    """In-process LRU cache of node outputs bounded by a byte budget.
+
+    Thread-safe. Entries larger than the whole budget are never stored.
+
+    With a ``disk`` tier (see ``DiskCache``), every ``put`` is also written
+    through to disk and memory misses are looked up there, so results
+    survive the process and are shared between runs.
+
+    Entries of pinned node keys (see ``pin``), tiles included, are held
+    apart from the LRU and never evicted until ``unpin``.
+    """
+
+    def __init__(self, budget_bytes: int = DEFAULT_BUDGET_BYTES, disk: Optional["DiskCache"] = None) -> None:
+        if budget_bytes < 0:
+            raise ValueError("budget_bytes must be >= 0")
+        self.budget_bytes = int(budget_bytes)
+        self.disk = disk
+        self._entries: "OrderedDict[str, Image]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._disk_hits = 0
+        self._pins: Set[str] = set()
+        self._pinned: Dict[str, Image] = {}
+        self._pinned_bytes = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries or key in self._pinned
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries) + len(self._pinned)
+
+    def pin(self, keys: Iterable[str]) -> None:
+        """Hold the entries of node ``keys``, and their tiles, outside the LRU.
+
+        For outputs a caller knows it will read again, such as
+        time-invariant tiles across the frames of an animation: they stay
+        until ``unpin`` regardless of ``budget_bytes``.
+        """
+        with self._lock:
+            self._pins.update(keys)
+            for key in [k for k in self._entries if _node_of(k) in self._pins]:
+                img = self._entries.pop(key)
+                size = nbytes_of(img)
+                self._bytes -= size
+                self._pinned[key] = img
+                self._pinned_bytes += size
+
+    def unpin(self, keys: Iterable[str]) -> None:
+        """Drop the pinned entries of node ``keys`` (they are not moved back to the LRU)."""
+        with self._lock:
+            keys = set(keys) & self._pins
+            self._pins -= keys
+            for key in [k for k in self._pinned if _node_of(k) in keys]:
+                self._pinned_bytes -= nbytes_of(self._pinned.pop(key))
+
+    def get(self, key: str) -> Optional[Image]:
+        with self._lock:
+            img = self._pinned.get(key)
+            if img is not None:
+                self._hits += 1
+                return img
+            img = self._entries.get(key)
+            if img is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return img
+        img = self.disk.get(key) if self.disk is not None else None
+        with self._lock:
+            if img is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._disk_hits += 1
+        self._store(key, img)
+        return img
+
+    def put(self, key: str, img: Image) -> None:
+        if self.disk is not None:
+            self.disk.put(key, img)
+        self._store(key, img)
+
+    def _store(self, key: str, img: Image) -> None:
+        size = nbytes_of(img)
+        with self._lock:
+            if _node_of(key) in self._pins:
+                old = self._pinned.get(key)
+                self._pinned[key] = img
+                self._pinned_bytes += size - (nbytes_of(old) if old is not None else 0)
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= nbytes_of(old)
+            if size > self.budget_bytes:
+                return
+            self._entries[key] = img
+            self._bytes += size
+            while self._bytes > self.budget_bytes:
+                _, victim = self._entries.popitem(last=False)
+                self._bytes -= nbytes_of(victim)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+            self._bytes = 0
+            self._pinned_bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries) + len(self._pinned),
+                bytes=self._bytes,
+                budget_bytes=self.budget_bytes,
+                disk_hits=self._disk_hits,
+                pinned_bytes=self._pinned_bytes,
+            )
+
+
+def _node_of(key: str) -> str:
+    # Tile keys are "<node key>@<tile size>:<tx>,<ty>" (see ``tiles.TiledImage``)
+    return key.split("@", 1)[0]
+
+
+# Entry file: a fixed 64-byte header, then the raw pixels (C order, H×W×4)
+#   magic, kind, dtype code, width, height, x, y, fill RGBA, payload w, payload h
+_HEADER = struct.Struct("<4sBB2xIIii4BII")
+_HEADER_SIZE = 64
+_MAGIC = b"VXC1"
+_ARRAY, _CONSTANT, _PATCH = 0, 1, 2
+_DTYPES = (np.dtype(np.uint8), np.dtype(np.float16), np.dtype(np.float32))
+# Bump when the entry layout or any built-in kernel's output changes
+DISK_FORMAT = "v1"
+
+
+class DiskCache:
+    """Persistent cache tier: one raw file per entry under ``root``.
+
+    Entries are keyed like ``NodeCache`` (content hashes, see ``node_key``),
+    so they stay valid across processes and restarts. Arrays are returned
+    memory-mapped, read-only, so a hit costs no copy until pixels are read.
+    Constant and patch images are stored too; other lazy images are not.
+
+    The total size is kept under ``budget_bytes`` by deleting the least
+    recently used files (by mtime, which hits refresh). Files are written
+    to a temporary name and renamed into place, so concurrent processes
+    sharing a directory never see partial entries.
+    """
+
+    def __init__(self, root: Path, budget_bytes: int = DEFAULT_DISK_BUDGET_BYTES) -> None:
+        if budget_bytes < 0:
+            raise ValueError("budget_bytes must be >= 0")
+        self.root = Path(root) / DISK_FORMAT
+        self.budget_bytes = int(budget_bytes)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # file name -> size, oldest first
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+        self._scan()
+
+    def _scan(self) -> None:
+        found = []
+        for sub in self.root.iterdir():
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub):
+                if entry.name.endswith(".tmp"):
+                    continue  # left behind by a crashed writer
+                st = entry.stat()
+                found.append((st.st_mtime, f"{sub.name}/{entry.name}", st.st_size))
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self._bytes += size
+
+    @staticmethod
+    def _name(key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return f"{digest[:2]}/{digest[2:]}.vxc"
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._name(key) in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: str) -> Optional[Image]:
+        name = self._name(key)
+        path = self.root / name
+        try:
+            img = _read_entry(path)
+            size = os.path.getsize(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            img = None
+        with self._lock:
+            if img is None:
+                # Evicted by another process, or unreadable: forget it
+                size = self._entries.pop(name, None)
+                if size is not None:
+                    self._bytes -= size
+                self._misses += 1
+                return None
+            if name not in self._entries:
+                # Written by another process since we scanned
+                self._entries[name] = size
+                self._bytes += size
+            self._entries.move_to_end(name)
+            self._hits += 1
+        return img
+
+    def put(self, key: str, img: Image) -> bool:
+        """Store ``img`` unless it is already on disk; False when it cannot be stored."""
+        name = self._name(key)
+        with self._lock:
+            if name in self._entries:
+                return True
+        encoded = _encode_entry(img)
+        if encoded is None:
+            return False
+        header, payload = encoded
+        size = _HEADER_SIZE + (payload.nbytes if payload is not None else 0)
+        if size > self.budget_bytes:
+            return False
+        path = self.root / name
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(header.ljust(_HEADER_SIZE, b"\0"))
+                if payload is not None:
+                    fp.write(np.ascontiguousarray(payload).data)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return False
+        with self._lock:
+            self._entries[name] = size
+            self._entries.move_to_end(name)
+            self._bytes += size
+            self._evict()
+        return True
+
+    def _evict(self) -> None:
+        while self._bytes > self.budget_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._evictions += 1
+            try:
+                os.remove(self.root / name)
+            except OSError:
+                pass  # already gone (another process evicted it)
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in self._entries:
+                try:
+                    os.remove(self.root / name)
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                budget_bytes=self.budget_bytes,
+            )
+
+
+def _dtype_code(dtype: np.dtype) -> Optional[int]:
+    try:
+        return _DTYPES.index(np.dtype(dtype))
+    except ValueError:
+        return None
+
+
+def _encode_entry(img: Image) -> Optional[Tuple[bytes, Optional[np.ndarray]]]:
+    if isinstance(img, ConstantImage):
+        return _HEADER.pack(_MAGIC, _CONSTANT, 0, img.width, img.height, 0, 0, *img.rgba, 0, 0), None
+    if isinstance(img, PatchImage):
+        fill, patch = img.fill, img.patch
+        code = _dtype_code(patch.dtype)
+        if code is None or patch.ndim != 3 or patch.shape[2] != 4 or patch.size == 0:
+            return None
+        header = _HEADER.pack(_MAGIC, _PATCH, code, fill.width, fill.height, img.x, img.y, *fill.rgba,
+                              patch.shape[1], patch.shape[0])
+        return header, patch
+    if isinstance(img, np.ndarray):
+        code = _dtype_code(img.dtype)
+        if code is None or img.ndim != 3 or img.shape[2] != 4 or img.size == 0:
+            return None
+        h, w = img.shape[:2]
+        return _HEADER.pack(_MAGIC, _ARRAY, code, w, h, 0, 0, 0, 0, 0, 0, w, h), img
+    return None  # other lazy images would have to be materialized to be stored
+
+
+def _read_entry(path: Path) -> Image:
+    with open(path, "rb") as fp:
+        header = fp.read(_HEADER_SIZE)
+    if len(header) != _HEADER_SIZE:
+        raise ValueError(f"truncated cache entry: {path}")
+    magic, kind, code, width, height, x, y, r, g, b, a, pw, ph = _HEADER.unpack_from(header)
+    if magic != _MAGIC or code >= len(_DTYPES):
+        raise ValueError(f"not a cache entry: {path}")
+    if kind == _CONSTANT:
+        return ConstantImage(width, height, (r, g, b, a))
+    dtype = _DTYPES[code]
+    if os.path.getsize(path) != _HEADER_SIZE + ph * pw * 4 * dtype.itemsize:
+        raise ValueError(f"truncated cache entry: {path}")
+    pixels = np.memmap(path, dtype=dtype, mode="r", offset=_HEADER_SIZE, shape=(ph, pw, 4)).view(np.ndarray)
+    if kind == _PATCH:
+        return PatchImage(ConstantImage(width, height, (r, g, b, a)), pixels, x, y)
+    return pixels
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+# sRGB transfer functions as table lookups. Every pixel of every layer goes
+# through them, so the pow() calls below run once, at import, to fill tables:
+#   uint8 input   -> 256 entries, exact
+#   float16 input -> 65536 entries indexed by the raw half-float bits, exact
+#   float32 input -> 4096 entries over [0, 1], linearly interpolated
+LUT_SIZE_F32 = 4096
+
+
+def _decode(v: np.ndarray) -> np.ndarray:
+    v = np.clip(v, 0.0, 1.0)
+    return np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+
+def _encode(v: np.ndarray) -> np.ndarray:
+    v = np.clip(v, 0.0, 1.0)
+    return np.where(v <= 0.0031308, v * 12.92, 1.055 * v ** (1.0 / 2.4) - 0.055)
+
+
+def _half_values() -> np.ndarray:
+    v = np.arange(65536, dtype=np.uint32).astype(np.uint16).view(np.float16).astype(np.float64)
+    return np.nan_to_num(v, nan=0.0, posinf=1.0, neginf=0.0)
+
+
+_HALF = _half_values()
+_GRID = np.linspace(0.0, 1.0, LUT_SIZE_F32)
+
+SRGB_TO_LINEAR_U8 = _decode(np.arange(256) / 255.0).astype(np.float32)
+SRGB_TO_LINEAR_F16 = _decode(_HALF).astype(np.float16)
+LINEAR_TO_SRGB_F16 = _encode(_HALF).astype(np.float16)
+# Linear half float straight to 8-bit sRGB in one lookup (the usual display path)
+LINEAR_F16_TO_SRGB_U8 = np.floor(_encode(_HALF) * 255.0 + 0.5).astype(np.uint8)
+SRGB_TO_LINEAR_F32 = _decode(_GRID).astype(np.float32)
+LINEAR_TO_SRGB_F32 = _encode(_GRID).astype(np.float32)
+del _HALF, _GRID
+
+for _table in (SRGB_TO_LINEAR_U8, SRGB_TO_LINEAR_F16, LINEAR_TO_SRGB_F16, LINEAR_F16_TO_SRGB_U8,
+               SRGB_TO_LINEAR_F32, LINEAR_TO_SRGB_F32):
+    _table.setflags(write=False)
+
+
+def _interp(values: np.ndarray, table: np.ndarray) -> np.ndarray:
+    """Piecewise-linear lookup of ``values`` in [0, 1] into an evenly spaced table."""
+    pos = np.clip(values, 0.0, 1.0) * np.float32(len(table) - 1)
+    i0 = np.minimum(pos.astype(np.int32), len(table) - 2)
+    frac = pos - i0
+    lo = table[i0]
+    return lo + (table[i0 + 1] - lo) * frac
+
+
+def srgb_to_linear(values: np.ndarray) -> np.ndarray:
+    """sRGB-encoded channel values -> linear light (float32, or float16 for float16 input).
+
+    uint8 values are codes 0..255; float values are in [0, 1].
+    """
+    if values.dtype == np.uint8:
+        return SRGB_TO_LINEAR_U8[values]
+    if values.dtype == np.float16:
+        return SRGB_TO_LINEAR_F16[values.view(np.uint16)]
+    return _interp(values.astype(np.float32, copy=False), SRGB_TO_LINEAR_F32)
+
+
+def linear_to_srgb(values: np.ndarray) -> np.ndarray:
+    """Linear light in [0, 1] -> sRGB-encoded values in [0, 1], keeping float16 as float16."""
+    if values.dtype == np.float16:
+        return LINEAR_TO_SRGB_F16[values.view(np.uint16)]
+    return _interp(values.astype(np.float32, copy=False), LINEAR_TO_SRGB_F32)
+
+
+def linear_to_srgb8(values: np.ndarray) -> np.ndarray:
+    """Linear light in [0, 1] -> 8-bit sRGB codes (one half-float table lookup)."""
+    return LINEAR_F16_TO_SRGB_U8[values.astype(np.float16, copy=False).view(np.uint16)]
+
+
+class CubeError(ValueError):
+    """A .cube file could not be parsed; the message names the file and line."""
+
+
+@dataclass(frozen=True, eq=False)
+class Lut3D:
+    """A 3D colour LUT: ``table[r, g, b]`` is the output RGB at that lattice point."""
+
+    table: np.ndarray  # (N, N, N, 3) float32
+    domain_min: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    domain_max: Tuple[float, float, float] = (1.0, 1.0, 1.0)
+    title: str = ""
+
+    @property
+    def size(self) -> int:
+        return int(self.table.shape[0])
+
+    def apply(self, rgb: np.ndarray) -> np.ndarray:
+        """Map float RGB (..., 3) through the LUT with trilinear interpolation."""
+        n = self.size
+        lo = np.asarray(self.domain_min, dtype=np.float32)
+        hi = np.asarray(self.domain_max, dtype=np.float32)
+        pos = (rgb.astype(np.float32, copy=False) - lo) / (hi - lo) * np.float32(n - 1)
+        np.clip(pos, 0.0, n - 1, out=pos)
+        i0 = np.minimum(pos.astype(np.int32), n - 2)
+        f = pos - i0
+        r0, g0, b0 = i0[..., 0], i0[..., 1], i0[..., 2]
+        fr, fg, fb = f[..., 0:1], f[..., 1:2], f[..., 2:3]
+        t = self.table
+        # Blend the 8 surrounding lattice points, red axis first
+        c00 = t[r0, g0, b0] + (t[r0 + 1, g0, b0] - t[r0, g0, b0]) * fr
+        c10 = t[r0, g0 + 1, b0] + (t[r0 + 1, g0 + 1, b0] - t[r0, g0 + 1, b0]) * fr
+        c01 = t[r0, g0, b0 + 1] + (t[r0 + 1, g0, b0 + 1] - t[r0, g0, b0 + 1]) * fr
+        c11 = t[r0, g0 + 1, b0 + 1] + (t[r0 + 1, g0 + 1, b0 + 1] - t[r0, g0 + 1, b0 + 1]) * fr
+        c0 = c00 + (c10 - c00) * fg
+        c1 = c01 + (c11 - c01) * fg
+        return c0 + (c1 - c0) * fb
+
+    def apply_rgba8(self, img: np.ndarray) -> np.ndarray:
+        """Apply to straight-alpha RGBA8; alpha is left untouched."""
+        out = img.copy()
+        rgb = self.apply(img[..., :3] * np.float32(1.0 / 255.0))
+        out[..., :3] = np.clip(rgb * 255.0 + 0.5, 0.0, 255.0).astype(np.uint8)
+        return out
+
+
+def _floats(words, path: Path, lineno: int, count: int) -> Tuple[float, ...]:
+    if len(words) != count:
+        raise CubeError(f"{path}:{lineno}: expected {count} numbers")
+    try:
+        return tuple(float(w) for w in words)
+    except ValueError:
+        raise CubeError(f"{path}:{lineno}: invalid number") from None
+
+
+def parse_cube(path: Path) -> Lut3D:
+    """Read an Adobe/Resolve ``.cube`` 3D LUT (red varies fastest in the data)."""
+    path = Path(path)
+    size = 0
+    title = ""
+    dmin, dmax = (0.0, 0.0, 0.0), (1.0, 1.0, 1.0)
+    rows = []
+    for lineno, line in enumerate(path.read_text(encoding="utf-8").splitlines(), 1):
+        words = line.split()
+        if not words or words[0].startswith("#"):
+            continue
+        key = words[0].upper()
+        if key == "TITLE":
+            title = line.split(None, 1)[1].strip().strip('"') if len(words) > 1 else ""
+        elif key == "LUT_3D_SIZE":
+            size = int(_floats(words[1:], path, lineno, 1)[0])
+        elif key == "LUT_1D_SIZE":
+            raise CubeError(f"{path}:{lineno}: only 3D .cube LUTs are supported")
+        elif key == "DOMAIN_MIN":
+            dmin = _floats(words[1:], path, lineno, 3)
+        elif key == "DOMAIN_MAX":
+            dmax = _floats(words[1:], path, lineno, 3)
+        elif key[0].isalpha():
+            continue  # other keywords (e.g. LUT_3D_INPUT_RANGE) are not needed
+        else:
+            rows.append(_floats(words, path, lineno, 3))
+    if size < 2:
+        raise CubeError(f"{path}: missing or invalid LUT_3D_SIZE")
+    if len(rows) != size ** 3:
+        raise CubeError(f"{path}: expected {size ** 3} entries, found {len(rows)}")
+    if any(hi <= lo for lo, hi in zip(dmin, dmax)):
+        raise CubeError(f"{path}: DOMAIN_MAX must exceed DOMAIN_MIN")
+    # File order is r fastest, so the reshaped axes are (b, g, r)
+    table = np.asarray(rows, dtype=np.float32).reshape(size, size, size, 3).transpose(2, 1, 0, 3)
+    table = np.ascontiguousarray(table)
+    table.setflags(write=False)
+    return Lut3D(table, dmin, dmax, title)
+
+
+_CUBES: Dict[str, Tuple[float, Lut3D]] = {}
+_CUBES_LOCK = threading.Lock()
+
+
+def load_cube(path: Path) -> Lut3D:
+    """``parse_cube`` memoized by path; the file is re-read when its mtime changes."""
+    key = os.path.abspath(path)
+    mtime = os.stat(key).st_mtime
+    with _CUBES_LOCK:
+        hit = _CUBES.get(key)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    lut = parse_cube(Path(key))
+    with _CUBES_LOCK:
+        _CUBES[key] = (mtime, lut)
+    return lut
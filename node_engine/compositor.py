@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .image import ConstantImage, Image, Rect, crop, dtype_of, intersect_rect, materialize, size_of
+from .tiles import TILE_SIZE, clip_rect, tile_rect, tiles_for_rect
+
+
+BLEND_MODES = ("normal", "multiply", "screen", "overlay", "add", "difference")
+
+
+def to_premultiplied(img: np.ndarray) -> np.ndarray:
+    """Straight-alpha RGBA8 -> premultiplied float32 in [0, 1]."""
+    out = img.astype(np.float32)
+    out *= 1.0 / 255.0
+    out[..., :3] *= out[..., 3:4]
+    return out
+
+
+def from_premultiplied(img: np.ndarray) -> np.ndarray:
+    """Premultiplied float RGBA -> straight-alpha RGBA8 (rounded, clamped)."""
+    alpha = img[..., 3:4]
+    rgb = np.divide(img[..., :3], alpha, out=np.zeros_like(img[..., :3]), where=alpha > 0.0)
+    out = np.empty(np.broadcast_shapes(rgb.shape[:-1], alpha.shape[:-1]) + (4,), dtype=np.float32)
+    out[..., :3] = rgb
+    out[..., 3:4] = alpha
+    out *= 255.0
+    out += 0.5
+    np.clip(out, 0.0, 255.0, out=out)
+    return out.astype(np.uint8)
+
+
+def _straight(premul: np.ndarray) -> np.ndarray:
+    a = premul[..., 3:4]
+    return np.divide(premul[..., :3], a, out=np.zeros_like(premul[..., :3]), where=a > 0.0)
+
+
+def _mix(cb: np.ndarray, cs: np.ndarray, mixed: np.ndarray) -> np.ndarray:
+    """Co = Cs(1 - ab) + Cb(1 - as) + B, where ``mixed`` is the premultiplied as*ab*B term."""
+    ab, as_ = cb[..., 3:4], cs[..., 3:4]
+    rgb = cs[..., :3] * (1.0 - ab) + cb[..., :3] * (1.0 - as_) + mixed
+    alpha = as_ + ab * (1.0 - as_)
+    rgb, alpha = np.broadcast_arrays(rgb, alpha)
+    return np.concatenate([rgb, alpha[..., :1]], axis=-1)
+
+
+def _normal(cb: np.ndarray, cs: np.ndarray) -> np.ndarray:
+    out = cb * (1.0 - cs[..., 3:4])
+    out += cs
+    return out
+
+
+def _multiply(cb: np.ndarray, cs: np.ndarray) -> np.ndarray:
+    return _mix(cb, cs, cs[..., :3] * cb[..., :3])
+
+
+def _screen(cb: np.ndarray, cs: np.ndarray) -> np.ndarray:
+    # as*ab*(cs + cb - cs*cb) == Cs*ab + Cb*as - Cs*Cb; the rest cancels to Cs + Cb - Cs*Cb
+    out = cb + cs
+    out[..., :3] -= cs[..., :3] * cb[..., :3]
+    out[..., 3:4] -= cs[..., 3:4] * cb[..., 3:4]
+    return out
+
+
+def _add(cb: np.ndarray, cs: np.ndarray) -> np.ndarray:
+    ab, as_ = cb[..., 3:4], cs[..., 3:4]
+    return _mix(cb, cs, np.minimum(as_ * ab, cs[..., :3] * ab + cb[..., :3] * as_))
+
+
+def _difference(cb: np.ndarray, cs: np.ndarray) -> np.ndarray:
+    ab, as_ = cb[..., 3:4], cs[..., 3:4]
+    return _mix(cb, cs, np.abs(cs[..., :3] * ab - cb[..., :3] * as_))
+
+
+def _overlay(cb: np.ndarray, cs: np.ndarray) -> np.ndarray:
+    sb, ss = _straight(cb), _straight(cs)
+    b = np.where(sb <= 0.5, 2.0 * ss * sb, 1.0 - 2.0 * (1.0 - ss) * (1.0 - sb))
+    return _mix(cb, cs, b * cs[..., 3:4] * cb[..., 3:4])
+
+
+_KERNELS: Dict[str, Callable[[np.ndarray, np.ndarray], np.ndarray]] = {
+    "normal": _normal,
+    "multiply": _multiply,
+    "screen": _screen,
+    "overlay": _overlay,
+    "add": _add,
+    "difference": _difference,
+}
+
+
+def blend(backdrop: np.ndarray, source: np.ndarray, mode: str = "normal") -> np.ndarray:
+    """Composite premultiplied ``source`` over ``backdrop`` with a separable blend mode.
+
+    Follows the W3C compositing model (source-over with a blend function);
+    shapes only need to broadcast, so a 1×1 pixel can stand in for a flat layer.
+    """
+    try:
+        kernel = _KERNELS[mode]
+    except KeyError:
+        raise ValueError(f"unsupported blend mode: {mode}") from None
+    return kernel(backdrop, source)
+
+
+def blend_rgba8(backdrop: np.ndarray, source: np.ndarray, mode: str = "normal", opacity: float = 1.0) -> np.ndarray:
+    """``blend`` for straight-alpha RGBA8 inputs and output."""
+    src = to_premultiplied(source)
+    if opacity < 1.0:
+        src *= opacity
+    return from_premultiplied(blend(to_premultiplied(backdrop), src, mode))
+
+
+@dataclass
+class LayerInput:
+    image: Image
+    opacity: float = 1.0
+    blend: str = "normal"
+
+
+@dataclass
+class CompositeStats:
+    tiles: int = 0
+    skipped_transparent: int = 0  # layer tiles with no visible pixels
+    skipped_covered: int = 0  # layer tiles hidden under an opaque normal layer
+
+
+def _tile_alpha_range(tile: Image) -> Tuple[int, int]:
+    if isinstance(tile, ConstantImage):
+        return tile.rgba[3], tile.rgba[3]
+    alpha = tile[..., 3]
+    lo, hi = alpha.min(), alpha.max()
+    if tile.dtype == np.uint8:
+        return int(lo), int(hi)
+    # Float tiles: only exactly opaque / exactly clear count as 255 / 0
+    return (255 if lo >= 1.0 else int(lo * 255.0)), (0 if hi <= 0.0 else max(1, int(np.ceil(hi * 255.0))))
+
+
+def _premultiplied_tile(tile: Image) -> np.ndarray:
+    if isinstance(tile, ConstantImage):
+        return to_premultiplied(tile.pixel())
+    if tile.dtype == np.uint8:
+        return to_premultiplied(tile)
+    return tile.astype(np.float32)  # float pixel formats are premultiplied already
+
+
+def _composite_tile(layers: Sequence[LayerInput], rect: Rect, stats: CompositeStats) -> np.ndarray:
+    # Walk top-down to find the lowest layer that can still show through
+    visible: List[Tuple[LayerInput, Image]] = []
+    hidden = 0
+    for i in range(len(layers) - 1, -1, -1):
+        layer = layers[i]
+        w, h = size_of(layer.image)
+        hit = intersect_rect(rect, (0, 0, w, h))
+        if hit is None or layer.opacity <= 0.0:
+            stats.skipped_transparent += 1
+            continue
+        if hit != rect:
+            # Partial overlap: pad the layer to the tile with transparency
+            part = np.zeros((rect[3], rect[2], 4), dtype=dtype_of(layer.image))
+            x, y = hit[0] - rect[0], hit[1] - rect[1]
+            part[y:y + hit[3], x:x + hit[2]] = materialize(layer.image, hit)
+            tile: Image = part
+        else:
+            tile = crop(layer.image, rect)
+        lo, hi = _tile_alpha_range(tile)
+        if hi == 0:
+            stats.skipped_transparent += 1
+            continue
+        visible.append((layer, tile))
+        if layer.blend == "normal" and layer.opacity >= 1.0 and lo == 255:
+            hidden = i
+            break
+    stats.skipped_covered += hidden
+
+    out: Optional[np.ndarray] = None
+    for layer, tile in reversed(visible):
+        src = _premultiplied_tile(tile)
+        if layer.opacity < 1.0:
+            src *= layer.opacity
+        if out is None:
+            # Nothing below yet: blending onto transparency is the identity
+            out = np.broadcast_to(src, (rect[3], rect[2], 4))
+        else:
+            out = blend(out, src, layer.blend)
+    if out is None:
+        return np.zeros((rect[3], rect[2], 4), dtype=np.uint8)
+    return from_premultiplied(np.broadcast_to(out, (rect[3], rect[2], 4)))
+
+
+def composite(
+    layers: Sequence[LayerInput],
+    width: int,
+    height: int,
+    rect: Optional[Rect] = None,
+    tile_size: int = TILE_SIZE,
+    scheduler=None,
+    stats: Optional[CompositeStats] = None,
+) -> np.ndarray:
+    """Flatten ``layers`` (bottom-most first) into straight-alpha RGBA8.
+
+    Layers may be in any pixel format (see ``formats``); float layers are
+    blended as-is, without a round trip through RGBA8.
+
+    Works tile by tile over ``rect`` (default: the whole canvas); tiles where
+    a layer is fully transparent, or hidden under an opaque normal layer, are
+    never read or blended. Tiles run on ``scheduler`` when one is given.
+    """
+    for layer in layers:
+        if layer.blend not in _KERNELS:
+            raise ValueError(f"unsupported blend mode: {layer.blend}")
+    rect = rect if rect is not None else (0, 0, width, height)
+    clipped = clip_rect(rect, width, height)
+    out = np.zeros((rect[3], rect[2], 4), dtype=np.uint8)
+    if clipped is None:
+        return out
+    stats = stats if stats is not None else CompositeStats()
+    grid = list(tiles_for_rect(clipped, tile_size))
+
+    def run(t: Tuple[int, int]) -> CompositeStats:
+        trect = intersect_rect(tile_rect(t[0], t[1], width, height, tile_size), clipped)
+        local = CompositeStats()
+        pixels = _composite_tile(layers, trect, local)
+        x, y = trect[0] - rect[0], trect[1] - rect[1]
+        out[y:y + trect[3], x:x + trect[2]] = pixels
+        return local
+
+    results = scheduler.map(run, grid) if scheduler is not None else [run(t) for t in grid]
+    for local in results:
+        stats.skipped_transparent += local.skipped_transparent
+        stats.skipped_covered += local.skipped_covered
+    stats.tiles += len(grid)
+    return out
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .graph import Graph, GraphError, Node
+
+
+@dataclass
+class Layer:
+    id: str
+    source_node: str
+    name: str = ""
+    opacity: float = 1.0
+    blend: str = "normal"
+    visible: bool = True
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Layer":
+        for key in ("id", "source_node"):
+            if key not in data:
+                raise GraphError(f"layer missing key: {key}")
+        return cls(
+            id=str(data["id"]),
+            source_node=str(data["source_node"]),
+            name=str(data.get("name", "")),
+            opacity=float(data.get("opacity", 1.0)),
+            blend=str(data.get("blend", "normal")),
+            visible=bool(data.get("visible", True)),
+        )
+
+
+@dataclass
+class Document:
+    path: Path
+    manifest: Dict[str, Any]
+    graph: Graph
+    layers: List[Layer] = field(default_factory=list)
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def load_graph(doc_path: Path) -> Graph:
+    """Build a Graph from every ``nodes/*.json`` file of a directory-style .vxdoc."""
+    graph = Graph()
+    for p in sorted((doc_path / "nodes").glob("*.json")):
+        graph.add(Node.from_json(_read_json(p)))
+    graph.check()
+    return graph
+
+
+def load_layers(doc_path: Path) -> List[Layer]:
+    """Layers from ``layers/*.json``, bottom-most first (sorted by file name)."""
+    return [Layer.from_json(_read_json(p)) for p in sorted((doc_path / "layers").glob("*.json"))]
+
+
+def load_document(doc_path: Path) -> Document:
+    doc_path = Path(doc_path)
+    manifest_path = doc_path / "manifest.json"
+    manifest = _read_json(manifest_path) if manifest_path.exists() else {}
+    graph = load_graph(doc_path)
+    layers = load_layers(doc_path)
+    for layer in layers:
+        if layer.source_node not in graph:
+            raise GraphError(f"layer {layer.id}: source_node {layer.source_node!r} not found")
+    return Document(path=doc_path, manifest=manifest, graph=graph, layers=layers)
@@ -0,0 +1,471 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set
+
+import numpy as np
+
+from .animation import AnimationError, has_animation, params_at
+from .cache import CacheStats, NodeCache, node_key
+from .document import Document, load_document
+from .graph import Graph, GraphError, Node
+from .formats import as_format, check_output, format_dtype
+from .image import Image, Rect, materialize, nbytes_of, size_of
+from .nodes import NodeType, node_size, resolve_node_type
+from .profiler import Profiler
+from .scheduler import Scheduler
+from .tiles import TILE_SIZE, TiledImage, clip_rect
+
+
+class EvalError(RuntimeError):
+    """A node kernel failed; the message names the node."""
+
+
+class Evaluator:
+    """Evaluate a node Graph on the CPU by walking it in topological order.
+
+    ``timings`` holds the wall time in seconds of the last evaluation of each
+    node and serves as the performance baseline for the engine.
+
+    Outputs are kept between calls. Edits made through ``set_params``,
+    ``update_node`` or ``sync`` mark the edited node and its transitive
+    consumers dirty, and the next ``evaluate`` only reruns dirty nodes;
+    ``last_recomputed`` lists the nodes whose kernels actually ran.
+
+    With a ``scheduler``, independent nodes and the tiles of a region request
+    run concurrently; results are identical to a serial evaluation.
+
+    With a ``cache``, outputs are stored under their content key (see
+    ``cache.node_key``); a node whose key is cached is served without running
+    its kernel or anything upstream of it.
+
+    Each output stays in its node's pixel format (``NodeType.format``);
+    inputs are converted only where a consumer declares a different one.
+
+    With a ``profiler`` (see ``profiler.Profiler``), every kernel run and
+    every cache lookup is recorded, per node and per tile.
+
+    Evaluation happens at ``frame``. Keyframed params (see ``animation``) are
+    resolved at that frame before a kernel sees them, and time-dependent node
+    types get it as ``params["frame"]``. ``set_frame`` invalidates only the
+    nodes that vary with time and their consumers, so time-invariant
+    subgraphs are computed once and reused for every frame.
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        cache: Optional[NodeCache] = None,
+        scheduler: Optional[Scheduler] = None,
+        profiler: Optional[Profiler] = None,
+        frame: float = 0,
+    ) -> None:
+        self.graph = graph
+        self.cache = cache
+        self.scheduler = scheduler
+        self.profiler = profiler
+        self.frame = frame
+        self.timings: Dict[str, float] = {}
+        self.keys: Dict[str, str] = {}
+        self.last_recomputed: List[str] = []
+        self.last_tiles: Dict[str, int] = {}
+        self._outputs: Dict[str, Image] = {}
+        self._tiled: Dict[str, TiledImage] = {}
+        self._dirty: Set[str] = set(graph.nodes)
+        self._order: Optional[List[str]] = None
+        self._consumers: Optional[Dict[str, List[str]]] = None
+        self._lock = threading.RLock()
+        self._timing_lock = threading.Lock()
+
+    # Edits
+
+    def mark_dirty(self, node_id: str) -> Set[str]:
+        """Invalidate ``node_id`` and its transitive consumers; returns their ids."""
+        with self._lock:
+            if node_id not in self.graph:
+                raise GraphError(f"unknown node: {node_id}")
+            return self._invalidate([node_id])
+
+    def _invalidate(self, sources: Iterable[str]) -> Set[str]:
+        if self._consumers is None:
+            self._consumers = self.graph.consumers()
+        affected = set(self.graph.downstream(sources, self._consumers))
+        for nid in affected:
+            self._outputs.pop(nid, None)
+            self._tiled.pop(nid, None)
+        self._dirty |= affected
+        return affected
+
+    def set_frame(self, frame: float) -> Set[str]:
+        """Move to ``frame``, invalidating only time-varying nodes and their consumers."""
+        with self._lock:
+            if frame == self.frame:
+                return set()
+            self.frame = frame
+            return self._invalidate(self.time_varying())
+
+    def time_varying(self) -> List[str]:
+        """Nodes whose own output changes with the frame (not counting their consumers)."""
+        with self._lock:
+            return [nid for nid in self.graph.nodes if self._varies(nid)]
+
+    def frame_inputs(self, targets: Iterable[str]) -> List[str]:
+        """Time-invariant nodes read again on every frame when rendering ``targets``.
+
+        These are the invariant inputs of time-varying nodes (and of their
+        consumers) plus invariant targets themselves; keeping their outputs
+        for the whole frame range is enough for no invariant node to rerun.
+        """
+        with self._lock:
+            targets = list(targets)
+            closure = set(self.graph.upstream(targets))
+            if self._consumers is None:
+                self._consumers = self.graph.consumers()
+            varying = set(self.graph.downstream(self.time_varying(), self._consumers))
+            return [
+                nid for nid in self.graph.topo_order(targets)
+                if nid not in varying
+                and (nid in targets or any(c in varying and c in closure for c in self._consumers[nid]))
+            ]
+
+    def _varies(self, nid: str) -> bool:
+        node = self.graph[nid]
+        return has_animation(node.params) or self._time_dependent(nid)
+
+    def _time_dependent(self, nid: str) -> bool:
+        try:
+            return resolve_node_type(self.graph[nid].type).time_dependent
+        except KeyError:
+            return False  # reported with context when the node is evaluated
+
+    def _type_key(self, nid: str) -> str:
+        # Plugin versions are part of the key, so persisted results of an older release are not reused
+        name = self.graph[nid].type
+        try:
+            version = resolve_node_type(name).version
+        except KeyError:
+            return name
+        return f"{name}@{version}" if version else name
+
+    def _params(self, nid: str) -> Dict[str, Any]:
+        # What the kernel (and the cache key) sees: keyframes resolved at the current frame
+        try:
+            return params_at(self.graph[nid].params, self.frame, self._time_dependent(nid))
+        except AnimationError as exc:
+            raise GraphError(f"node {nid}: {exc}") from None
+
+    def set_params(self, node_id: str, params: Mapping[str, Any]) -> Set[str]:
+        """Merge ``params`` into a node's params and invalidate what depends on it."""
+        with self._lock:
+            node = self.graph[node_id]
+            merged = {**node.params, **params}
+            if merged == node.params:
+                return set()
+            node.params = merged
+            return self.mark_dirty(node_id)
+
+    def update_node(self, node: Node) -> Set[str]:
+        """Replace (or add) a node definition, e.g. after its nodes/*.json changed."""
+        with self._lock:
+            old = self.graph.nodes.get(node.id)
+            if old is not None and _same_node(old, node):
+                return set()
+            if old is None or old.inputs != node.inputs:
+                self._structure_changed()
+            self.graph.nodes[node.id] = node
+            return self.mark_dirty(node.id)
+
+    def sync(self, graph: Graph) -> Set[str]:
+        """Adopt a freshly loaded graph, invalidating only nodes that differ."""
+        with self._lock:
+            graph.check()
+            changed = [nid for nid, node in graph.nodes.items()
+                       if nid not in self.graph or not _same_node(self.graph[nid], node)]
+            removed = [nid for nid in self.graph.nodes if nid not in graph]
+            if removed or any(nid not in self.graph or self.graph[nid].inputs != graph[nid].inputs
+                              for nid in changed):
+                self._structure_changed()
+            for nid in removed:
+                self._outputs.pop(nid, None)
+                self._tiled.pop(nid, None)
+                self._dirty.discard(nid)
+                self.keys.pop(nid, None)
+            self.graph = graph
+            affected: Set[str] = set()
+            for nid in changed:
+                affected |= self.mark_dirty(nid)
+            return affected
+
+    def release(self, node_ids: Iterable[str]) -> None:
+        """Drop the stored outputs (and tiles) of ``node_ids`` to free memory.
+
+        Unlike ``mark_dirty`` nothing downstream is invalidated; a released
+        node is simply recomputed if it is needed again.
+        """
+        with self._lock:
+            for nid in node_ids:
+                self._outputs.pop(nid, None)
+                self._tiled.pop(nid, None)
+
+    def _structure_changed(self) -> None:
+        self._order = None
+        self._consumers = None
+
+    @property
+    def dirty(self) -> Set[str]:
+        with self._lock:
+            return set(self._dirty)
+
+    # Evaluation
+
+    def evaluate(self, targets: Optional[Iterable[str]] = None, frame: Optional[float] = None) -> Dict[str, Image]:
+        """Evaluate ``targets`` (default: every node) and their upstream nodes.
+
+        With ``frame``, ``set_frame`` is called first.
+
+        Returns the available output of every node upstream of the targets,
+        keyed by node id; nodes skipped thanks to a cache hit downstream are
+        absent. Outputs may be lazy (see ``image.LazyImage``); use
+        ``image.materialize`` to read pixels.
+        """
+        with self._lock:
+            if frame is not None:
+                self.set_frame(frame)
+            if self._order is None:
+                self._order = self.graph.topo_order()
+            if targets is None:
+                order = self._order
+                wanted = set(order)
+            else:
+                wanted = set(targets)
+                closure = set(self.graph.upstream(wanted))
+                order = [nid for nid in self._order if nid in closure]
+            stale = [nid for nid in order if nid in self._dirty or nid not in self._outputs]
+            self._compute_keys(stale)
+
+            # Walk consumers first: a clean or cached node makes its upstream unnecessary
+            needed = {nid for nid in wanted if nid not in self._outputs}
+            for nid in reversed(stale):
+                if nid not in needed:
+                    continue
+                hit = self._cache_get(nid)
+                if hit is not None:
+                    self._store(nid, hit)
+                else:
+                    needed.update(ref for ref in self.graph[nid].inputs.values() if ref not in self._outputs)
+
+            self.last_recomputed = [nid for nid in stale if nid in needed and nid not in self._outputs]
+            if self.scheduler is None:
+                for nid in self.last_recomputed:
+                    self._finish(nid, self._run(nid, self._outputs))
+            else:
+                self.scheduler.run_dag(
+                    self.last_recomputed,
+                    {nid: self.graph[nid].inputs.values() for nid in self.last_recomputed},
+                    self._task,
+                    self._finish,
+                )
+            return {nid: self._outputs[nid] for nid in order if nid in self._outputs}
+
+    def _task(self, nid: str) -> Callable[[], Image]:
+        # Inputs are snapshotted on the calling thread; workers never touch _outputs
+        inputs = self._gather(nid, self._outputs)
+        return lambda: self._execute(nid, inputs)
+
+    def _finish(self, nid: str, img: Image) -> None:
+        self._store(nid, img)
+        if self.cache is not None:
+            self.cache.put(self.keys[nid], self._outputs[nid])
+
+    def _store(self, nid: str, img: Image) -> None:
+        self._outputs[nid] = _freeze(img)
+        self._dirty.discard(nid)
+
+    def _compute_keys(self, order: List[str]) -> None:
+        # Clean nodes keep their key; stale ones are re-derived in topological order
+        for nid in order:
+            node = self.graph[nid]
+            input_keys = {name: self.keys[ref] for name, ref in node.inputs.items()}
+            self.keys[nid] = node_key(self._type_key(nid), self._params(nid), input_keys)
+
+    def evaluate_region(self, target: str, rect: Rect, tile_size: int = TILE_SIZE) -> np.ndarray:
+        """Pixels of ``target`` inside ``rect`` (clipped to its bounds).
+
+        Nodes with a region kernel are evaluated on a ``tile_size`` grid and
+        only the upstream tiles that contribute to ``rect`` (including each
+        kernel's halo) are computed. Tiles are kept for later requests until
+        the node is marked dirty; ``last_tiles`` counts the tiles each node
+        computed for this request.
+        """
+        with self._lock:
+            views = self._views(target, tile_size)
+            tiled = {nid: v for nid, v in views.items() if isinstance(v, TiledImage)}
+            before = {nid: v.tiles_computed for nid, v in tiled.items()}
+            width, height = size_of(views[target])
+            clipped = clip_rect(rect, width, height)
+            if clipped is None:
+                raise ValueError(f"rect {rect} is outside {target} ({width}x{height})")
+            view = views[target]
+            if isinstance(view, TiledImage) and self.scheduler is not None:
+                # Fan the target's tiles out; upstream tiles are pulled (once) by the workers
+                self.scheduler.map(lambda t: view.tile(*t), view.tiles_for(clipped))
+            out = materialize(view, clipped)
+            self.last_tiles = {nid: v.tiles_computed - before[nid] for nid, v in tiled.items()}
+            return out
+
+    def view(self, target: str, tile_size: int = TILE_SIZE) -> Image:
+        """Lazy output of ``target``: reading a rect of it computes only the
+        tiles that rect needs (see ``evaluate_region``). Nodes without a
+        region kernel, and everything upstream of them, still run whole.
+        """
+        with self._lock:
+            return self._views(target, tile_size)[target]
+
+    def _views(self, target: str, tile_size: int) -> Dict[str, Image]:
+        if self._order is None:
+            self._order = self.graph.topo_order()
+        closure = set(self.graph.upstream([target]))
+        order = [nid for nid in self._order if nid in closure]
+        self._compute_keys([nid for nid in order if nid in self._dirty or nid not in self._outputs])
+        self.last_recomputed = []
+        views: Dict[str, Image] = {}
+        for nid in order:
+            views[nid] = self._view(nid, views, tile_size)
+        return views
+
+    def _view(self, nid: str, views: Dict[str, Image], tile_size: int) -> Image:
+        # Clean outputs, cache hits and live tile grids are reused; otherwise a
+        # tileable node gets a fresh TiledImage and anything else runs whole.
+        if nid in self._outputs:
+            return self._outputs[nid]
+        hit = self._cache_get(nid)
+        if hit is not None:
+            self._store(nid, hit)
+            return hit
+        tiled = self._tiled.get(nid)
+        if tiled is not None and tiled.tile_size == tile_size:
+            return tiled
+        node = self.graph[nid]
+        ntype = self._resolve(nid)
+        params = self._params(nid)
+        inputs = {name: as_format(views[ref], ntype.format, ntype.accepts) for name, ref in node.inputs.items()}
+        size = node_size(ntype, inputs, params) if ntype.region is not None else None
+        if size is None:
+            self._finish(nid, self._run(nid, views))
+            self.last_recomputed.append(nid)
+            return self._outputs[nid]
+
+        region = self.scheduler.region_kernel(ntype) if self.scheduler is not None else ntype.region
+
+        def compute(rect: Rect) -> Image:
+            t0 = time.perf_counter()
+            started = self.profiler.clock() if self.profiler is not None else None
+            try:
+                result = check_output(region(inputs, params, rect), ntype.format)
+            except (GraphError, EvalError):
+                raise
+            except Exception as exc:
+                raise EvalError(f"node {nid} ({node.type}) failed on tile {rect}: {exc}") from exc
+            self._add_timing(nid, time.perf_counter() - t0)
+            if started is not None:
+                self.profiler.record(nid, node.type, started, nbytes_of(result), tile=rect)
+            return result
+
+        with self._timing_lock:
+            self.timings[nid] = 0.0
+        on_lookup = (lambda hit: self.profiler.cache_lookup(nid, hit)) if self.profiler is not None else None
+        tiled = TiledImage(
+            size[0], size[1], compute, tile_size,
+            cache=self.cache, key=self.keys[nid], dtype=format_dtype(ntype.format), on_lookup=on_lookup,
+        )
+        self._tiled[nid] = tiled
+        return tiled
+
+    def _cache_get(self, nid: str) -> Optional[Image]:
+        if self.cache is None:
+            return None
+        hit = self.cache.get(self.keys[nid])
+        if self.profiler is not None:
+            self.profiler.cache_lookup(nid, hit is not None)
+        return hit
+
+    def _resolve(self, nid: str) -> NodeType:
+        node = self.graph[nid]
+        try:
+            ntype = resolve_node_type(node.type)
+        except KeyError as exc:
+            raise GraphError(f"node {nid}: {exc.args[0]}") from None
+        missing = [name for name in ntype.inputs if name not in node.inputs]
+        if missing:
+            raise GraphError(f"node {nid}: missing inputs: {missing}")
+        return ntype
+
+    def _gather(self, nid: str, outputs: Dict[str, Image]) -> Dict[str, Image]:
+        self._resolve(nid)
+        return {name: outputs[ref] for name, ref in self.graph[nid].inputs.items()}
+
+    def _execute(self, nid: str, inputs: Dict[str, Image]) -> Image:
+        node = self.graph[nid]
+        ntype = self._resolve(nid)
+        params = self._params(nid)
+        fn = self.scheduler.kernel(ntype) if self.scheduler is not None else ntype.fn
+        t0 = time.perf_counter()
+        started = self.profiler.clock() if self.profiler is not None else None
+        try:
+            # Conversions happen here, on the worker, and only at format boundaries
+            inputs = {name: as_format(img, ntype.format, ntype.accepts) for name, img in inputs.items()}
+            result = check_output(fn(inputs, params), ntype.format)
+        except (GraphError, EvalError):
+            raise
+        except Exception as exc:
+            raise EvalError(f"node {nid} ({node.type}) failed: {exc}") from exc
+        with self._timing_lock:
+            self.timings[nid] = time.perf_counter() - t0
+        if started is not None:
+            self.profiler.record(nid, node.type, started, nbytes_of(result))
+        return result
+
+    def _run(self, nid: str, outputs: Dict[str, Image]) -> Image:
+        return self._execute(nid, self._gather(nid, outputs))
+
+    def _add_timing(self, nid: str, seconds: float) -> None:
+        with self._timing_lock:
+            self.timings[nid] = self.timings.get(nid, 0.0) + seconds
+
+    def cache_stats(self) -> Optional[CacheStats]:
+        return self.cache.stats() if self.cache is not None else None
+
+    def slowest(self, n: int = 5) -> List[str]:
+        return sorted(self.timings, key=self.timings.__getitem__, reverse=True)[:n]
+
+
+def _same_node(a: Node, b: Node) -> bool:
+    return a.type == b.type and a.params == b.params and a.inputs == b.inputs
+
+
+def _freeze(img: Image) -> Image:
+    # Outputs are shared between evaluations and the cache; kernels must copy, not mutate
+    if isinstance(img, np.ndarray):
+        img.setflags(write=False)
+    return img
+
+
+def evaluate_document(
+    doc: Document,
+    cache: Optional[NodeCache] = None,
+    scheduler: Optional[Scheduler] = None,
+    frame: float = 0,
+) -> Dict[str, Image]:
+    """Evaluate the source node of every layer in ``doc`` at ``frame``."""
+    ev = Evaluator(doc.graph, cache=cache, scheduler=scheduler, frame=frame)
+    return ev.evaluate([layer.source_node for layer in doc.layers])
+
+
+def evaluate_path(
+    path: Path,
+    cache: Optional[NodeCache] = None,
+    scheduler: Optional[Scheduler] = None,
+) -> Dict[str, Image]:
+    return evaluate_document(load_document(Path(path)), cache=cache, scheduler=scheduler)
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import re
+import struct
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cache import DiskCache, NodeCache
+from .compositor import CompositeStats
+from .document import Document
+from .evaluator import Evaluator
+from .graph import Graph
+from .render import band_budget, canvas_size, lazy_document_layers, pixel_bytes, render_bands, sweep_plan
+from .sweep import Variant
+from .tiles import TILE_SIZE
+
+
+EXPORT_FORMATS = ("png", "raw")
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(data, zlib.crc32(kind))
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc & 0xFFFFFFFF)
+
+
+class RawWriter:
+    """Headerless straight-alpha RGBA8, rows top to bottom."""
+
+    def __init__(self, fp: BinaryIO, width: int, height: int) -> None:
+        self.fp = fp
+        self.width = width
+        self.height = height
+        self.rows = 0
+
+    def write(self, band: np.ndarray) -> None:
+        if band.shape[1:] != (self.width, 4):
+            raise ValueError(f"band is {band.shape}, expected (rows, {self.width}, 4)")
+        self.fp.write(np.ascontiguousarray(band, dtype=np.uint8).tobytes())
+        self.rows += band.shape[0]
+
+    def close(self) -> None:
+        if self.rows != self.height:
+            raise ValueError(f"wrote {self.rows} of {self.height} rows")
+
+
+class PNGWriter(RawWriter):
+    """RGBA8 PNG written band by band.
+
+    Rows use the "Up" filter (computed against the previous band's last row)
+    and go through a single streaming deflate; compressed data is flushed as
+    IDAT chunks as it becomes available, so memory stays at one band.
+    """
+
+    def __init__(self, fp: BinaryIO, width: int, height: int, level: int = 6) -> None:
+        super().__init__(fp, width, height)
+        self._deflate = zlib.compressobj(level)
+        self._prev = np.zeros((1, width * 4), dtype=np.uint8)
+        fp.write(PNG_SIGNATURE)
+        # 8 bits per channel, colour type 6 (RGBA), deflate, adaptive filtering, no interlace
+        fp.write(_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+
+    def write(self, band: np.ndarray) -> None:
+        if band.shape[1:] != (self.width, 4):
+            raise ValueError(f"band is {band.shape}, expected (rows, {self.width}, 4)")
+        rows = band.reshape(band.shape[0], self.width * 4)
+        scan = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+        scan[:, 0] = 2  # filter type: Up
+        np.subtract(rows, np.concatenate([self._prev, rows[:-1]]), out=scan[:, 1:], casting="unsafe")
+        self._prev = rows[-1:].copy()
+        self._emit(self._deflate.compress(scan.tobytes()))
+        self.rows += band.shape[0]
+
+    def _emit(self, data: bytes) -> None:
+        if data:
+            self.fp.write(_chunk(b"IDAT", data))
+
+    def close(self) -> None:
+        super().close()
+        self._emit(self._deflate.flush())
+        self.fp.write(_chunk(b"IEND", b""))
+
+
+def export_format(path: Path, fmt: Optional[str] = None) -> str:
+    """``fmt`` if given, else inferred from the suffix (.png, anything else raw)."""
+    fmt = fmt or ("png" if Path(path).suffix.lower() == ".png" else "raw")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"unsupported export format: {fmt} (expected one of {EXPORT_FORMATS})")
+    return fmt
+
+
+def export_document(
+    doc: Document,
+    path: Path,
+    fmt: Optional[str] = None,
+    band_height: int = TILE_SIZE,
+    tile_size: int = TILE_SIZE,
+    evaluator: Optional[Evaluator] = None,
+    stats: Optional[CompositeStats] = None,
+    disk: Optional[DiskCache] = None,
+) -> Tuple[int, int]:
+    """Render ``doc`` to ``path`` one horizontal band at a time.
+
+    Each band is encoded and written before the next is rendered (see
+    ``render.render_bands``), so peak memory follows ``band_height`` rather
+    than the canvas size. Returns the canvas ``(width, height)``.
+
+    With a ``disk`` cache (and no ``evaluator``), tiles and outputs from
+    earlier runs are reused and this run's are persisted.
+    """
+    fmt = export_format(path, fmt)
+    cache = None
+    if evaluator is None:
+        cache = NodeCache(budget_bytes=0, disk=disk)
+        evaluator = Evaluator(doc.graph, cache=cache)
+    return _export(doc, path, fmt, band_height, tile_size, evaluator, stats, cache)
+
+
+def _export(
+    doc: Document,
+    path: Path,
+    fmt: str,
+    band_height: int,
+    tile_size: int,
+    evaluator: Evaluator,
+    stats: Optional[CompositeStats],
+    band_cache: Optional[NodeCache],
+    graph: Optional[Graph] = None,
+    keep: Iterable[str] = (),
+) -> Tuple[int, int]:
+    # Tiles go through band_cache, a bounded LRU, so finished rows are evicted,
+    # not kept; ``graph`` is the nodes one render reads (default: doc.graph).
+    # Tiles of the ``keep`` nodes, which a later render reads again, are pinned.
+    layers = lazy_document_layers(doc, evaluator, tile_size)
+    width, height = canvas_size(layers)
+    if band_cache is not None:
+        # The budget depends on the canvas width, known only once the layers are sized
+        graph = graph or doc.graph
+        band_cache.budget_bytes = band_budget(width, len(graph), tile_size, pixel_bytes(graph))
+        # Keys are known once the layers are viewed
+        band_cache.pin(evaluator.keys[nid] for nid in keep if nid in evaluator.keys)
+    if width == 0:
+        raise ValueError(f"document has no visible layers: {doc.path}")
+    bands = render_bands(layers, width, height, band_height, tile_size, evaluator.scheduler, stats)
+    with open(path, "wb") as fp:
+        writer = PNGWriter(fp, width, height) if fmt == "png" else RawWriter(fp, width, height)
+        for _, band in bands:
+            writer.write(band)
+        writer.close()
+    return width, height
+
+
+def frame_path(pattern: Path, frame: int) -> Path:
+    """Output path of one frame of an animation export.
+
+    ``pattern`` may contain ``{frame}`` (with a format spec, e.g.
+    ``{frame:03d}``) or a run of ``#`` (one per digit, zero-padded);
+    otherwise the frame number goes before the suffix: ``out.0007.png``.
+    """
+    pattern = Path(pattern)
+    name = pattern.name
+    if "{frame" in name:
+        return pattern.with_name(name.format(frame=frame))
+    hashes = re.search(r"#+", name)
+    if hashes is not None:
+        digits = f"{int(frame):0{len(hashes.group())}d}"
+        return pattern.with_name(name[:hashes.start()] + digits + name[hashes.end():])
+    return pattern.with_name(f"{pattern.stem}.{int(frame):04d}{pattern.suffix}")
+
+
+def export_frames(
+    doc: Document,
+    path: Path,
+    frames: Iterable[int],
+    fmt: Optional[str] = None,
+    band_height: int = TILE_SIZE,
+    tile_size: int = TILE_SIZE,
+    evaluator: Optional[Evaluator] = None,
+    stats: Optional[CompositeStats] = None,
+    disk: Optional[DiskCache] = None,
+) -> List[Path]:
+    """``export_document`` once per frame, to ``frame_path(path, frame)``.
+
+    Frames share one evaluator: only nodes that vary with the frame (and
+    their consumers) are invalidated, and time-invariant tiles are reused.
+    Tiles of time-varying nodes go through a cache of two tile rows, as for
+    a single export; the invariant nodes they read (``Evaluator.frame_inputs``)
+    are pinned for the whole range, so no invariant tile is computed twice.
+    Returns the written paths; ``disk`` is as for ``export_document``.
+    """
+    fmt = export_format(path, fmt)
+    cache = None
+    keep: List[str] = []
+    if evaluator is None:
+        cache = NodeCache(budget_bytes=0, disk=disk)
+        evaluator = Evaluator(doc.graph, cache=cache)
+        keep = evaluator.frame_inputs(layer.source_node for layer in doc.layers if layer.visible)
+    written = []
+    for frame in frames:
+        evaluator.set_frame(frame)
+        out = frame_path(path, frame)
+        _export(doc, out, fmt, band_height, tile_size, evaluator, stats, cache, keep=keep)
+        written.append(out)
+    return written
+
+
+def variant_path(pattern: Path, name: str) -> Path:
+    """Output path of one sweep variant: ``{name}`` in ``pattern`` is replaced,
+    otherwise the name goes before the suffix: ``out.red.png``.
+    """
+    pattern = Path(pattern)
+    if "{name}" in pattern.name:
+        return pattern.with_name(pattern.name.replace("{name}", name))
+    return pattern.with_name(f"{pattern.stem}.{name}{pattern.suffix}")
+
+
+def export_sweep(
+    doc: Document,
+    path: Path,
+    variants: Sequence[Variant],
+    fmt: Optional[str] = None,
+    band_height: int = TILE_SIZE,
+    tile_size: int = TILE_SIZE,
+    scheduler=None,
+    stats: Optional[CompositeStats] = None,
+    disk: Optional[DiskCache] = None,
+) -> List[Path]:
+    """``export_document`` for every variant, to ``variant_path(path, name)``.
+
+    Variants are evaluated from one ``sweep.SweepPlan`` by one evaluator,
+    so shared nodes have one cache key and are evaluated once. Tiles go
+    through a cache of two tile rows per node of one variant; the shared
+    nodes a later variant reads again (``SweepPlan.reread``) are pinned
+    until ``SweepPlan.done_after`` says no later variant reads them.
+    Returns the written paths; ``disk`` is as for ``export_document``.
+    """
+    fmt = export_format(path, fmt)
+    plan = sweep_plan(doc, variants)
+    reread = plan.reread([layer.source_node for layer in doc.layers if layer.visible])
+    cache = NodeCache(budget_bytes=0, disk=disk)
+    evaluator = Evaluator(plan.graph, cache=cache, scheduler=scheduler)
+    pinned: Dict[str, str] = {}  # plan id -> node key
+    written = []
+    for i, variant in enumerate(variants):
+        out = variant_path(path, variant.name)
+        keep = [pid for pid in plan.nodes[i].values() if pid in reread]
+        _export(plan.variant_document(doc, i), out, fmt, band_height, tile_size, evaluator, stats, cache, doc.graph,
+                keep)
+        pinned.update((pid, evaluator.keys[pid]) for pid in keep if pid in evaluator.keys)
+        done = plan.done_after(i)
+        evaluator.release(done)
+        # Identical subgraphs share a key: only unpin keys no live node still has
+        released = {pinned.pop(pid) for pid in done if pid in pinned}
+        cache.unpin(released - set(pinned.values()))
+        written.append(out)
+    return written
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from .compositor import from_premultiplied, to_premultiplied
+from .image import Image, LazyImage, Rect, check_image, dtype_of, materialize, size_of
+
+
+# Pixel formats a node may produce. RGBA8 is straight alpha (the document
+# format); the float formats hold premultiplied RGBA in [0, 1], the form
+# blending and filtering work in, so they cross node boundaries unconverted.
+RGBA8 = "rgba8"
+RGBA16F = "rgba16f"
+RGBA32F = "rgba32f"
+PIXEL_FORMATS = (RGBA8, RGBA16F, RGBA32F)
+
+_DTYPES: Dict[str, np.dtype] = {
+    RGBA8: np.dtype(np.uint8),
+    RGBA16F: np.dtype(np.float16),
+    RGBA32F: np.dtype(np.float32),
+}
+_FORMATS = {dtype: fmt for fmt, dtype in _DTYPES.items()}
+
+
+def check_format(fmt: str) -> str:
+    if fmt not in _DTYPES:
+        raise ValueError(f"unknown pixel format: {fmt} (expected one of {PIXEL_FORMATS})")
+    return fmt
+
+
+def format_dtype(fmt: str) -> np.dtype:
+    return _DTYPES[check_format(fmt)]
+
+
+def format_of(img: Image) -> str:
+    dtype = dtype_of(img)
+    try:
+        return _FORMATS[dtype]
+    except KeyError:
+        raise TypeError(f"no pixel format for dtype {dtype}") from None
+
+
+def convert(arr: np.ndarray, fmt: str) -> np.ndarray:
+    """``arr`` in pixel format ``fmt``; a no-op when it already is."""
+    src, dst = format_of(arr), check_format(fmt)
+    if src == dst:
+        return arr
+    if src == RGBA8:
+        return to_premultiplied(arr).astype(_DTYPES[dst], copy=False)
+    if dst == RGBA8:
+        return from_premultiplied(arr.astype(np.float32, copy=False))
+    return arr.astype(_DTYPES[dst])
+
+
+class FormatView(LazyImage):
+    """``source`` read through a format conversion, one requested rect at a time."""
+
+    def __init__(self, source: LazyImage, fmt: str) -> None:
+        self.source = source
+        self.format = check_format(fmt)
+        self.dtype = _DTYPES[fmt]
+        self.width, self.height = size_of(source)
+
+    def read(self, rect: Optional[Rect] = None) -> np.ndarray:
+        return convert(materialize(self.source, rect), self.format)
+
+    @property
+    def nbytes(self) -> int:
+        return self.source.nbytes
+
+
+def as_format(img: Image, fmt: str, accepts: Iterable[str] = ()) -> Image:
+    """``img`` in ``fmt`` unless it is already in one of the ``accepts`` formats.
+
+    Arrays are converted now; lazy images get a ``FormatView`` so only the
+    pixels actually read are converted.
+    """
+    current = format_of(img)
+    if current == fmt or current in accepts:
+        return img
+    if isinstance(img, LazyImage):
+        return FormatView(img, fmt)
+    return convert(img, fmt)
+
+
+def check_output(img: Image, fmt: str) -> Image:
+    """Validate a node output and bring it into the node's declared format.
+
+    RGBA8 nodes keep ``image.check_image`` semantics (float arrays are straight
+    alpha in [0, 1]); for float formats, float arrays are taken as
+    premultiplied and RGBA8 results are converted.
+    """
+    if fmt == RGBA8:
+        return check_image(img)
+    if isinstance(img, LazyImage):
+        return as_format(img, fmt)
+    if not isinstance(img, np.ndarray) or img.ndim != 3 or img.shape[2] != 4:
+        raise TypeError(f"expected an H×W×4 array, got {getattr(img, 'shape', type(img).__name__)}")
+    if img.dtype == np.uint8:
+        return convert(img, fmt)
+    return np.ascontiguousarray(img, dtype=format_dtype(fmt))
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+
+REF_PREFIX = "ref://"
+
+
+class GraphError(ValueError):
+    """Raised for malformed graphs: missing inputs, duplicate ids or cycles."""
+
+
+def parse_ref(value: Any) -> Optional[str]:
+    """Return the node id of a ``ref://node-id`` string, or None for literals."""
+    if isinstance(value, str) and value.startswith(REF_PREFIX):
+        node_id = value[len(REF_PREFIX):]
+        if not node_id:
+            raise GraphError(f"empty node reference: {value!r}")
+        return node_id
+    return None
+
+
+@dataclass
+class Node:
+    id: str
+    type: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    inputs: Dict[str, str] = field(default_factory=dict)  # input name -> upstream node id
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Node":
+        for key in ("id", "type"):
+            if key not in data:
+                raise GraphError(f"node missing key: {key}")
+        inputs: Dict[str, str] = {}
+        for name, value in (data.get("inputs") or {}).items():
+            ref = parse_ref(value)
+            if ref is None:
+                raise GraphError(f"node {data['id']}: input {name!r} is not a ref:// value")
+            inputs[name] = ref
+        return cls(
+            id=str(data["id"]),
+            type=str(data["type"]),
+            params=dict(data.get("params") or {}),
+            inputs=inputs,
+        )
+
+
+class Graph:
+    """Node DAG keyed by node id. Edges run from upstream inputs to consumers."""
+
+    def __init__(self, nodes: Iterable[Node] = ()) -> None:
+        self.nodes: Dict[str, Node] = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: Node) -> None:
+        if node.id in self.nodes:
+            raise GraphError(f"duplicate node id: {node.id}")
+        self.nodes[node.id] = node
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.nodes
+
+    def __getitem__(self, node_id: str) -> Node:
+        return self.nodes[node_id]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def check(self) -> None:
+        """Ensure every input reference points at a node in the graph."""
+        for node in self.nodes.values():
+            for name, ref in node.inputs.items():
+                if ref not in self.nodes:
+                    raise GraphError(f"node {node.id}: input {name!r} references missing node {ref!r}")
+
+    def consumers(self) -> Dict[str, List[str]]:
+        """Map each node id to the ids of nodes that read its output."""
+        out: Dict[str, List[str]] = {nid: [] for nid in self.nodes}
+        for node in self.nodes.values():
+            for ref in node.inputs.values():
+                if ref in out and node.id not in out[ref]:
+                    out[ref].append(node.id)
+        return out
+
+    def upstream(self, targets: Iterable[str]) -> List[str]:
+        """Ids of ``targets`` and everything they transitively depend on."""
+        seen: Dict[str, None] = {}
+        stack = list(targets)
+        while stack:
+            nid = stack.pop()
+            if nid in seen:
+                continue
+            if nid not in self.nodes:
+                raise GraphError(f"unknown node: {nid}")
+            seen[nid] = None
+            stack.extend(self.nodes[nid].inputs.values())
+        return list(seen)
+
+    def downstream(self, sources: Iterable[str], consumers: Optional[Dict[str, List[str]]] = None) -> List[str]:
+        """Ids of ``sources`` and every node that transitively consumes them."""
+        consumers = consumers if consumers is not None else self.consumers()
+        seen: Dict[str, None] = {}
+        stack = list(sources)
+        while stack:
+            nid = stack.pop()
+            if nid in seen or nid not in consumers:
+                continue
+            seen[nid] = None
+            stack.extend(consumers[nid])
+        return list(seen)
+
+    def topo_order(self, targets: Optional[Iterable[str]] = None) -> List[str]:
+        """Return node ids with every node after all of its inputs.
+
+        Restricted to the upstream closure of ``targets`` when given. Ties are
+        broken by node id so the order is stable across runs.
+        """
+        self.check()
+        wanted = set(self.upstream(targets) if targets is not None else self.nodes)
+        indegree = {nid: 0 for nid in wanted}
+        for nid in wanted:
+            for ref in set(self.nodes[nid].inputs.values()):
+                indegree[nid] += 1
+        consumers = self.consumers()
+        ready = sorted(nid for nid, deg in indegree.items() if deg == 0)
+        order: List[str] = []
+        while ready:
+            nid = ready.pop(0)
+            order.append(nid)
+            released = []
+            for c in consumers[nid]:
+                if c not in indegree:
+                    continue
+                indegree[c] -= 1
+                if indegree[c] == 0:
+                    released.append(c)
+            if released:
+                ready = sorted(ready + released)
+        if len(order) != len(wanted):
+            cyclic = sorted(nid for nid, deg in indegree.items() if deg > 0)
+            raise GraphError(f"graph has a cycle through: {', '.join(cyclic)}")
+        return order
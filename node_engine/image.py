@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+
+RGBA = Tuple[int, int, int, int]
+Rect = Tuple[int, int, int, int]  # x, y, w, h in pixels
+
+
+def new_image(width: int, height: int, rgba: RGBA = (0, 0, 0, 0)) -> np.ndarray:
+    """Allocate a contiguous H×W×4 uint8 buffer filled with ``rgba``."""
+    if width <= 0 or height <= 0:
+        raise ValueError(f"invalid image size: {width}x{height}")
+    img = np.empty((int(height), int(width), 4), dtype=np.uint8)
+    img[...] = np.asarray(rgba, dtype=np.uint8)
+    return img
+
+
+def intersect_rect(a: Rect, b: Rect) -> Optional[Rect]:
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def union_rect(a: Rect, b: Rect) -> Rect:
+    x0, y0 = min(a[0], b[0]), min(a[1], b[1])
+    x1, y1 = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return x0, y0, x1 - x0, y1 - y0
+
+
+class LazyImage:
+    """An image whose pixels are produced on demand by ``read``.
+
+    Only the requested rectangle is ever allocated, so a 16384² flat fill
+    costs a few bytes until a consumer actually reads from it.
+    """
+
+    width: int
+    height: int
+    dtype = np.dtype(np.uint8)  # of the arrays ``read`` returns
+
+    def read(self, rect: Optional[Rect] = None) -> np.ndarray:
+        raise NotImplementedError
+
+    @property
+    def nbytes(self) -> int:
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class ConstantImage(LazyImage):
+    width: int
+    height: int
+    rgba: RGBA
+
+    def read(self, rect: Optional[Rect] = None) -> np.ndarray:
+        x, y, w, h = rect if rect is not None else (0, 0, self.width, self.height)
+        return new_image(w, h, self.rgba)
+
+    def pixel(self) -> np.ndarray:
+        return np.asarray(self.rgba, dtype=np.uint8).reshape(1, 1, 4)
+
+    @property
+    def nbytes(self) -> int:
+        return 4
+
+
+@dataclass(frozen=True, eq=False)
+class PatchImage(LazyImage):
+    """A constant ``fill`` with a single materialized ``patch`` at (x, y)."""
+
+    fill: ConstantImage
+    patch: np.ndarray
+    x: int
+    y: int
+
+    @property
+    def width(self) -> int:  # type: ignore[override]
+        return self.fill.width
+
+    @property
+    def height(self) -> int:  # type: ignore[override]
+        return self.fill.height
+
+    @property
+    def patch_rect(self) -> Rect:
+        return self.x, self.y, int(self.patch.shape[1]), int(self.patch.shape[0])
+
+    def read(self, rect: Optional[Rect] = None) -> np.ndarray:
+        rect = rect if rect is not None else (0, 0, self.width, self.height)
+        out = self.fill.read(rect)
+        hit = intersect_rect(rect, self.patch_rect)
+        if hit is not None:
+            hx, hy, hw, hh = hit
+            out[hy - rect[1]:hy - rect[1] + hh, hx - rect[0]:hx - rect[0] + hw] = self.patch[
+                hy - self.y:hy - self.y + hh, hx - self.x:hx - self.x + hw
+            ]
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.patch.nbytes) + self.fill.nbytes
+
+
+Image = Union[np.ndarray, LazyImage]
+
+
+def size_of(img: Image) -> Tuple[int, int]:
+    """(width, height) of an image buffer or lazy image."""
+    if isinstance(img, LazyImage):
+        return img.width, img.height
+    return int(img.shape[1]), int(img.shape[0])
+
+
+def dtype_of(img: Image) -> np.dtype:
+    return np.dtype(img.dtype)
+
+
+def nbytes_of(img: Image) -> int:
+    return int(img.nbytes)
+
+
+def materialize(img: Image, rect: Optional[Rect] = None) -> np.ndarray:
+    """Pixels of ``img`` inside ``rect`` (default: the whole image) as an array.
+
+    The array keeps ``img``'s own dtype: uint8 straight-alpha RGBA8, or
+    float16/float32 premultiplied RGBA for float formats (see ``formats``).
+    """
+    if isinstance(img, LazyImage):
+        return img.read(rect)
+    if rect is None:
+        return img
+    x, y, w, h = rect
+    return img[y:y + h, x:x + w]
+
+
+def crop(img: Image, rect: Rect) -> Image:
+    """The part of ``img`` inside ``rect`` (which must lie within its bounds).
+
+    Constant regions stay symbolic; arrays are returned as views.
+    """
+    x, y, w, h = rect
+    if isinstance(img, ConstantImage):
+        return ConstantImage(w, h, img.rgba)
+    if isinstance(img, PatchImage) and intersect_rect(rect, img.patch_rect) is None:
+        return ConstantImage(w, h, img.fill.rgba)
+    return materialize(img, rect)
+
+
+def read_region(img: Image, rect: Rect) -> np.ndarray:
+    """Like ``materialize`` but ``rect`` may extend past the image; outside is transparent."""
+    width, height = size_of(img)
+    x, y, w, h = rect
+    hit = intersect_rect(rect, (0, 0, width, height))
+    if hit == rect:
+        return np.array(materialize(img, rect))
+    out = np.zeros((h, w, 4), dtype=dtype_of(img))
+    if hit is not None:
+        hx, hy, hw, hh = hit
+        out[hy - y:hy - y + hh, hx - x:hx - x + hw] = materialize(img, hit)
+    return out
+
+
+def check_image(img: Image) -> Image:
+    """Validate a node output; arrays come back as C-contiguous RGBA8."""
+    if isinstance(img, LazyImage):
+        return img
+    if not isinstance(img, np.ndarray) or img.ndim != 3 or img.shape[2] != 4:
+        raise TypeError(f"expected an H×W×4 array, got {getattr(img, 'shape', type(img).__name__)}")
+    if img.dtype != np.uint8:
+        img = to_rgba8(img)
+    return np.ascontiguousarray(img)
+
+
+def to_float(img: np.ndarray) -> np.ndarray:
+    """RGBA8 -> float32 in [0, 1]."""
+    return img.astype(np.float32) * (1.0 / 255.0)
+
+
+def to_rgba8(img: np.ndarray) -> np.ndarray:
+    """float in [0, 1] -> RGBA8 with rounding and clamping."""
+    out = np.clip(img * 255.0 + 0.5, 0.0, 255.0)
+    return out.astype(np.uint8)
@@ -0,0 +1,643 @@
+from __future__ import annotations
+
+import importlib
+import sys
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .image import (
+    ConstantImage,
+    Image,
+    PatchImage,
+    Rect,
+    crop,
+    intersect_rect,
+    materialize,
+    read_region,
+    size_of,
+    union_rect,
+)
+from .compositor import BLEND_MODES, blend, blend_rgba8, from_premultiplied, to_premultiplied
+from .color import linear_to_srgb8, load_cube, srgb_to_linear
+from .formats import PIXEL_FORMATS, RGBA8, RGBA16F, RGBA32F, check_format
+from .noise import NOISE_KINDS, fbm, pixel_centres
+from .vector import parse_path, rasterize
+from .resample import Pass, rotate_passes, run_passes, scale_passes, translate_passes
+from .tiles import pad_rect
+from .simple_eval import hex_to_rgb
+
+
+NodeFn = Callable[[Dict[str, Image], Dict[str, Any]], Image]
+RegionFn = Callable[[Dict[str, Image], Dict[str, Any], Rect], Image]
+SizeFn = Callable[[Dict[str, Tuple[int, int]], Dict[str, Any]], Tuple[int, int]]
+
+
+@dataclass(frozen=True)
+class NodeType:
+    """A node kernel plus what the engine needs to evaluate it by tiles.
+
+    ``region(inputs, params, rect)`` computes only the output pixels inside
+    ``rect``; nodes without one are always evaluated whole. ``size`` gives the
+    output (width, height) from input sizes and params; by default it is the
+    size of the first input. ``halo`` is how many pixels beyond a rect the
+    kernel reads from its inputs. Plugin nodes keep their ``entrypoint``;
+    ``isolated`` ones may be run in a worker process by the scheduler.
+
+    ``format`` is the pixel format (see ``formats``) the kernel produces and
+    wants its inputs in; inputs already in one of the ``accepts`` formats are
+    passed through unconverted.
+
+    ``time_dependent`` kernels read the current frame from ``params["frame"]``
+    (see ``animation``); other nodes are reused across frames unless one of
+    their params is keyframed or an input changes.
+    """
+
+    name: str
+    fn: NodeFn
+    inputs: Tuple[str, ...] = ()  # required input names
+    region: Optional[RegionFn] = None
+    size: Optional[SizeFn] = None
+    halo: Optional[Callable[[Dict[str, Any]], int]] = None
+    entrypoint: Optional[str] = None
+    isolated: bool = False
+    format: str = RGBA8
+    accepts: Tuple[str, ...] = ()
+    time_dependent: bool = False
+    version: str = ""  # plugin version; part of cache keys so upgrades invalidate results
+
+
+_BUILTINS: Dict[str, NodeType] = {}
+
+
+def register_node(
+    name: str,
+    inputs: Tuple[str, ...] = (),
+    region: Optional[RegionFn] = None,
+    size: Optional[SizeFn] = None,
+    halo: Optional[Callable[[Dict[str, Any]], int]] = None,
+    format: str = RGBA8,
+    accepts: Tuple[str, ...] = (),
+    time_dependent: bool = False,
+) -> Callable[[NodeFn], NodeFn]:
+    """Decorator registering a built-in node kernel under ``name``."""
+
+    def deco(fn: NodeFn) -> NodeFn:
+        if name in _BUILTINS:
+            raise ValueError(f"node type already registered: {name}")
+        _BUILTINS[name] = NodeType(
+            name=name, fn=fn, inputs=inputs, region=region, size=size, halo=halo,
+            format=check_format(format), accepts=tuple(check_format(f) for f in accepts),
+            time_dependent=time_dependent,
+        )
+        return fn
+
+    return deco
+
+
+def halo_region(fn: NodeFn, halo: Callable[[Dict[str, Any]], int]) -> RegionFn:
+    """Region kernel for neighbourhood ops: run ``fn`` on inputs padded by the halo, then trim."""
+
+    def region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect) -> Image:
+        pad = max(0, int(halo(params)))
+        padded = pad_rect(rect, pad)
+        out = fn({name: read_region(img, padded) for name, img in inputs.items()}, params)
+        return materialize(out, (pad, pad, rect[2], rect[3]))
+
+    return region
+
+
+def node_size(ntype: NodeType, inputs: Dict[str, Image], params: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """Output size of a node without evaluating it, or None when it cannot be known."""
+    sizes = {name: size_of(img) for name, img in inputs.items()}
+    if ntype.size is not None:
+        return ntype.size(sizes, params)
+    first = next((n for n in ntype.inputs if n in sizes), next(iter(sizes), None))
+    return sizes[first] if first is not None else None
+
+
+def _load_entrypoint(path: str) -> Callable[..., Any]:
+    module_name, _, attr = path.rpartition(".")
+    if not module_name:
+        raise ValueError(f"invalid entrypoint: {path}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def run_entrypoint(entrypoint: str, inputs: Dict[str, Any], params: Dict[str, Any]) -> Any:
+    """Call a plugin entrypoint by dotted path; picklable for worker processes."""
+    return _load_entrypoint(entrypoint)(**inputs, **params)
+
+
+def _plugin_node(
+    name: str,
+    entrypoint: str,
+    isolated: bool = False,
+    format: str = RGBA8,
+    time_dependent: bool = False,
+    version: str = "",
+) -> NodeType:
+    """Adapt a plugin ``execute(**inputs, **params)`` into a NodeType.
+
+    A plugin module may also define ``halo(**params) -> int``; such nodes are
+    evaluated by tiles, each on an input region padded by the halo. Inputs
+    arrive in the plugin's declared ``format``; time-dependent plugins also
+    receive the frame as a ``frame`` keyword.
+    """
+    fn = _load_entrypoint(entrypoint)
+    module_halo = getattr(sys.modules[fn.__module__], "halo", None)
+
+    def call(inputs: Dict[str, Image], params: Dict[str, Any]) -> Image:
+        # Plugins see plain arrays; lazy images are materialized at the boundary
+        return fn(**{k: materialize(v) for k, v in inputs.items()}, **params)
+
+    common = dict(
+        name=name, fn=call, entrypoint=entrypoint, isolated=isolated,
+        format=check_format(format), time_dependent=time_dependent, version=version,
+    )
+    if module_halo is None:
+        return NodeType(**common)
+
+    def halo(params: Dict[str, Any]) -> int:
+        return int(module_halo(**params))
+
+    return NodeType(region=halo_region(call, halo), halo=halo, **common)
+
+
+def resolve_node_type(name: str) -> NodeType:
+    """Look up a built-in node, falling back to plugins registered with type 'node'."""
+    if name in _BUILTINS:
+        return _BUILTINS[name]
+    from plugins.vx.registry import get_registry
+
+    for spec in get_registry().list(type="node"):
+        if spec.name == name:
+            return _plugin_node(
+                name, spec.entrypoint, isolated=spec.parallel == "process",
+                format=spec.format, time_dependent=spec.time_dependent, version=spec.version,
+            )
+    raise KeyError(f"unknown node type: {name}")
+
+
+def _rgba_param(value: Any) -> Tuple[int, int, int, int]:
+    if isinstance(value, str):
+        return (*hex_to_rgb(value), 255)
+    vals = [int(v) for v in value]
+    if len(vals) == 3:
+        vals.append(255)
+    if len(vals) != 4:
+        raise ValueError(f"invalid color: {value!r}")
+    return tuple(vals)  # type: ignore[return-value]
+
+
+def _size_param(params: Dict[str, Any]) -> Tuple[int, int]:
+    width = int(params.get("width", 64))
+    height = int(params.get("height", 64))
+    if width <= 0 or height <= 0:
+        raise ValueError(f"invalid image size: {width}x{height}")
+    return width, height
+
+
+@register_node("solid_color")
+def solid_color(inputs: Dict[str, Image], params: Dict[str, Any]) -> Image:
+    return ConstantImage(*_size_param(params), _rgba_param(params.get("color", "#cccccc")))
+
+
+def _src_pixels(img: Image, rect: Rect) -> np.ndarray:
+    # Constants composite as a single broadcast pixel instead of a full buffer
+    if isinstance(img, ConstantImage):
+        return img.pixel()
+    return materialize(img, rect)
+
+
+def _compose_region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect) -> Image:
+    a = crop(inputs["a"], rect)
+    bw, bh = size_of(inputs["b"])
+    hit = intersect_rect(rect, (0, 0, bw, bh))
+    if hit is None:
+        return a
+    # b sits at the origin, so its visible part starts at the rect's top-left too
+    return compose({"a": a, "b": crop(inputs["b"], hit)}, params)
+
+
+@register_node("compose", inputs=("a", "b"), region=_compose_region)
+def compose(inputs: Dict[str, Image], params: Dict[str, Any]) -> Image:
+    """Place ``b`` over ``a`` at the origin; the output takes the size of ``a``.
+
+    ``mode`` is any ``compositor.BLEND_MODES`` entry. Constant inputs stay
+    symbolic: constant over constant is a constant, and a detail over a flat
+    fill only materializes the region the detail touches.
+    """
+    mode = params.get("mode", "normal")
+    if mode not in BLEND_MODES:
+        raise ValueError(f"unsupported compose mode: {mode}")
+    a, b = inputs["a"], inputs["b"]
+    aw, ah = size_of(a)
+    bw, bh = size_of(b)
+    full = (0, 0, aw, ah)
+    covered = (0, 0, min(aw, bw), min(ah, bh))
+
+    if isinstance(b, ConstantImage) and covered == full:
+        if mode == "normal" and b.rgba[3] == 255:
+            return ConstantImage(aw, ah, b.rgba)
+        if isinstance(a, ConstantImage):
+            return ConstantImage(aw, ah, _pixel_tuple(blend_rgba8(a.pixel(), b.pixel(), mode)))
+        if isinstance(a, PatchImage):
+            fill = ConstantImage(aw, ah, _pixel_tuple(blend_rgba8(a.fill.pixel(), b.pixel(), mode)))
+            return PatchImage(fill, blend_rgba8(a.patch, b.pixel(), mode), a.x, a.y)
+
+    if isinstance(a, (ConstantImage, PatchImage)):
+        fill = a if isinstance(a, ConstantImage) else a.fill
+        region = covered if isinstance(a, ConstantImage) else union_rect(covered, a.patch_rect)
+        out = a.read(region)
+        _, _, w, h = covered
+        out[:h, :w] = blend_rgba8(out[:h, :w], _src_pixels(b, covered), mode)
+        if region == full:
+            return out
+        return PatchImage(fill, out, region[0], region[1])
+
+    _, _, w, h = covered
+    out = np.array(materialize(a))
+    out[:h, :w] = blend_rgba8(out[:h, :w], _src_pixels(b, covered), mode)
+    return out
+
+
+def _pixel_tuple(px: np.ndarray) -> Tuple[int, int, int, int]:
+    return tuple(int(v) for v in px.reshape(4))  # type: ignore[return-value]
+
+
+def _scale_alpha(img: np.ndarray, amount: float) -> np.ndarray:
+    out = img.copy()
+    out[..., 3] = np.round(out[..., 3] * amount).astype(np.uint8)
+    return out
+
+
+def _opacity_region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect) -> Image:
+    return opacity({"image": crop(inputs["image"], rect)}, params)
+
+
+@register_node("opacity", inputs=("image",), region=_opacity_region)
+def opacity(inputs: Dict[str, Image], params: Dict[str, Any]) -> Image:
+    amount = min(1.0, max(0.0, float(params.get("opacity", 1.0))))
+    img = inputs["image"]
+    if isinstance(img, ConstantImage):
+        return ConstantImage(img.width, img.height, _pixel_tuple(_scale_alpha(img.pixel(), amount)))
+    if isinstance(img, PatchImage):
+        fill = ConstantImage(img.width, img.height, _pixel_tuple(_scale_alpha(img.fill.pixel(), amount)))
+        return PatchImage(fill, _scale_alpha(img.patch, amount), img.x, img.y)
+    return _scale_alpha(materialize(img), amount)
+
+
+FUSABLE_OPS = ("opacity", "compose")
+
+
+def _premultiplied_input(img: Image, rect: Rect) -> np.ndarray:
+    width, height = size_of(img)
+    if isinstance(img, ConstantImage) and intersect_rect(rect, (0, 0, width, height)) == rect:
+        return to_premultiplied(img.pixel())
+    # Compose places inputs at the origin; anything outside an input is transparent
+    pixels = read_region(img, rect)
+    if pixels.dtype == np.uint8:
+        return to_premultiplied(pixels)
+    return pixels.astype(np.float32, copy=False)  # float formats are premultiplied already
+
+
+def _fused_region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect) -> Image:
+    regs: List[np.ndarray] = []
+    loaded: Dict[str, np.ndarray] = {}
+
+    def arg(ref: str) -> np.ndarray:
+        if ref.startswith("$"):
+            return regs[int(ref[1:])]
+        if ref not in loaded:
+            loaded[ref] = _premultiplied_input(inputs[ref], rect)
+        return loaded[ref]
+
+    for step in params["program"]:
+        op, args, p = step["op"], [arg(a) for a in step["args"]], step.get("params", {})
+        if op == "opacity":
+            regs.append(args[0] * min(1.0, max(0.0, float(p.get("opacity", 1.0)))))
+        elif op == "compose":
+            regs.append(blend(args[0], args[1], p.get("mode", "normal")))
+        else:
+            raise ValueError(f"op cannot be fused: {op}")
+    return from_premultiplied(np.broadcast_to(regs[-1], (rect[3], rect[2], 4)))
+
+
+@register_node("fused_pointwise", region=_fused_region, accepts=PIXEL_FORMATS)
+def fused_pointwise(inputs: Dict[str, Image], params: Dict[str, Any]) -> Image:
+    """A chain of per-pixel ops (see ``optimizer.fuse``) run in one pass.
+
+    ``params["program"]`` is a list of steps ``{"op", "args", "params"}``;
+    args name node inputs or earlier steps (``"$0"``). Inputs (in any pixel
+    format) are read as premultiplied float once and the result is converted
+    back once, so no intermediate RGBA8 buffer is allocated per fused node.
+    The output has the size of the first input.
+    """
+    width, height = size_of(next(iter(inputs.values())))
+    return _fused_region(inputs, params, (0, 0, width, height))
+
+
+def _pixels(img: Image) -> np.ndarray:
+    # A flat input is converted as one pixel and broadcast back to its size
+    if isinstance(img, ConstantImage):
+        return np.broadcast_to(img.pixel(), (img.height, img.width, 4))
+    return materialize(img)
+
+
+def _straight_float(img: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Straight RGB and alpha (float32) from premultiplied float RGBA."""
+    alpha = img[..., 3:4].astype(np.float32)
+    rgb = np.divide(img[..., :3], alpha, out=np.zeros(img.shape[:-1] + (3,), np.float32), where=alpha > 0.0)
+    return rgb, alpha
+
+
+def _srgb_to_linear_region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect) -> Image:
+    return srgb_to_linear_node({"image": crop(inputs["image"], rect)}, params)
+
+
+@register_node(
+    "srgb_to_linear", inputs=("image",), region=_srgb_to_linear_region, format=RGBA16F, accepts=PIXEL_FORMATS
+)
+def srgb_to_linear_node(inputs: Dict[str, Image], params: Dict[str, Any]) -> Image:
+    """Decode sRGB to linear light (premultiplied half float) by table lookup.
+
+    Float inputs are taken as premultiplied sRGB-encoded values. Blend and
+    filter in linear light, then convert back with ``linear_to_srgb``.
+    """
+    img = _pixels(inputs["image"])
+    if img.dtype == np.uint8:
+        rgb, alpha = srgb_to_linear(img[..., :3]), img[..., 3:4] * np.float32(1.0 / 255.0)
+    else:
+        rgb, alpha = _straight_float(img)
+        rgb = srgb_to_linear(rgb)
+    out = np.empty(img.shape, dtype=np.float16)
+    np.multiply(rgb, alpha, out=out[..., :3], casting="unsafe")
+    out[..., 3:4] = alpha
+    return out
+
+
+def _linear_to_srgb_region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect) -> Image:
+    return linear_to_srgb_node({"image": crop(inputs["image"], rect)}, params)
+
+
+@register_node("linear_to_srgb", inputs=("image",), region=_linear_to_srgb_region, accepts=(RGBA16F, RGBA32F))
+def linear_to_srgb_node(inputs: Dict[str, Image], params: Dict[str, Any]) -> Image:
+    """Encode premultiplied linear float as straight 8-bit sRGB (one table lookup).
+
+    RGBA8 input is taken as linear too and converted to float first.
+    """
+    img = _pixels(inputs["image"])
+    if img.dtype == np.uint8:
+        img = to_premultiplied(img)
+    rgb, alpha = _straight_float(img)
+    out = np.empty(rgb.shape[:-1] + (4,), dtype=np.uint8)
+    out[..., :3] = linear_to_srgb8(rgb)
+    out[..., 3:4] = np.clip(alpha * 255.0 + 0.5, 0.0, 255.0)
+    return out
+
+
+def _color_lut_region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect) -> Image:
+    return color_lut({"image": crop(inputs["image"], rect)}, params)
+
+
+@register_node("color_lut", inputs=("image",), region=_color_lut_region)
+def color_lut(inputs: Dict[str, Image], params: Dict[str, Any]) -> Image:
+    """Map colours through the 3D ``.cube`` LUT at ``params["path"]`` (trilinear).
+
+    Flat fills stay symbolic: only their one pixel goes through the LUT.
+    """
+    lut = load_cube(params["path"])
+    img = inputs["image"]
+    if isinstance(img, ConstantImage):
+        return ConstantImage(img.width, img.height, _pixel_tuple(lut.apply_rgba8(img.pixel())))
+    if isinstance(img, PatchImage):
+        fill = ConstantImage(img.width, img.height, _pixel_tuple(lut.apply_rgba8(img.fill.pixel())))
+        return PatchImage(fill, lut.apply_rgba8(img.patch), img.x, img.y)
+    return lut.apply_rgba8(materialize(img))
+
+
+# Transforms resample in premultiplied float (see ``resample``) and read only
+# the source pixels a tile needs; float inputs are used as they are.
+
+
+def _transform_region(passes: Callable[[Tuple[int, int], Dict[str, Any]], List[Pass]]) -> RegionFn:
+    def region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect) -> Image:
+        img = inputs["image"]
+
+        def read(src: Rect) -> np.ndarray:
+            return np.broadcast_to(_premultiplied_input(img, src), (src[3], src[2], 4))
+
+        return run_passes(passes(size_of(img), params), read, rect)
+
+    return region
+
+
+def _scale_size(sizes: Dict[str, Tuple[int, int]], params: Dict[str, Any]) -> Tuple[int, int]:
+    """``width``/``height`` (a missing one keeps the aspect ratio), else ``factor`` (number or [fx, fy])."""
+    w, h = sizes["image"]
+    if "width" in params or "height" in params:
+        width = int(params["width"]) if "width" in params else max(1, round(w * int(params["height"]) / h))
+        height = int(params["height"]) if "height" in params else max(1, round(h * width / w))
+    else:
+        factor = params.get("factor", 1.0)
+        fx, fy = (float(f) for f in factor) if isinstance(factor, (list, tuple)) else (float(factor),) * 2
+        if fx <= 0 or fy <= 0:
+            raise ValueError(f"scale factor must be positive, got {factor!r}")
+        width, height = max(1, round(w * fx)), max(1, round(h * fy))
+    if width <= 0 or height <= 0:
+        raise ValueError(f"invalid image size: {width}x{height}")
+    return width, height
+
+
+def _scale_passes(size: Tuple[int, int], params: Dict[str, Any]) -> List[Pass]:
+    return scale_passes(size, _scale_size({"image": size}, params), str(params.get("filter", "lanczos")))
+
+
+_scale_region = _transform_region(_scale_passes)
+
+
+@register_node("scale", inputs=("image",), region=_scale_region, size=_scale_size, format=RGBA32F,
+               accepts=PIXEL_FORMATS)
+def scale(inputs: Dict[str, Image], params: Dict[str, Any]) -> Image:
+    """Resize to ``width``/``height`` or by ``factor`` with a separable ``filter``
+    (box, bilinear, bicubic or lanczos; antialiased when shrinking).
+
+    Edge pixels extend outward, so a flat fill stays a flat fill.
+    """
+    img = inputs["image"]
+    if isinstance(img, ConstantImage):
+        return ConstantImage(*_scale_size({"image": size_of(img)}, params), img.rgba)
+    return _scale_region(inputs, params, (0, 0, *_scale_size({"image": size_of(img)}, params)))
+
+
+def _translate_passes(size: Tuple[int, int], params: Dict[str, Any]) -> List[Pass]:
+    return translate_passes(size, float(params.get("x", 0.0)), float(params.get("y", 0.0)),
+                            str(params.get("filter", "bicubic")))
+
+
+_translate_region = _transform_region(_translate_passes)
+
+
+@register_node("translate", inputs=("image",), region=_translate_region, format=RGBA32F, accepts=PIXEL_FORMATS)
+def translate(inputs: Dict[str, Image], params: Dict[str, Any]) -> Image:
+    """Move by (``x``, ``y``) pixels; fractional offsets are resampled with ``filter``."""
+    return _translate_region(inputs, params, (0, 0, *size_of(inputs["image"])))
+
+
+def _rotate_passes(size: Tuple[int, int], params: Dict[str, Any]) -> List[Pass]:
+    w, h = size
+    centre = params.get("center", (w / 2.0, h / 2.0))
+    cx, cy = (float(v) for v in centre)
+    return rotate_passes(size, float(params.get("angle", 0.0)), (cx, cy), str(params.get("filter", "bicubic")))
+
+
+_rotate_region = _transform_region(_rotate_passes)
+
+
+@register_node("rotate", inputs=("image",), region=_rotate_region, format=RGBA32F, accepts=PIXEL_FORMATS)
+def rotate(inputs: Dict[str, Image], params: Dict[str, Any]) -> Image:
+    """Rotate ``angle`` degrees clockwise about ``center`` (default: the image centre)
+    by three shears, keeping the input size; uncovered corners are transparent.
+    """
+    return _rotate_region(inputs, params, (0, 0, *size_of(inputs["image"])))
+
+
+# Generators: no inputs, size from params, and every pixel a pure function of
+# its canvas coordinates and the params, so any tile can be computed alone.
+
+SPREAD_MODES = ("pad", "repeat", "reflect")
+
+
+def _generator_size(sizes: Dict[str, Tuple[int, int]], params: Dict[str, Any]) -> Tuple[int, int]:
+    return _size_param(params)
+
+
+def _whole(region: RegionFn) -> NodeFn:
+    def fn(inputs: Dict[str, Image], params: Dict[str, Any]) -> Image:
+        return region(inputs, params, (0, 0, *_size_param(params)))
+
+    fn.__doc__ = region.__doc__
+    return fn
+
+
+def _ramp(t: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
+    """Map ``t`` (clamped to [0, 1]) through the colour ``stops`` param to straight RGBA8."""
+    stops = params.get("stops") or [[0.0, "#000000"], [1.0, "#ffffff"]]
+    try:
+        stops = sorted((float(offset), _rgba_param(color)) for offset, color in stops)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid gradient stops: {params.get('stops')!r} (expected [[offset, color], ...])") from None
+    offsets = np.array([offset for offset, _ in stops])
+    colors = np.array([color for _, color in stops], dtype=np.float64)
+    t = np.clip(t, 0.0, 1.0)
+    out = np.empty(t.shape + (4,), dtype=np.uint8)
+    for c in range(4):
+        out[..., c] = np.floor(np.interp(t, offsets, colors[:, c]) + 0.5)
+    return out
+
+
+def _spread(t: np.ndarray, mode: str) -> np.ndarray:
+    if mode == "pad":
+        return t
+    if mode == "repeat":
+        return t - np.floor(t)
+    if mode == "reflect":
+        return 1.0 - np.abs(t - 2.0 * np.floor(t * 0.5) - 1.0)
+    raise ValueError(f"unknown spread mode: {mode!r} (expected one of {SPREAD_MODES})")
+
+
+def _point_param(params: Dict[str, Any], name: str, default: Tuple[float, float]) -> Tuple[float, float]:
+    value = params.get(name, default)
+    x, y = (float(v) for v in value)
+    return x, y
+
+
+def _noise_region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect, octaves: int = 1) -> Image:
+    """Gradient noise mapped through ``stops``: ``kind`` perlin or simplex,
+    ``scale`` (feature size in pixels), ``seed``; ``octaves`` > 1 sums
+    finer layers (``lacunarity``, ``gain``) as fBm.
+    """
+    kind = str(params.get("kind", "perlin"))
+    if kind not in NOISE_KINDS:
+        raise ValueError(f"unknown noise kind: {kind!r} (expected one of {sorted(NOISE_KINDS)})")
+    scale = float(params.get("scale", 64.0))
+    if scale <= 0:
+        raise ValueError(f"scale must be positive, got {scale}")
+    x, y = pixel_centres(rect)
+    value = fbm(
+        x / scale, y / scale, int(params.get("seed", 0)), kind,
+        int(params.get("octaves", octaves)), float(params.get("lacunarity", 2.0)), float(params.get("gain", 0.5)),
+    )
+    return _ramp(0.5 + 0.5 * value, params)
+
+
+def _fbm_region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect) -> Image:
+    """``noise`` with 5 octaves by default."""
+    return _noise_region(inputs, params, rect, octaves=5)
+
+
+def _linear_gradient_region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect) -> Image:
+    """Gradient along ``start`` -> ``end`` (canvas pixels) through ``stops``; ``spread`` beyond the ends."""
+    width, _ = _size_param(params)
+    sx, sy = _point_param(params, "start", (0.0, 0.0))
+    ex, ey = _point_param(params, "end", (float(width), 0.0))
+    dx, dy = ex - sx, ey - sy
+    length2 = dx * dx + dy * dy
+    if length2 == 0:
+        raise ValueError("linear_gradient start and end must differ")
+    x, y = pixel_centres(rect)
+    t = ((x - sx) * dx + (y - sy) * dy) / length2
+    return _ramp(_spread(t, str(params.get("spread", "pad"))), params)
+
+
+def _radial_gradient_region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect) -> Image:
+    """Gradient from ``center`` out to ``radius`` (canvas pixels) through ``stops``."""
+    width, height = _size_param(params)
+    cx, cy = _point_param(params, "center", (width / 2.0, height / 2.0))
+    radius = float(params.get("radius", min(width, height) / 2.0))
+    if radius <= 0:
+        raise ValueError(f"radius must be positive, got {radius}")
+    x, y = pixel_centres(rect)
+    t = np.sqrt((x - cx) ** 2 + (y - cy) ** 2) / radius
+    return _ramp(_spread(t, str(params.get("spread", "pad"))), params)
+
+
+def _checker_region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect) -> Image:
+    """Squares of ``cell`` pixels alternating ``color0`` (at the origin) and ``color1``."""
+    cell = int(params.get("cell", 16))
+    if cell <= 0:
+        raise ValueError(f"cell must be positive, got {cell}")
+    x, y, w, h = rect
+    cols = np.arange(x, x + w) // cell
+    rows = np.arange(y, y + h) // cell
+    odd = ((rows[:, None] + cols[None, :]) & 1).astype(bool)
+    colors = np.array([_rgba_param(params.get("color0", "#cccccc")), _rgba_param(params.get("color1", "#ffffff"))],
+                      dtype=np.uint8)
+    return colors[odd.astype(np.intp)]
+
+
+def _fill_path_region(inputs: Dict[str, Image], params: Dict[str, Any], rect: Rect) -> Image:
+    """``path`` (see ``vector.parse_path``) filled with ``color`` by ``rule``
+    (nonzero or evenodd), antialiased. Path coordinates are multiplied by
+    ``scale`` and moved by ``offset``, so a shape renders sharp at any size.
+    """
+    offset = _point_param(params, "offset", (0.0, 0.0))
+    coverage = rasterize(parse_path(params.get("path", [])), rect, float(params.get("scale", 1.0)), offset,
+                         str(params.get("rule", "nonzero")))
+    rgba = _rgba_param(params.get("color", "#000000"))
+    out = np.empty(coverage.shape + (4,), dtype=np.uint8)
+    out[..., :3] = rgba[:3]
+    out[..., 3] = np.floor(coverage * rgba[3] + 0.5)
+    return out
+
+
+for _name, _region in (
+    ("noise", _noise_region),
+    ("fbm", _fbm_region),
+    ("linear_gradient", _linear_gradient_region),
+    ("radial_gradient", _radial_gradient_region),
+    ("checker", _checker_region),
+    ("fill_path", _fill_path_region),
+):
+    register_node(_name, region=_region, size=_generator_size)(_whole(_region))
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+from .image import Rect
+
+
+# Gradient noise evaluated on whole coordinate arrays at once. Every value
+# depends only on its own (x, y) and the seed, and only exact IEEE operations
+# (+, *, floor, comparisons, table lookups) are used, so a pixel comes out
+# bit-identical whichever tile, or array shape, it is computed in.
+
+NoiseFn = Callable[[np.ndarray, np.ndarray, int], np.ndarray]
+
+# 2D gradient directions for Perlin noise (axes and diagonals)
+_GRAD_X = np.array([1.0, -1.0, 1.0, -1.0, 1.0, -1.0, 0.0, 0.0])
+_GRAD_Y = np.array([1.0, 1.0, -1.0, -1.0, 0.0, 0.0, 1.0, -1.0])
+# Simplex skew factors, and the usual output scale for 2D
+_F2 = 0.5 * (np.sqrt(3.0) - 1.0)
+_G2 = (3.0 - np.sqrt(3.0)) / 6.0
+_SIMPLEX_SCALE = 70.0
+
+
+@lru_cache(maxsize=64)
+def permutation(seed: int) -> np.ndarray:
+    """The 256-entry lattice hash for ``seed``, doubled so ``perm[a + b]`` never wraps."""
+    perm = np.random.default_rng(int(seed) & 0xFFFFFFFF).permutation(256).astype(np.intp)
+    table = np.concatenate([perm, perm])
+    table.setflags(write=False)
+    return table
+
+
+def _hash(perm: np.ndarray, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    return perm[perm[i & 255] + (j & 255)]
+
+
+def _fade(t: np.ndarray) -> np.ndarray:
+    return t * t * t * (t * (t * 6.0 - 15.0) + 10.0)
+
+
+def perlin(x: np.ndarray, y: np.ndarray, seed: int = 0) -> np.ndarray:
+    """Improved Perlin noise at (x, y) in lattice units; float64 in about [-1, 1]."""
+    perm = permutation(seed)
+    x0, y0 = np.floor(x), np.floor(y)
+    fx, fy = x - x0, y - y0
+    i, j = x0.astype(np.intp), y0.astype(np.intp)
+    u, v = _fade(fx), _fade(fy)
+
+    def corner(di: int, dj: int) -> np.ndarray:
+        g = _hash(perm, i + di, j + dj) & 7
+        return _GRAD_X[g] * (fx - di) + _GRAD_Y[g] * (fy - dj)
+
+    top = corner(0, 0) + u * (corner(1, 0) - corner(0, 0))
+    bottom = corner(0, 1) + u * (corner(1, 1) - corner(0, 1))
+    return top + v * (bottom - top)
+
+
+def simplex(x: np.ndarray, y: np.ndarray, seed: int = 0) -> np.ndarray:
+    """2D simplex noise at (x, y); float64 in about [-1, 1]."""
+    perm = permutation(seed)
+    s = (x + y) * _F2
+    i, j = np.floor(x + s), np.floor(y + s)
+    t = (i + j) * _G2
+    x0, y0 = x - (i - t), y - (j - t)
+    # Which triangle of the skewed cell: step in x first or in y first
+    i1 = (x0 > y0).astype(np.intp)
+    j1 = 1 - i1
+    x1, y1 = x0 - i1 + _G2, y0 - j1 + _G2
+    x2, y2 = x0 - 1.0 + 2.0 * _G2, y0 - 1.0 + 2.0 * _G2
+    ii, jj = i.astype(np.intp), j.astype(np.intp)
+
+    def contribution(cx: np.ndarray, cy: np.ndarray, di, dj) -> np.ndarray:
+        g = _hash(perm, ii + di, jj + dj) & 7
+        falloff = np.maximum(0.5 - cx * cx - cy * cy, 0.0)
+        falloff *= falloff
+        return falloff * falloff * (_GRAD_X[g] * cx + _GRAD_Y[g] * cy)
+
+    total = contribution(x0, y0, 0, 0) + contribution(x1, y1, i1, j1) + contribution(x2, y2, 1, 1)
+    return total * _SIMPLEX_SCALE
+
+
+NOISE_KINDS: Dict[str, NoiseFn] = {"perlin": perlin, "simplex": simplex}
+
+
+def fbm(
+    x: np.ndarray,
+    y: np.ndarray,
+    seed: int = 0,
+    kind: str = "perlin",
+    octaves: int = 5,
+    lacunarity: float = 2.0,
+    gain: float = 0.5,
+) -> np.ndarray:
+    """Fractal Brownian motion: ``octaves`` layers of noise, each ``lacunarity``
+    times finer and ``gain`` times weaker, normalised to about [-1, 1].
+    """
+    try:
+        noise = NOISE_KINDS[kind]
+    except KeyError:
+        raise ValueError(f"unknown noise kind: {kind!r} (expected one of {sorted(NOISE_KINDS)})") from None
+    if octaves < 1:
+        raise ValueError(f"octaves must be >= 1, got {octaves}")
+    total = np.zeros(np.broadcast(x, y).shape)
+    freq, amp, norm = 1.0, 1.0, 0.0
+    for octave in range(octaves):
+        # Each octave hashes with its own seed so octaves do not line up at the origin
+        total += amp * noise(x * freq, y * freq, seed + octave * 1013)
+        norm += amp
+        freq *= lacunarity
+        amp *= gain
+    return total / norm
+
+
+def pixel_centres(rect: Rect) -> Tuple[np.ndarray, np.ndarray]:
+    """Canvas coordinates of the pixel centres inside ``rect``, as broadcastable (1, w) and (h, 1)."""
+    x, y, w, h = rect
+    xs = np.arange(x, x + w, dtype=np.float64) + 0.5
+    ys = np.arange(y, y + h, dtype=np.float64) + 0.5
+    return xs[None, :], ys[:, None]
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set
+
+from .animation import has_animation
+from .graph import Graph, Node
+from .image import ConstantImage
+from .nodes import FUSABLE_OPS, _BUILTINS
+
+
+# Port whose image defines the output size; only composes reached through
+# these ports can be fused without changing where their output is clipped.
+_SIZE_PORT = {"compose": "a", "opacity": "image"}
+_PORTS = {"compose": ("a", "b"), "opacity": ("image",)}
+
+
+@dataclass
+class OptimizeResult:
+    graph: Graph
+    removed: List[str] = field(default_factory=list)  # unreachable from any root
+    folded: List[str] = field(default_factory=list)  # replaced by a solid_color
+    fused: Dict[str, List[str]] = field(default_factory=dict)  # head id -> absorbed ids
+
+
+def eliminate_dead(graph: Graph, roots: Iterable[str]) -> List[str]:
+    """Drop nodes no root depends on; returns the removed ids."""
+    live = set(graph.upstream(roots))
+    dead = sorted(nid for nid in graph.nodes if nid not in live)
+    for nid in dead:
+        del graph.nodes[nid]
+    return dead
+
+
+def fold_constants(graph: Graph) -> List[str]:
+    """Replace built-in nodes whose output is a constant with a single solid_color.
+
+    ``solid_color`` composed with ``solid_color`` (and opacity of a constant)
+    collapses into one node. Plugin nodes are never run at optimize time, and
+    neither are nodes that vary with the frame (keyframed or time-dependent).
+    """
+    consts: Dict[str, ConstantImage] = {}
+    folded: List[str] = []
+    for nid in graph.topo_order():
+        node = graph[nid]
+        ntype = _BUILTINS.get(node.type)
+        if ntype is None or ntype.time_dependent or has_animation(node.params):
+            continue
+        if not all(ref in consts for ref in node.inputs.values()):
+            continue
+        if not node.inputs and ntype.region is not None:
+            # Generators (noise, gradients) are never constant; don't render them here
+            continue
+        try:
+            out = ntype.fn({name: consts[ref] for name, ref in node.inputs.items()}, node.params)
+        except Exception:
+            # Leave broken nodes for the evaluator to report with context
+            continue
+        if not isinstance(out, ConstantImage):
+            continue
+        consts[nid] = out
+        if node.type != "solid_color":
+            graph.nodes[nid] = Node(
+                id=nid,
+                type="solid_color",
+                params={"width": out.width, "height": out.height, "color": list(out.rgba)},
+            )
+            folded.append(nid)
+    return folded
+
+
+def fuse(graph: Graph, roots: Iterable[str]) -> Dict[str, List[str]]:
+    """Collapse chains of per-pixel nodes into ``fused_pointwise`` nodes.
+
+    A node is absorbed into its consumer when that consumer is its only
+    reader and it is not a root (layer source). The fused node keeps the id
+    of the chain's last node, so references from outside stay valid.
+    Keyframed nodes are left unfused.
+    """
+    roots = set(roots)
+    uses: Dict[str, int] = {nid: 0 for nid in graph.nodes}
+    for node in graph.nodes.values():
+        for ref in node.inputs.values():
+            uses[ref] += 1
+
+    def absorbable(ref: str, on_spine: bool) -> bool:
+        node = graph[ref]
+        if node.type not in FUSABLE_OPS or uses[ref] != 1 or ref in roots or has_animation(node.params):
+            return False
+        return node.type == "opacity" or on_spine
+
+    absorbed: Set[str] = set()
+    fused: Dict[str, List[str]] = {}
+    for head in reversed(graph.topo_order()):
+        if head in absorbed or graph[head].type not in FUSABLE_OPS or has_animation(graph[head].params):
+            continue
+        if any(port not in graph[head].inputs for port in _PORTS[graph[head].type]):
+            continue
+        program: List[dict] = []
+        members: List[str] = []
+        leaves: Dict[str, str] = {}
+
+        def build(nid: str, on_spine: bool) -> str:
+            node = graph[nid]
+            args = []
+            for port in _PORTS[node.type]:
+                ref = node.inputs[port]
+                spine = on_spine and port == _SIZE_PORT[node.type]
+                if absorbable(ref, spine):
+                    args.append(build(ref, spine))
+                else:
+                    leaves.setdefault(ref, f"in{len(leaves)}")
+                    args.append(leaves[ref])
+            program.append({"op": node.type, "args": args, "params": copy.deepcopy(node.params)})
+            members.append(nid)
+            return f"${len(program) - 1}"
+
+        build(head, True)
+        if len(members) < 2:
+            continue
+        for nid in members:
+            if nid != head:
+                absorbed.add(nid)
+        fused[head] = [nid for nid in members if nid != head]
+        graph.nodes[head] = Node(
+            id=head,
+            type="fused_pointwise",
+            params={"program": program, "nodes": members},
+            inputs={name: ref for ref, name in leaves.items()},
+        )
+    for nid in absorbed:
+        del graph.nodes[nid]
+    return fused
+
+
+def optimize(graph: Graph, roots: Iterable[str], fuse_ops: bool = True) -> OptimizeResult:
+    """Return an optimized copy of ``graph`` for evaluating ``roots``.
+
+    Runs dead-node elimination, constant folding (then eliminates again, as
+    folding orphans the folded nodes' inputs) and per-pixel op fusion. The
+    input graph is left untouched; root ids keep their meaning.
+    """
+    roots = list(roots)
+    g = Graph(copy.deepcopy(node) for node in graph.nodes.values())
+    result = OptimizeResult(graph=g)
+    result.removed = eliminate_dead(g, roots)
+    result.folded = fold_constants(g)
+    result.removed += eliminate_dead(g, roots)
+    if fuse_ops:
+        result.fused = fuse(g, roots)
+    return result
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .image import Rect
+
+
+TRACE_FORMATS = ("chrome", "speedscope")
+
+
+@dataclass
+class ProfileEvent:
+    """One kernel run: a whole node, one of its tiles, or a named phase."""
+
+    name: str  # node id, or the phase name
+    kind: str  # node type, or "phase"
+    start: float  # seconds since the profiler was created
+    wall: float
+    cpu: float  # CPU time of the running thread
+    nbytes: int = 0  # bytes of the output produced
+    tile: Optional[Rect] = None
+    thread: int = 0
+
+
+@dataclass
+class NodeProfile:
+    node: str
+    type: str
+    runs: int = 0
+    tiles: int = 0
+    wall: float = 0.0  # inclusive: pulled upstream tiles run inside a tile's span
+    self_wall: float = 0.0  # excluding nested upstream work on the same thread
+    cpu: float = 0.0
+    nbytes: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class Profiler:
+    """Collects per-node timings from an ``Evaluator`` (pass ``profiler=``).
+
+    Thread-safe; events from worker threads keep their thread id so traces
+    show the scheduler's parallelism. Export with ``chrome_trace``,
+    ``speedscope`` or ``write``.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[ProfileEvent] = []
+        self.lookups: List[Tuple[float, str, bool, int]] = []  # (time, node, hit, thread)
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def clock(self) -> Tuple[float, float]:
+        """(wall, thread CPU) timestamps to hand back to ``record``."""
+        return time.perf_counter(), time.thread_time()
+
+    def record(
+        self,
+        name: str,
+        kind: str,
+        started: Tuple[float, float],
+        nbytes: int = 0,
+        tile: Optional[Rect] = None,
+    ) -> None:
+        wall, cpu = time.perf_counter() - started[0], time.thread_time() - started[1]
+        event = ProfileEvent(name, kind, started[0] - self._t0, wall, cpu, int(nbytes), tile, threading.get_ident())
+        with self._lock:
+            self.events.append(event)
+
+    def cache_lookup(self, node: str, hit: bool) -> None:
+        lookup = (time.perf_counter() - self._t0, node, hit, threading.get_ident())
+        with self._lock:
+            self.lookups.append(lookup)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time a phase that is not a node (e.g. compositing)."""
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.record(name, "phase", started)
+
+    # Reports
+
+    def summary(self) -> Dict[str, NodeProfile]:
+        """Per-node totals, slowest (by self time) first."""
+        with self._lock:
+            events = list(self.events)
+            lookups = list(self.lookups)
+        self_wall = _self_times(events)
+        out: Dict[str, NodeProfile] = {}
+        for i, ev in enumerate(events):
+            if ev.kind == "phase":
+                continue
+            prof = out.setdefault(ev.name, NodeProfile(ev.name, ev.kind))
+            prof.runs += ev.tile is None
+            prof.tiles += ev.tile is not None
+            prof.wall += ev.wall
+            prof.self_wall += self_wall[i]
+            prof.cpu += ev.cpu
+            prof.nbytes += ev.nbytes
+        for _, node, hit, _ in lookups:
+            prof = out.setdefault(node, NodeProfile(node, ""))
+            if hit:
+                prof.cache_hits += 1
+            else:
+                prof.cache_misses += 1
+        return dict(sorted(out.items(), key=lambda kv: kv[1].self_wall, reverse=True))
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Chrome ``trace_event`` JSON (chrome://tracing, Perfetto)."""
+        with self._lock:
+            events = list(self.events)
+            lookups = list(self.lookups)
+        trace: List[Dict[str, Any]] = []
+        for ev in events:
+            args: Dict[str, Any] = {"cpu_ms": ev.cpu * 1e3, "bytes": ev.nbytes}
+            if ev.tile is not None:
+                args["tile"] = list(ev.tile)
+            trace.append({
+                "name": ev.name, "cat": ev.kind, "ph": "X", "pid": 1, "tid": ev.thread,
+                "ts": ev.start * 1e6, "dur": ev.wall * 1e6, "args": args,
+            })
+        for at, node, hit, thread in lookups:
+            trace.append({
+                "name": "cache hit" if hit else "cache miss", "cat": "cache", "ph": "i", "s": "t",
+                "pid": 1, "tid": thread, "ts": at * 1e6, "args": {"node": node},
+            })
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def speedscope(self, name: str = "vx profile") -> Dict[str, Any]:
+        """speedscope evented profile, one per thread (https://www.speedscope.app)."""
+        with self._lock:
+            events = list(self.events)
+        frames: Dict[str, int] = {}
+        profiles = []
+        for thread in sorted({ev.thread for ev in events}):
+            mine = sorted((ev for ev in events if ev.thread == thread), key=lambda e: (e.start, -e.wall))
+            opened: List[Tuple[float, int]] = []
+            timeline: List[Dict[str, Any]] = []
+            for ev in mine:
+                while opened and opened[-1][0] <= ev.start:
+                    end, frame = opened.pop()
+                    timeline.append({"type": "C", "frame": frame, "at": end * 1e3})
+                frame = frames.setdefault(f"{ev.name} ({ev.kind})", len(frames))
+                timeline.append({"type": "O", "frame": frame, "at": ev.start * 1e3})
+                # Clamp so a child never outlives its parent (clock jitter)
+                end = ev.start + ev.wall
+                if opened:
+                    end = min(end, opened[-1][0])
+                opened.append((end, frame))
+            while opened:
+                end, frame = opened.pop()
+                timeline.append({"type": "C", "frame": frame, "at": end * 1e3})
+            profiles.append({
+                "type": "evented", "name": f"{name} (thread {thread})", "unit": "milliseconds",
+                "startValue": timeline[0]["at"], "endValue": timeline[-1]["at"], "events": timeline,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "shared": {"frames": [{"name": n} for n in frames]},
+            "profiles": profiles,
+        }
+
+    def write(self, path: Path, fmt: str = "chrome") -> None:
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"unsupported trace format: {fmt} (expected one of {TRACE_FORMATS})")
+        data = self.chrome_trace() if fmt == "chrome" else self.speedscope(Path(path).stem)
+        Path(path).write_text(json.dumps(data), encoding="utf-8")
+
+
+def _self_times(events: List[ProfileEvent]) -> List[float]:
+    # Upstream tiles pulled by a tile run nested inside it on the same thread
+    self_wall = [ev.wall for ev in events]
+    by_thread: Dict[int, List[int]] = {}
+    for i, ev in enumerate(events):
+        by_thread.setdefault(ev.thread, []).append(i)
+    for idx in by_thread.values():
+        idx.sort(key=lambda i: (events[i].start, -events[i].wall))
+        stack: List[int] = []
+        for i in idx:
+            while stack and events[stack[-1]].start + events[stack[-1]].wall <= events[i].start:
+                stack.pop()
+            if stack:
+                self_wall[stack[-1]] -= events[i].wall
+            stack.append(i)
+    return [max(0.0, w) for w in self_wall]
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cache import NodeCache
+from .compositor import CompositeStats, LayerInput, composite
+from .document import Document
+from .evaluator import Evaluator
+from .formats import format_dtype
+from .graph import Graph
+from .image import Rect, size_of
+from .nodes import resolve_node_type
+from .optimizer import optimize as optimize_graph
+from .profiler import Profiler
+from .sweep import SweepPlan, Variant, plan_sweep
+from .tiles import TILE_SIZE
+
+
+def document_layers(doc: Document, evaluator: Evaluator) -> List[LayerInput]:
+    """Evaluate the source node of every visible layer, bottom-most first."""
+    visible = [layer for layer in doc.layers if layer.visible]
+    outputs = evaluator.evaluate([layer.source_node for layer in visible])
+    return [LayerInput(outputs[layer.source_node], layer.opacity, layer.blend) for layer in visible]
+
+
+def lazy_document_layers(doc: Document, evaluator: Evaluator, tile_size: int = TILE_SIZE) -> List[LayerInput]:
+    """Like ``document_layers`` but with lazy, tile-on-demand layer images."""
+    return [
+        LayerInput(evaluator.view(layer.source_node, tile_size), layer.opacity, layer.blend)
+        for layer in doc.layers
+        if layer.visible
+    ]
+
+
+def canvas_size(layers: List[LayerInput]) -> Tuple[int, int]:
+    """The flattened canvas covers every layer, anchored at the origin."""
+    sizes = [size_of(layer.image) for layer in layers]
+    if not sizes:
+        return 0, 0
+    return max(w for w, _ in sizes), max(h for _, h in sizes)
+
+
+def render_document(
+    doc: Document,
+    evaluator: Optional[Evaluator] = None,
+    rect: Optional[Rect] = None,
+    tile_size: int = TILE_SIZE,
+    stats: Optional[CompositeStats] = None,
+    optimize: bool = False,
+) -> np.ndarray:
+    """Flatten ``doc``'s layer stack (opacity and blend from layers/*.json) to RGBA8.
+
+    With ``optimize`` (and no ``evaluator``), the graph first goes through
+    ``optimizer.optimize``; fused kernels round differently, so pixels may
+    differ from an unoptimized render by one level.
+    """
+    if evaluator is None:
+        graph = doc.graph
+        if optimize:
+            graph = optimize_graph(graph, [layer.source_node for layer in doc.layers if layer.visible]).graph
+        evaluator = Evaluator(graph)
+    layers = document_layers(doc, evaluator)
+    width, height = canvas_size(layers)
+    if width == 0:
+        raise ValueError(f"document has no visible layers: {doc.path}")
+    return composite(
+        layers, width, height, rect=rect, tile_size=tile_size, scheduler=evaluator.scheduler, stats=stats
+    )
+
+
+def render_frames(
+    doc: Document,
+    frames: Iterable[float],
+    evaluator: Optional[Evaluator] = None,
+    rect: Optional[Rect] = None,
+    tile_size: int = TILE_SIZE,
+    stats: Optional[CompositeStats] = None,
+) -> Iterator[Tuple[float, np.ndarray]]:
+    """``render_document`` for each of ``frames``; yields ``(frame, pixels)``.
+
+    One evaluator serves every frame, so nodes that do not vary with time
+    (see ``Evaluator.set_frame``) are evaluated for the first frame only.
+    """
+    evaluator = evaluator if evaluator is not None else Evaluator(doc.graph)
+    for frame in frames:
+        evaluator.set_frame(frame)
+        yield frame, render_document(doc, evaluator, rect=rect, tile_size=tile_size, stats=stats)
+
+
+def sweep_plan(doc: Document, variants: Sequence[Variant]) -> SweepPlan:
+    """``plan_sweep`` over everything ``doc``'s layers read."""
+    return plan_sweep(doc.graph, variants, [layer.source_node for layer in doc.layers])
+
+
+def render_sweep(
+    doc: Document,
+    variants: Sequence[Variant],
+    cache=None,
+    scheduler=None,
+    rect: Optional[Rect] = None,
+    tile_size: int = TILE_SIZE,
+    stats: Optional[CompositeStats] = None,
+) -> Iterator[Tuple[Variant, np.ndarray]]:
+    """Render every variant of ``doc``; yields ``(variant, pixels)`` in order.
+
+    All variants are evaluated from one ``sweep.SweepPlan`` by one evaluator,
+    so nodes the swept params do not reach are computed once. Nodes only a
+    finished variant used are released before the next one renders.
+    """
+    plan = sweep_plan(doc, variants)
+    evaluator = Evaluator(plan.graph, cache=cache, scheduler=scheduler)
+    for i, variant in enumerate(variants):
+        pixels = render_document(plan.variant_document(doc, i), evaluator, rect=rect, tile_size=tile_size, stats=stats)
+        evaluator.release(plan.done_after(i))
+        yield variant, pixels
+
+
+def profile_document(doc: Document, scheduler=None, tile_size: int = TILE_SIZE) -> Profiler:
+    """Render ``doc`` once with a ``Profiler`` attached; compositing shows up as a phase.
+
+    Layers are read tile by tile through a ``NodeCache``, as an export
+    reads them, so every tile run and cache lookup is recorded. Nodes
+    without a region kernel run whole in the "evaluate" phase; tiles run
+    as compositing pulls them.
+    """
+    profiler = Profiler()
+    evaluator = Evaluator(doc.graph, cache=NodeCache(), scheduler=scheduler, profiler=profiler)
+    with profiler.span("evaluate"):
+        layers = lazy_document_layers(doc, evaluator, tile_size)
+    width, height = canvas_size(layers)
+    if width == 0:
+        raise ValueError(f"document has no visible layers: {doc.path}")
+    with profiler.span("composite"):
+        composite(layers, width, height, tile_size=tile_size, scheduler=scheduler)
+    return profiler
+
+
+def pixel_bytes(graph: Graph) -> int:
+    """Bytes per pixel of the widest format any node of ``graph`` produces."""
+    widest = 4
+    for nid in graph.topo_order():
+        try:
+            widest = max(widest, format_dtype(resolve_node_type(graph[nid].type).format).itemsize * 4)
+        except KeyError:
+            continue  # unknown types are reported when evaluated
+    return widest
+
+
+def band_budget(width: int, nodes: int, tile_size: int = TILE_SIZE, bytes_per_pixel: int = 4) -> int:
+    """Cache budget for two rows of tiles per node across a ``width`` canvas.
+
+    Enough to keep a band's tiles (and halo neighbours from the band above)
+    while older rows are evicted, so tile memory does not grow with height.
+    ``bytes_per_pixel`` is that of the widest tile format in the graph.
+    """
+    return 2 * width * tile_size * bytes_per_pixel * max(nodes, 1)
+
+
+def render_bands(
+    layers: Sequence[LayerInput],
+    width: int,
+    height: int,
+    band_height: int = TILE_SIZE,
+    tile_size: int = TILE_SIZE,
+    scheduler=None,
+    stats: Optional[CompositeStats] = None,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """Composite the canvas as horizontal bands, top first; yields ``(y, band)``.
+
+    Only one band's pixels exist at a time; with lazy layers (see
+    ``lazy_document_layers``) only the tiles a band touches are evaluated.
+    """
+    if band_height <= 0:
+        raise ValueError(f"band_height must be positive, got {band_height}")
+    for y in range(0, height, band_height):
+        rect = (0, y, width, min(band_height, height - y))
+        yield y, composite(layers, width, height, rect=rect, tile_size=tile_size, scheduler=scheduler, stats=stats)
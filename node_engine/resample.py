@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .image import Rect
+
+
+# Separable resampling. A transform is a chain of 1D passes, each along one
+# axis; a pass maps an output rect to the source rect it reads, so a tile of
+# the result only reads (and computes) the source pixels it needs. Weight
+# tables depend only on the filter and the transform, never on the pixels,
+# and are cached, so every row, tile and frame reuses the same tables.
+#
+# Pixels are premultiplied float RGBA (see ``formats``) throughout; pixel
+# centres sit at integer + 0.5 as in ``noise.pixel_centres``.
+
+KernelFn = Callable[[np.ndarray], np.ndarray]
+ReadFn = Callable[[Rect], np.ndarray]
+
+
+@dataclass(frozen=True)
+class Filter:
+    name: str
+    support: float  # kernel radius in source pixels at scale 1
+    fn: KernelFn
+
+
+def _box(x: np.ndarray) -> np.ndarray:
+    return ((x > -0.5) & (x <= 0.5)).astype(np.float64)
+
+
+def _triangle(x: np.ndarray) -> np.ndarray:
+    return np.maximum(1.0 - np.abs(x), 0.0)
+
+
+def _bicubic(x: np.ndarray) -> np.ndarray:
+    # Keys cubic convolution with a = -0.5 (Catmull-Rom)
+    x = np.abs(x)
+    near = (1.5 * x - 2.5) * x * x + 1.0
+    far = ((-0.5 * x + 2.5) * x - 4.0) * x + 2.0
+    return np.where(x < 1.0, near, np.where(x < 2.0, far, 0.0))
+
+
+def _lanczos3(x: np.ndarray) -> np.ndarray:
+    return np.where(np.abs(x) < 3.0, np.sinc(x) * np.sinc(x / 3.0), 0.0)
+
+
+FILTERS: Dict[str, Filter] = {
+    f.name: f
+    for f in (
+        Filter("box", 0.5, _box),
+        Filter("bilinear", 1.0, _triangle),
+        Filter("bicubic", 2.0, _bicubic),
+        Filter("lanczos", 3.0, _lanczos3),
+    )
+}
+# Source coordinates outside the image either repeat the edge pixel or read transparent
+EDGE_MODES = ("clamp", "transparent")
+# Sub-pixel positions a shear can sample at; shifts are rounded to 1/PHASES of a pixel
+PHASES = 64
+
+
+def _kernel(filt: Filter, x: np.ndarray) -> np.ndarray:
+    weight = filt.fn(x)
+    # sinc is only approximately zero at integers; keep exact shifts exact
+    weight[np.abs(weight) < 1e-9] = 0.0
+    return weight
+
+
+def get_filter(name: str) -> Filter:
+    try:
+        return FILTERS[name]
+    except KeyError:
+        raise ValueError(f"unknown filter: {name!r} (expected one of {sorted(FILTERS)})") from None
+
+
+@dataclass(frozen=True)
+class WeightTable:
+    """Taps of a 1D resample: output pixel ``o`` is ``sum(weight[o] * src[index[o]])``."""
+
+    index: np.ndarray  # (out, taps) source pixel indices
+    weight: np.ndarray  # (out, taps) float32, each row sums to 1
+
+    def span(self, start: int, stop: int) -> Tuple[int, int]:
+        """Source index range [lo, hi) read by output pixels [start, stop)."""
+        index = self.index[start:stop]
+        return int(index.min()), int(index.max()) + 1
+
+
+@lru_cache(maxsize=256)
+def axis_weights(
+    filter: str, in_size: int, out_size: int, scale: float, offset: float = 0.0, edge: str = "clamp"
+) -> WeightTable:
+    """Weights for the 1D map ``out = in * scale + offset`` (pixel edges; ``scale`` may be negative).
+
+    Minifying widens the kernel by ``1 / |scale|`` so every source pixel
+    contributes (antialiasing). With ``edge="clamp"`` indices are clamped
+    into ``[0, in_size)``; otherwise they may fall outside and read whatever
+    the caller's ``read`` returns there (transparent for node inputs).
+    """
+    filt = get_filter(filter)
+    if edge not in EDGE_MODES:
+        raise ValueError(f"unknown edge mode: {edge!r} (expected one of {EDGE_MODES})")
+    if scale == 0:
+        raise ValueError("scale must be non-zero")
+    stretch = max(1.0, 1.0 / abs(scale))
+    support = filt.support * stretch
+    centre = (np.arange(out_size) + 0.5 - offset) / scale - 0.5
+    taps = int(math.ceil(2.0 * support)) + 1
+    index = np.floor(centre - support).astype(np.intp)[:, None] + 1 + np.arange(taps)
+    weight = _kernel(filt, (index - centre[:, None]) / stretch)
+    total = weight.sum(axis=1, keepdims=True)
+    weight /= np.where(total == 0.0, 1.0, total)
+    if edge == "clamp":
+        index = np.clip(index, 0, in_size - 1)
+    for arr in (index, weight):
+        arr.setflags(write=False)
+    return WeightTable(index, weight.astype(np.float32))
+
+
+@lru_cache(maxsize=16)
+def phase_weights(filter: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Polyphase taps for sub-pixel shifts: (tap offsets, weights of shape (PHASES, taps)).
+
+    Row ``q`` samples at ``q / PHASES`` of a pixel past the tap at offset 0.
+    """
+    filt = get_filter(filter)
+    reach = int(math.ceil(filt.support))
+    offsets = np.arange(1 - reach, reach + 1)
+    weight = _kernel(filt, offsets[None, :] - np.arange(PHASES)[:, None] / PHASES)
+    weight /= weight.sum(axis=1, keepdims=True)
+    weight = weight.astype(np.float32)
+    for arr in (offsets, weight):
+        arr.setflags(write=False)
+    return offsets, weight
+
+
+def _swap(rect: Rect) -> Rect:
+    x, y, w, h = rect
+    return y, x, h, w
+
+
+@dataclass(frozen=True)
+class AxisPass:
+    """Resample along ``axis`` (1 = x, 0 = y) by a fixed weight table indexed by output position."""
+
+    axis: int
+    table: WeightTable
+
+    def source_rect(self, rect: Rect) -> Rect:
+        r = rect if self.axis == 1 else _swap(rect)
+        lo, hi = self.table.span(r[0], r[0] + r[2])
+        src = (lo, r[1], hi - lo, r[3])
+        return src if self.axis == 1 else _swap(src)
+
+    def apply(self, src: np.ndarray, src_rect: Rect, rect: Rect) -> np.ndarray:
+        if self.axis == 0:
+            return self._apply_x(src.transpose(1, 0, 2), _swap(src_rect), _swap(rect)).transpose(1, 0, 2)
+        return self._apply_x(src, src_rect, rect)
+
+    def _apply_x(self, src: np.ndarray, src_rect: Rect, rect: Rect) -> np.ndarray:
+        x, _, w, h = rect
+        index = self.table.index[x:x + w] - src_rect[0]
+        weight = self.table.weight[x:x + w]
+        out = np.zeros((h, w, 4), dtype=np.float32)
+        for k in range(index.shape[1]):
+            out += weight[None, :, k, None] * src[:, index[:, k]]
+        return out
+
+
+@dataclass(frozen=True)
+class ShearPass:
+    """Shift each line along ``axis`` by ``factor * (v - centre)``, ``v`` the pixel centre across it.
+
+    The fractional part of each line's shift picks a row of ``phase_weights``,
+    so all lines share one small table whatever the angle.
+    """
+
+    axis: int
+    factor: float
+    centre: float
+    filter: str
+
+    def _steps(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Integer source offset and phase row of each line in [start, stop)
+        pos = -self.factor * (np.arange(start, stop) + 0.5 - self.centre)
+        scaled = np.floor(pos * PHASES + 0.5).astype(np.int64)
+        return scaled // PHASES, scaled % PHASES
+
+    def source_rect(self, rect: Rect) -> Rect:
+        r = rect if self.axis == 1 else _swap(rect)
+        whole, _ = self._steps(r[1], r[1] + r[3])
+        offsets, _ = phase_weights(self.filter)
+        lo = r[0] + int(whole.min()) + int(offsets[0])
+        hi = r[0] + r[2] + int(whole.max()) + int(offsets[-1])
+        src = (lo, r[1], hi - lo, r[3])
+        return src if self.axis == 1 else _swap(src)
+
+    def apply(self, src: np.ndarray, src_rect: Rect, rect: Rect) -> np.ndarray:
+        if self.axis == 0:
+            return self._apply_x(src.transpose(1, 0, 2), _swap(src_rect), _swap(rect)).transpose(1, 0, 2)
+        return self._apply_x(src, src_rect, rect)
+
+    def _apply_x(self, src: np.ndarray, src_rect: Rect, rect: Rect) -> np.ndarray:
+        x, y, w, h = rect
+        whole, phase = self._steps(y, y + h)
+        offsets, table = phase_weights(self.filter)
+        rows = np.arange(h)[:, None]
+        cols = (np.arange(x, x + w) - src_rect[0])[None, :] + whole[:, None]
+        weight = table[phase]
+        out = np.zeros((h, w, 4), dtype=np.float32)
+        for k, offset in enumerate(offsets):
+            out += weight[:, k, None, None] * src[rows, cols + offset]
+        return out
+
+
+Pass = Union[AxisPass, ShearPass]
+
+
+def run_passes(passes: Sequence[Pass], read: ReadFn, rect: Rect) -> np.ndarray:
+    """Pixels of ``rect`` after applying ``passes`` (first to last) to the image ``read`` gives.
+
+    Only the source rect the chain needs is read, and each intermediate is
+    computed only over what the next pass reads. Results are clamped to
+    valid premultiplied values (negative lobes can over- and undershoot).
+    """
+    rects: List[Rect] = [rect]
+    for p in reversed(passes):
+        rects.append(p.source_rect(rects[-1]))
+    rects.reverse()
+    pixels = np.array(read(rects[0]), dtype=np.float32)
+    for p, src_rect, out_rect in zip(passes, rects, rects[1:]):
+        pixels = p.apply(pixels, src_rect, out_rect)
+    np.clip(pixels[..., 3:], 0.0, 1.0, out=pixels[..., 3:])
+    np.clip(pixels[..., :3], 0.0, pixels[..., 3:], out=pixels[..., :3])
+    return pixels
+
+
+def scale_passes(
+    in_size: Tuple[int, int], out_size: Tuple[int, int], filter: str, edge: str = "clamp"
+) -> List[Pass]:
+    """Stretch ``in_size`` (w, h) onto ``out_size``, edges to edges."""
+    (iw, ih), (ow, oh) = in_size, out_size
+    return [
+        AxisPass(1, axis_weights(filter, iw, ow, ow / iw, 0.0, edge)),
+        AxisPass(0, axis_weights(filter, ih, oh, oh / ih, 0.0, edge)),
+    ]
+
+
+def translate_passes(size: Tuple[int, int], dx: float, dy: float, filter: str) -> List[Pass]:
+    """Move by (dx, dy) pixels, sub-pixel amounts resampled; uncovered pixels are transparent."""
+    w, h = size
+    return [
+        AxisPass(1, axis_weights(filter, w, w, 1.0, float(dx), "transparent")),
+        AxisPass(0, axis_weights(filter, h, h, 1.0, float(dy), "transparent")),
+    ]
+
+
+def rotate_passes(size: Tuple[int, int], degrees: float, centre: Tuple[float, float], filter: str) -> List[Pass]:
+    """Rotate clockwise (on screen) about ``centre`` by three shears (Paeth).
+
+    Shears degrade past 90 degrees, so larger angles rotate by the
+    remainder and then flip both axes (an exact 180 degree turn).
+    """
+    angle = math.remainder(float(degrees), 360.0)
+    flip = abs(angle) > 90.0
+    if flip:
+        angle -= math.copysign(180.0, angle)
+    cx, cy = centre
+    passes: List[Pass] = []
+    if angle != 0.0:
+        theta = math.radians(angle)
+        alpha, beta = -math.tan(theta / 2.0), math.sin(theta)
+        passes += [ShearPass(1, alpha, cy, filter), ShearPass(0, beta, cx, filter), ShearPass(1, alpha, cy, filter)]
+    if flip:
+        w, h = size
+        passes += [
+            AxisPass(1, axis_weights(filter, w, w, -1.0, 2.0 * cx, "transparent")),
+            AxisPass(0, axis_weights(filter, h, h, -1.0, 2.0 * cy, "transparent")),
+        ]
+    return passes
+
+
+def mipmaps(
+    pixels: np.ndarray, filter: str = "box", levels: Optional[int] = None
+) -> List[np.ndarray]:
+    """Successive half-size copies of premultiplied float ``pixels``, down to 1x1.
+
+    Level 0 is ``pixels`` itself; odd sizes round up. ``levels`` caps how
+    many levels (including level 0) are returned.
+    """
+    chain = [pixels]
+    while levels is None or len(chain) < levels:
+        h, w = chain[-1].shape[:2]
+        if w == 1 and h == 1:
+            break
+        size = (max(1, (w + 1) // 2), max(1, (h + 1) // 2))
+        src = chain[-1]
+        chain.append(run_passes(scale_passes((w, h), size, filter), lambda r: _crop(src, r), (0, 0, *size)))
+    return chain
+
+
+def _crop(pixels: np.ndarray, rect: Rect) -> np.ndarray:
+    x, y, w, h = rect
+    return pixels[y:y + h, x:x + w].astype(np.float32, copy=False)
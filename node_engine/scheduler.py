@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, TypeVar
+
+from .image import Image, materialize
+from .nodes import NodeFn, NodeType, RegionFn, halo_region, run_entrypoint
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+class Scheduler:
+    """Runs independent nodes and tiles concurrently.
+
+    Kernels run on a thread pool of ``max_workers`` threads; NumPy releases
+    the GIL inside its loops, so vectorized kernels scale across cores.
+    Plugin nodes registered with ``"parallel": "process"`` run in a pool of
+    ``process_workers`` processes instead (0 keeps them on threads).
+
+    Results never depend on completion order: callers get results back in
+    submission order and the DAG runner hands each result to ``done`` on the
+    calling thread.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, process_workers: int = 0) -> None:
+        self.max_workers = max(1, int(max_workers) if max_workers else default_workers())
+        self.process_workers = max(0, int(process_workers))
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "Scheduler":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._threads is not None:
+                self._threads.shutdown(wait=True)
+                self._threads = None
+            if self._processes is not None:
+                self._processes.shutdown(wait=True)
+                self._processes = None
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="vx-eval")
+            return self._threads
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self.process_workers)
+            return self._processes
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """``[fn(x) for x in items]`` on the thread pool, results in input order."""
+        items = list(items)
+        if self.max_workers == 1 or len(items) <= 1:
+            return [fn(x) for x in items]
+        return list(self._thread_pool().map(fn, items))
+
+    def run_dag(
+        self,
+        nodes: List[str],
+        deps: Mapping[str, Iterable[str]],
+        start: Callable[[str], Callable[[], T]],
+        done: Callable[[str, T], None],
+    ) -> None:
+        """Run ``nodes`` as soon as their ``deps`` (within ``nodes``) have finished.
+
+        ``start(nid)`` is called on this thread to build the task (so it can
+        snapshot inputs), the task runs on the pool, and ``done(nid, result)``
+        is called back on this thread. The first failure cancels what has not
+        started yet and is re-raised.
+        """
+        members = set(nodes)
+        waiting: Dict[str, Set[str]] = {nid: set(deps.get(nid, ())) & members for nid in nodes}
+        consumers: Dict[str, List[str]] = {nid: [] for nid in nodes}
+        for nid, ds in waiting.items():
+            for d in ds:
+                consumers[d].append(nid)
+        rank = {nid: i for i, nid in enumerate(nodes)}
+
+        if self.max_workers == 1:
+            for nid in nodes:
+                done(nid, start(nid)())
+            return
+
+        pool = self._thread_pool()
+        running: Dict[Future, str] = {}
+
+        def submit_ready(candidates: Iterable[str]) -> None:
+            for nid in sorted(candidates, key=rank.__getitem__):
+                running[pool.submit(start(nid))] = nid
+
+        submit_ready(nid for nid, ds in waiting.items() if not ds)
+        try:
+            while running:
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                released: List[str] = []
+                for fut in sorted(finished, key=lambda f: rank[running[f]]):
+                    nid = running.pop(fut)
+                    done(nid, fut.result())
+                    for c in consumers[nid]:
+                        waiting[c].discard(nid)
+                        if not waiting[c]:
+                            released.append(c)
+                submit_ready(released)
+        except BaseException:
+            for fut in running:
+                fut.cancel()
+            wait(list(running))
+            raise
+
+    def kernel(self, ntype: NodeType) -> NodeFn:
+        """The function to call for ``ntype``: isolated plugins go to the process pool."""
+        if not (ntype.isolated and ntype.entrypoint and self.process_workers):
+            return ntype.fn
+        entrypoint = ntype.entrypoint
+
+        def call(inputs: Dict[str, Image], params: Dict[str, Any]) -> Image:
+            arrays = {k: materialize(v) for k, v in inputs.items()}
+            return self._process_pool().submit(run_entrypoint, entrypoint, arrays, dict(params)).result()
+
+        return call
+
+    def region_kernel(self, ntype: NodeType) -> Optional[RegionFn]:
+        if ntype.region is None or not (ntype.isolated and self.process_workers and ntype.halo):
+            return ntype.region
+        return halo_region(self.kernel(ntype), ntype.halo)
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import itertools
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence, Set, Tuple
+
+from .cache import params_hash
+from .document import Document
+from .graph import Graph, GraphError, Node
+
+
+# node id -> params merged over that node's own params
+Overrides = Dict[str, Dict[str, Any]]
+
+
+class SweepError(ValueError):
+    """A sweep file or variant is malformed."""
+
+
+@dataclass
+class Variant:
+    name: str
+    overrides: Overrides = field(default_factory=dict)
+
+
+def _overrides(data: Any, where: str) -> Overrides:
+    if not isinstance(data, dict) or not all(isinstance(v, dict) for v in data.values()):
+        raise SweepError(f"{where}: params must map node ids to param objects")
+    return {str(nid): dict(params) for nid, params in data.items()}
+
+
+def product_variants(axes: Mapping[str, Sequence[Any]]) -> List[Variant]:
+    """Every combination of ``{"node.param": [values, ...], ...}``, first axis slowest."""
+    keys = []
+    for key, values in axes.items():
+        nid, dot, param = key.rpartition(".")
+        if not dot or not nid or not param:
+            raise SweepError(f"product axis {key!r} must be 'node.param'")
+        if not isinstance(values, list) or not values:
+            raise SweepError(f"product axis {key!r} must be a non-empty list")
+        keys.append((nid, param))
+    variants = []
+    for combo in itertools.product(*axes.values()):
+        overrides: Overrides = {}
+        for (nid, param), value in zip(keys, combo):
+            overrides.setdefault(nid, {})[param] = value
+        variants.append(Variant("", overrides))
+    return variants
+
+
+def parse_sweep(data: Any) -> List[Variant]:
+    """Variants from a sweep description.
+
+    Either a list of variants or an object with ``variants`` and/or
+    ``product``. A variant is ``{"name": ..., "params": {node: {param: v}}}``;
+    ``product`` maps ``"node.param"`` to a list of values and expands to
+    every combination. Unnamed variants are named by their position.
+    """
+    if isinstance(data, list):
+        data = {"variants": data}
+    if not isinstance(data, dict):
+        raise SweepError("sweep must be a list of variants or an object")
+    unknown = set(data) - {"variants", "product"}
+    if unknown:
+        raise SweepError(f"unknown sweep keys: {sorted(unknown)}")
+    variants = []
+    for i, item in enumerate(data.get("variants") or []):
+        if not isinstance(item, dict):
+            raise SweepError(f"variant {i}: expected an object")
+        variants.append(Variant(str(item.get("name", "")), _overrides(item.get("params", {}), f"variant {i}")))
+    if "product" in data:
+        if not isinstance(data["product"], dict):
+            raise SweepError("product must map 'node.param' to lists of values")
+        variants += product_variants(data["product"])
+    if not variants:
+        raise SweepError("sweep has no variants")
+    width = len(str(len(variants)))
+    variants = [v if v.name else dataclasses.replace(v, name=f"{i:0{width}d}") for i, v in enumerate(variants)]
+    names = [v.name for v in variants]
+    bad = [n for n in names if "/" in n or "\\" in n or n in (".", "..")]
+    if bad:
+        raise SweepError(f"variant names are used in file names: {bad}")
+    dupes = sorted({n for n in names if names.count(n) > 1})
+    if dupes:
+        raise SweepError(f"duplicate variant names: {dupes}")
+    return variants
+
+
+def load_sweep(path: Path) -> List[Variant]:
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except json.JSONDecodeError as exc:
+        raise SweepError(f"{path}: invalid JSON: {exc}") from None
+    return parse_sweep(data)
+
+
+@dataclass
+class SweepPlan:
+    """One graph answering every variant; ``nodes[i]`` maps original ids to plan ids for variant ``i``.
+
+    A node is cloned only for the distinct sets of overrides that reach it,
+    so anything upstream of (or unaffected by) the swept params exists once,
+    and variants that agree on everything a node depends on share its clone.
+    """
+
+    graph: Graph
+    nodes: List[Dict[str, str]]
+    users: Dict[str, Set[int]]  # plan id -> variants that read it
+
+    def variant_document(self, doc: Document, index: int) -> Document:
+        """``doc`` with its layers pointed at variant ``index``'s nodes in the plan graph."""
+        mapping = self.nodes[index]
+        layers = [dataclasses.replace(layer, source_node=mapping[layer.source_node]) for layer in doc.layers]
+        return Document(doc.path, doc.manifest, self.graph, layers)
+
+    def done_after(self, index: int) -> List[str]:
+        """Plan nodes of variant ``index`` that no later variant reads."""
+        return [pid for pid in set(self.nodes[index].values()) if max(self.users[pid]) <= index]
+
+    def reread(self, roots: Sequence[str]) -> Set[str]:
+        """Plan nodes a later variant reads again after the first variant using them.
+
+        These are the inputs of nodes a later variant is first to use, and
+        the plan nodes for ``roots`` (original ids) when an earlier variant
+        already computed them. Keeping their outputs until ``done_after``
+        lists them is enough for every shared node to be evaluated once.
+        """
+        first = {pid: min(users) for pid, users in self.users.items()}
+        out = {m[root] for i, m in enumerate(self.nodes) for root in roots if first[m[root]] < i}
+        for pid, consumers in self.graph.consumers().items():
+            if any(first[c] > first[pid] for c in consumers):
+                out.add(pid)
+        return out
+
+    @property
+    def naive_nodes(self) -> int:
+        """Nodes independent renders of every variant would evaluate."""
+        return sum(len(m) for m in self.nodes)
+
+
+def plan_sweep(graph: Graph, variants: Sequence[Variant], roots: Sequence[str]) -> SweepPlan:
+    """Merge the variants of ``graph`` (restricted to what ``roots`` need) into one plan."""
+    order = graph.topo_order(roots)
+    for v in variants:
+        missing = sorted(nid for nid in v.overrides if nid not in graph)
+        if missing:
+            raise GraphError(f"variant {v.name}: unknown nodes: {missing}")
+    plan = Graph()
+    users: Dict[str, Set[int]] = {}
+    mappings: List[Dict[str, str]] = []
+    for index, variant in enumerate(variants):
+        mapping: Dict[str, str] = {}
+        sigs: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+        for nid in order:
+            node = graph[nid]
+            params = node.params
+            own: Tuple[Tuple[str, str], ...] = ()
+            if nid in variant.overrides:
+                merged = {**node.params, **variant.overrides[nid]}
+                if merged != node.params:
+                    params = merged
+                    own = ((nid, params_hash(merged)),)
+            # The overrides a node's output depends on: its own plus its inputs'
+            sig = tuple(sorted(set(own).union(*(sigs[ref] for ref in node.inputs.values()))))
+            sigs[nid] = sig
+            pid = nid if not sig else f"{nid}~{_digest(sig)}"
+            if pid not in plan:
+                inputs = {name: mapping[ref] for name, ref in node.inputs.items()}
+                plan.add(Node(pid, node.type, dict(params), inputs))
+            mapping[nid] = pid
+            users.setdefault(pid, set()).add(index)
+        mappings.append(mapping)
+    return SweepPlan(plan, mappings, users)
+
+
+def _digest(sig: Tuple[Tuple[str, str], ...]) -> str:
+    return hashlib.sha1(repr(sig).encode("utf-8")).hexdigest()[:12]
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import NodeCache
+from .image import Image, LazyImage, Rect, intersect_rect, materialize, nbytes_of
+
+
+TILE_SIZE = 256
+
+
+def clip_rect(rect: Rect, width: int, height: int) -> Optional[Rect]:
+    return intersect_rect(rect, (0, 0, width, height))
+
+
+def pad_rect(rect: Rect, halo: int) -> Rect:
+    x, y, w, h = rect
+    return x - halo, y - halo, w + 2 * halo, h + 2 * halo
+
+
+def tiles_for_rect(rect: Rect, tile_size: int = TILE_SIZE) -> Iterator[Tuple[int, int]]:
+    """Indices (tx, ty) of the grid tiles that intersect ``rect``, row-major."""
+    x, y, w, h = rect
+    if w <= 0 or h <= 0:
+        return
+    for ty in range(y // tile_size, (y + h - 1) // tile_size + 1):
+        for tx in range(x // tile_size, (x + w - 1) // tile_size + 1):
+            yield tx, ty
+
+
+def tile_rect(tx: int, ty: int, width: int, height: int, tile_size: int = TILE_SIZE) -> Rect:
+    """Pixel rect of grid tile (tx, ty), clipped to the image bounds."""
+    x, y = tx * tile_size, ty * tile_size
+    return x, y, min(tile_size, width - x), min(tile_size, height - y)
+
+
+TileFn = Callable[[Rect], Image]
+
+
+class TiledImage(LazyImage):
+    """Lazy image computed one grid tile at a time by ``compute(rect)``.
+
+    Reading a rectangle computes only the tiles it touches; every tile is
+    an array of ``dtype`` (see ``formats``). Tiles are kept in
+    ``cache`` under ``<key>@<tile_size>:<tx>,<ty>`` when one is given (so they
+    share its byte budget), otherwise in a private dict. ``on_lookup(hit)``
+    is called for every cache lookup a tile request makes.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        compute: TileFn,
+        tile_size: int = TILE_SIZE,
+        cache: Optional[NodeCache] = None,
+        key: str = "",
+        dtype: np.dtype = np.dtype(np.uint8),
+        on_lookup: Optional[Callable[[bool], None]] = None,
+    ) -> None:
+        self.width = int(width)
+        self.height = int(height)
+        self.tile_size = int(tile_size)
+        self.dtype = np.dtype(dtype)
+        self._compute = compute
+        self._cache = cache if key else None
+        self._key = key
+        self._on_lookup = on_lookup
+        self._tiles: Dict[Tuple[int, int], Image] = {}
+        self._pending: Dict[Tuple[int, int], threading.Event] = {}
+        self._lock = threading.Lock()
+        self.tiles_computed = 0
+
+    def _tile_key(self, tx: int, ty: int) -> str:
+        return f"{self._key}@{self.tile_size}:{tx},{ty}"
+
+    def _lookup(self, tx: int, ty: int) -> Optional[Image]:
+        if self._cache is not None:
+            hit = self._cache.get(self._tile_key(tx, ty))
+            if self._on_lookup is not None:
+                self._on_lookup(hit is not None)
+            return hit
+        with self._lock:
+            return self._tiles.get((tx, ty))
+
+    def tile(self, tx: int, ty: int) -> Image:
+        """Return grid tile (tx, ty), computing it on first use.
+
+        Safe to call from several threads: concurrent requests for the same
+        tile wait for the one thread computing it instead of duplicating work.
+        """
+        hit = self._lookup(tx, ty)
+        if hit is not None:
+            return hit
+        with self._lock:
+            pending = self._pending.get((tx, ty))
+            if pending is None:
+                self._pending[(tx, ty)] = threading.Event()
+        if pending is not None:
+            pending.wait()
+            hit = self._lookup(tx, ty)
+            if hit is not None:
+                return hit
+            # The owner failed or the tile was already evicted: compute it here
+            return self._compute_tile(tx, ty)
+        try:
+            return self._compute_tile(tx, ty)
+        finally:
+            with self._lock:
+                self._pending.pop((tx, ty)).set()
+
+    def _compute_tile(self, tx: int, ty: int) -> Image:
+        img = self._compute(tile_rect(tx, ty, self.width, self.height, self.tile_size))
+        if isinstance(img, np.ndarray):
+            img.setflags(write=False)
+        with self._lock:
+            self.tiles_computed += 1
+            if self._cache is None:
+                self._tiles[(tx, ty)] = img
+        if self._cache is not None:
+            self._cache.put(self._tile_key(tx, ty), img)
+        return img
+
+    def tiles_for(self, rect: Optional[Rect] = None) -> List[Tuple[int, int]]:
+        rect = clip_rect(rect if rect is not None else (0, 0, self.width, self.height), self.width, self.height)
+        return list(tiles_for_rect(rect, self.tile_size)) if rect is not None else []
+
+    def read(self, rect: Optional[Rect] = None) -> np.ndarray:
+        rect = rect if rect is not None else (0, 0, self.width, self.height)
+        x, y, w, h = rect
+        out = np.zeros((h, w, 4), dtype=self.dtype)
+        for tx, ty in self.tiles_for(rect):
+            trect = tile_rect(tx, ty, self.width, self.height, self.tile_size)
+            hit = intersect_rect(rect, trect)
+            if hit is None:
+                continue
+            hx, hy, hw, hh = hit
+            local = (hx - trect[0], hy - trect[1], hw, hh)
+            out[hy - y:hy - y + hh, hx - x:hx - x + hw] = materialize(self.tile(tx, ty), local)
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(nbytes_of(t) for t in self._tiles.values())
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Any, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .image import Rect
+
+
+# Vector paths and a CPU scanline rasterizer producing coverage masks.
+#
+# A path is a tuple of closed subpaths; a subpath is a tuple of Bezier
+# segments, each the tuple of its control points (2 for a line, 3 for a
+# quadratic, 4 for a cubic). Paths are hashable so their flattened edges can
+# be cached per path and zoom level: panning and zooming within a level
+# reuse the same edges, and only crossing to a finer level flattens again.
+#
+# Coverage is exact horizontally (fixed-point span accumulation) and sampled
+# on SAMPLES sub-scanlines per pixel row. All accumulation is in integers, so
+# a tile of a mask is bit-identical to the same part of the whole mask.
+
+Point = Tuple[float, float]
+Segment = Tuple[Point, ...]
+Path = Tuple[Tuple[Segment, ...], ...]
+
+FILL_RULES = ("nonzero", "evenodd")
+# Max distance (device pixels) between a curve and its flattened polyline
+FLATNESS = 0.2
+# Sub-scanlines per pixel row, and fixed-point steps per pixel along a scanline
+SAMPLES = 16
+_FIX = 256
+_MAX_SUBDIVISIONS = 1024
+
+
+class VectorError(ValueError):
+    """A path description is malformed."""
+
+
+def _point(values: Sequence[Any], where: str) -> Point:
+    try:
+        x, y = (float(v) for v in values)
+    except (TypeError, ValueError):
+        raise VectorError(f"{where}: expected an [x, y] point, got {values!r}") from None
+    return x, y
+
+
+# Points each path command takes
+_COMMAND_POINTS = {"M": 1, "L": 1, "Q": 2, "C": 3, "Z": 0}
+
+
+def parse_path(spec: Any) -> Path:
+    """A path from JSON: a list of [x, y] points (one closed polygon, as the
+    pen tool records), a list of such lists, or SVG-like commands
+    ``["M", x, y]``, ``["L", x, y]``, ``["Q", x1, y1, x, y]``,
+    ``["C", x1, y1, x2, y2, x, y]`` and ``["Z"]``. Subpaths are closed for filling.
+    """
+    if not isinstance(spec, (list, tuple)):
+        raise VectorError("path must be a list of points or commands")
+    if spec and all(isinstance(item, (list, tuple)) and item and isinstance(item[0], (list, tuple)) for item in spec):
+        return tuple(sub for points in spec for sub in parse_path(points))
+    if all(isinstance(item, (list, tuple)) and len(item) == 2 and not isinstance(item[0], str) for item in spec):
+        points = [_point(p, f"point {i}") for i, p in enumerate(spec)]
+        return (tuple(zip(points, points[1:])),) if len(points) > 1 else ()
+    subpaths: List[Tuple[Segment, ...]] = []
+    current: List[Segment] = []
+    pen: Point = (0.0, 0.0)
+    for i, item in enumerate(spec):
+        op = item[0] if isinstance(item, (list, tuple)) and item else None
+        if not isinstance(op, str) or op not in _COMMAND_POINTS:
+            raise VectorError(f"command {i}: expected one of {sorted(_COMMAND_POINTS)} with coordinates, got {item!r}")
+        args = list(item[1:])
+        if len(args) != 2 * _COMMAND_POINTS[op]:
+            raise VectorError(f"command {i}: {op} takes {2 * _COMMAND_POINTS[op]} numbers, got {len(args)}")
+        points = [_point(args[j:j + 2], f"command {i}") for j in range(0, len(args), 2)]
+        if op in ("M", "Z"):
+            if current:
+                subpaths.append(tuple(current))
+            current = []
+            if op == "M":
+                pen = points[0]
+            continue
+        current.append((pen, *points))
+        pen = points[-1]
+    if current:
+        subpaths.append(tuple(current))
+    return tuple(subpaths)
+
+
+def zoom_level(scale: float) -> int:
+    """The power-of-two zoom bucket flattened edges are cached under."""
+    if scale <= 0:
+        raise VectorError(f"scale must be positive, got {scale}")
+    return max(-16, min(16, math.ceil(math.log2(scale))))
+
+
+def _subdivisions(points: np.ndarray, tolerance: float) -> int:
+    degree = len(points) - 1
+    if degree == 1:
+        return 1
+    # Chord error of n uniform steps is at most degree * (degree - 1) / 8 * |second difference| / n²
+    second = points[:-2] - 2.0 * points[1:-1] + points[2:]
+    dd = float(np.sqrt((second ** 2).sum(axis=1)).max())
+    n = math.ceil(math.sqrt(degree * (degree - 1) * dd / (8.0 * tolerance)))
+    return max(1, min(_MAX_SUBDIVISIONS, n))
+
+
+def _bezier(points: np.ndarray, t: np.ndarray) -> np.ndarray:
+    degree = len(points) - 1
+    s = 1.0 - t
+    basis = [math.comb(degree, i) * s ** (degree - i) * t ** i for i in range(degree + 1)]
+    return sum(b[:, None] * p for b, p in zip(basis, points))
+
+
+@lru_cache(maxsize=512)
+def flatten(path: Path, level: int = 0) -> np.ndarray:
+    """Edges ``(x0, y0, x1, y1)`` of ``path`` flattened for zoom ``level``
+    (within ``FLATNESS`` device pixels at scale ``2 ** level``).
+
+    Every subpath is closed; horizontal edges are dropped (they never cross
+    a scanline).
+    """
+    tolerance = FLATNESS / 2.0 ** level
+    edges = []
+    for subpath in path:
+        polyline = [np.array([subpath[0][0]])]
+        for segment in subpath:
+            points = np.array(segment, dtype=np.float64)
+            n = _subdivisions(points, tolerance)
+            polyline.append(_bezier(points, np.arange(1, n + 1) / n) if len(points) > 2 else points[1:])
+        pts = np.concatenate(polyline + [polyline[0]])
+        edges.append(np.concatenate([pts[:-1], pts[1:]], axis=1))
+    out = np.concatenate(edges) if edges else np.zeros((0, 4))
+    out = out[out[:, 1] != out[:, 3]]
+    out.setflags(write=False)
+    return out
+
+
+def rasterize(
+    path: Path,
+    rect: Rect,
+    scale: float = 1.0,
+    offset: Point = (0.0, 0.0),
+    rule: str = "nonzero",
+) -> np.ndarray:
+    """Coverage in [0, 1] (float32, h x w) of ``path`` over device ``rect``.
+
+    Path coordinates map to device pixels as ``p * scale + offset``.
+    """
+    if rule not in FILL_RULES:
+        raise VectorError(f"unknown fill rule: {rule!r} (expected one of {FILL_RULES})")
+    rx, ry, rw, rh = rect
+    edges = flatten(path, zoom_level(scale)) * scale + np.array([offset[0], offset[1]] * 2)
+    x0, y0, x1, y1 = edges.T
+    # Sub-scanline k samples y = (k + 0.5) / SAMPLES; an edge crosses those in [lo, hi)
+    ymin, ymax = np.minimum(y0, y1), np.maximum(y0, y1)
+    lo = np.maximum(np.ceil(ymin * SAMPLES - 0.5), ry * SAMPLES).astype(np.int64)
+    hi = np.minimum(np.ceil(ymax * SAMPLES - 0.5), (ry + rh) * SAMPLES).astype(np.int64)
+    counts = np.maximum(hi - lo, 0)
+    edge = np.repeat(np.arange(len(edges)), counts)
+    k = lo[edge] + np.arange(len(edge)) - np.repeat(np.cumsum(counts) - counts, counts)
+    y = (k + 0.5) / SAMPLES
+    x = x0[edge] + (y - y0[edge]) * ((x1 - x0) / (y1 - y0))[edge]
+    winding = np.where(y1 > y0, 1, -1)[edge]
+
+    # Per sub-scanline, sorted crossings split it into spans of constant
+    # winding; every subpath is closed, so the running sum is back to zero
+    # at the end of each sub-scanline
+    order = np.lexsort((x, k))
+    x, k, winding = x[order], k[order], np.cumsum(winding[order])
+    filled = winding != 0 if rule == "nonzero" else (winding & 1) == 1
+    filled[-1:] = False
+    start = np.flatnonzero(filled)
+    row = k[start] // SAMPLES - ry
+    a = _fixed(x[start], rx, rw)
+    b = _fixed(x[start + 1], rx, rw)
+    keep = b > a
+    row, a, b = row[keep], a[keep], b[keep]
+
+    # A span [a, b) adds clamp(b - px, 0, 1) - clamp(a - px, 0, 1) to pixel px;
+    # accumulate that as differences and integrate along the row
+    stride = rw + 2
+    index, weight = [], []
+    for fx, sign in ((b, 1), (a, -1)):
+        px, frac = fx // _FIX, fx % _FIX
+        index += [row * stride + px, row * stride + px + 1]
+        weight += [sign * (frac - _FIX), -sign * frac]
+    acc = np.bincount(np.concatenate(index), np.concatenate(weight).astype(np.float64), minlength=rh * stride)
+    coverage = np.cumsum(acc.reshape(rh, stride), axis=1)[:, :rw]
+    return (coverage * (1.0 / (_FIX * SAMPLES))).astype(np.float32)
+
+
+def _fixed(x: np.ndarray, rx: int, rw: int) -> np.ndarray:
+    # Device x as fixed point relative to the rect's left edge, clamped to the rect
+    clipped = np.clip(x, rx, rx + rw)
+    return np.floor(clipped * _FIX + 0.5).astype(np.int64) - rx * _FIX
+
+
+def polyline_path(polylines: Iterable[Sequence[Point]]) -> Path:
+    """A path filling each polyline (e.g. pen-tool points) as a closed polygon."""
+    return tuple(
+        tuple(zip(pts, pts[1:]))
+        for pts in (tuple((float(x), float(y)) for x, y in line) for line in polylines)
+        if len(pts) > 2
+    )
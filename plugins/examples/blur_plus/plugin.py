@@ -1,9 +1,142 @@
+import math
+
+import numpy as np
+
 from plugins.vx import register
 
 
-def execute(image, radius: float = 2.0):
-    # placeholder: real implementation will use node_engine GPU path
-    return image
+# Below this sigma an exact separable Gaussian is cheap enough; above it a
+# cascade of box blurs (running sums, constant cost per pixel) takes over.
+GAUSSIAN_MAX_SIGMA = 3.0
+BOX_PASSES = 3
+METHODS = ("auto", "gaussian", "box")
+
+
+def _method(radius: float, method: str) -> str:
+    if method not in METHODS:
+        raise ValueError(f"unknown blur method: {method} (expected one of {METHODS})")
+    if method == "auto":
+        return "gaussian" if radius <= GAUSSIAN_MAX_SIGMA else "box"
+    return method
+
+
+def box_sizes(sigma: float, passes: int = BOX_PASSES) -> list:
+    """Odd box widths whose ``passes``-fold convolution approximates a Gaussian of ``sigma``.
+
+    Mixes two adjacent odd widths so the summed variance matches sigma**2.
+    """
+    ideal = math.sqrt(12.0 * sigma * sigma / passes + 1.0)
+    lo = int(math.floor(ideal))
+    if lo % 2 == 0:
+        lo -= 1
+    lo = max(lo, 1)
+    hi = lo + 2
+    m = round((12.0 * sigma * sigma - passes * lo * lo - 4 * passes * lo - 3 * passes) / (-4.0 * lo - 4.0))
+    return [lo if i < m else hi for i in range(passes)]
+
+
+def gaussian_weights(sigma: float) -> np.ndarray:
+    """Normalized 1-D Gaussian taps covering +-ceil(3 sigma)."""
+    reach = int(math.ceil(3.0 * sigma))
+    x = np.arange(-reach, reach + 1, dtype=np.float64)
+    w = np.exp(-0.5 * (x / sigma) ** 2)
+    return (w / w.sum()).astype(np.float32)
+
+
+def _span(ndim: int, axis: int, start: int, stop: int) -> tuple:
+    index = [slice(None)] * ndim
+    index[axis] = slice(start, stop)
+    return tuple(index)
+
+
+def _gaussian_axis(data: np.ndarray, weights: np.ndarray, axis: int) -> np.ndarray:
+    # Zero padding: pixels outside the image are transparent, matching read_region
+    reach = len(weights) // 2
+    pad = [(0, 0)] * data.ndim
+    pad[axis] = (reach, reach)
+    padded = np.pad(data, pad)
+    n = data.shape[axis]
+    out = np.zeros_like(data)
+    tmp = np.empty_like(data)
+    for k, w in enumerate(weights):
+        np.multiply(padded[_span(data.ndim, axis, k, k + n)], w, out=tmp)
+        out += tmp
+    return out
+
+
+def _box_axis(data: np.ndarray, width: int, axis: int) -> np.ndarray:
+    # Unnormalized running-sum box filter: cost per pixel is independent of width
+    r = (width - 1) // 2
+    pad = [(0, 0)] * data.ndim
+    pad[axis] = (r + 1, r)
+    sums = np.cumsum(np.pad(data, pad), axis=axis)
+    n = data.shape[axis]
+    return sums[_span(data.ndim, axis, width, width + n)] - sums[_span(data.ndim, axis, 0, n)]
+
+
+def execute(image, radius: float = 2.0, method: str = "auto"):
+    """Gaussian blur with standard deviation ``radius``.
+
+    Takes straight-alpha RGBA8 or premultiplied float RGBA (the engine hands
+    it float16, see ``register_plugin``) and returns the same kind. Blurs
+    premultiplied colour so transparent pixels (including everything
+    outside the image) do not bleed dark fringes. Small radii use an exact
+    separable Gaussian; large ones a box cascade whose cost per pixel does
+    not depend on the radius. Both read at most ``halo(radius)`` pixels away,
+    so blurring a halo-padded tile gives the same pixels as the whole image.
+    """
+    radius = float(radius)
+    image = np.asarray(image)
+    if radius <= 0.0 or image.size == 0:
+        return image.copy()
+    if image.dtype == np.uint8:
+        alpha = image[..., 3:4].astype(np.int64)
+        premul = np.concatenate([image[..., :3] * alpha, alpha * 255], axis=-1)  # 0..65025 per channel
+    else:
+        # Same fixed-point scale as RGBA8, in whole numbers so box sums stay exact
+        premul = np.rint(image.astype(np.float64) * 65025.0)
+
+    if _method(radius, method) == "gaussian":
+        weights = gaussian_weights(radius)
+        data = _gaussian_axis(premul.astype(np.float32), weights, 0)
+        data = _gaussian_axis(data, weights, 1).astype(np.float64)
+    else:
+        # Rounding to whole numbers after every pass keeps the running sums
+        # exact in float64, so results do not depend on where a tile starts.
+        # Rows are blurred, then the transposed columns, keeping cumsum contiguous.
+        # Each axis is padded by the cascade's reach first: intermediate passes
+        # must keep what bleeds past the edge, as they do inside a padded tile.
+        sizes = box_sizes(radius)
+        reach = sum((w - 1) // 2 for w in sizes)
+        data = premul.astype(np.float64)
+        for _ in range(2):
+            data = np.pad(data, ((0, 0), (reach, reach), (0, 0)))
+            for width in sizes:
+                data = _box_axis(data, width, 1)
+                data *= 1.0 / width
+                np.rint(data, out=data)
+            data = np.ascontiguousarray(data[:, reach:data.shape[1] - reach].swapaxes(0, 1))
+
+    if image.dtype != np.uint8:
+        return (data * (1.0 / 65025.0)).astype(image.dtype)
+    a = data[..., 3:4]
+    out = np.zeros(image.shape, dtype=np.float64)
+    np.divide(data[..., :3] * 255.0, a, out=out[..., :3], where=a > 0.0)
+    out[..., 3:4] = a / 255.0
+    out += 0.5
+    np.clip(out, 0.0, 255.0, out=out)
+    return out.astype(np.uint8)
+
+
+def halo(radius: float = 2.0, method: str = "auto", **_params) -> int:
+    """Pixels of context needed around a tile: how far the kernel reaches."""
+    radius = max(0.0, float(radius))
+    if radius == 0.0:
+        return 0
+    reach = int(math.ceil(3.0 * radius))
+    if _method(radius, method) == "box":
+        reach = max(reach, sum((w - 1) // 2 for w in box_sizes(radius)))
+    return reach
 
 
 def register_plugin():
@@ -13,5 +146,7 @@ def register_plugin():
             "version": "1.0.0",
             "type": "node",
             "entrypoint": "plugins.examples.blur_plus.plugin.execute",
+            # Chained blurs pass half floats along instead of re-quantizing to RGBA8
+            "format": "rgba16f",
         }
     )
@@ -10,6 +10,12 @@ class PluginSpec:
     version: str
     type: str
     entrypoint: str
+    parallel: str = "thread"  # "process" runs pure-Python node plugins in worker processes
+    format: str = "rgba8"  # pixel format a node plugin consumes and produces
+    time_dependent: bool = False  # node plugin's execute() takes a ``frame`` keyword
+
+
+PARALLEL_MODES = ("thread", "process")
 
 
 class PluginRegistry:
@@ -21,6 +27,9 @@ class PluginRegistry:
         missing = [k for k in required if k not in spec]
         if missing:
             raise ValueError(f"missing keys: {missing}")
+        parallel = spec.get("parallel", "thread")
+        if parallel not in PARALLEL_MODES:
+            raise ValueError(f"invalid parallel mode: {parallel}")
         name = spec["name"]
         if name in self._plugins:
             raise ValueError(f"plugin already registered: {name}")
@@ -29,6 +38,9 @@ class PluginRegistry:
             version=spec["version"],
             type=spec["type"],
             entrypoint=spec["entrypoint"],
+            parallel=parallel,
+            format=spec.get("format", "rgba8"),
+            time_dependent=bool(spec.get("time_dependent", False)),
         )
 
     def list(self, type: str | None = None) -> List[PluginSpec]:
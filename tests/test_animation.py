@@ -0,0 +1,181 @@
+import functools
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from cli.vxcli import main as vxcli_main
+from node_engine.animation import AnimationError, params_at, parse_frames, value_at
+from node_engine.cache import NodeCache
+from node_engine.document import Document, Layer, load_document
+from node_engine.evaluator import Evaluator
+from node_engine.export import export_frames, frame_path
+from node_engine.graph import Graph, GraphError, Node
+from node_engine.image import ConstantImage, materialize
+from node_engine.nodes import register_node
+from node_engine.optimizer import optimize
+from node_engine.profiler import Profiler
+from node_engine.render import render_document, render_frames
+from plugins.examples.blur_plus import plugin as blur
+
+
+@register_node("test_frame_gray", time_dependent=True)
+def frame_gray(inputs, params):
+    level = int(params["frame"]) * 10 % 256
+    return ConstantImage(8, 8, (level, level, level, 255))
+
+
+def animated_graph():
+    nodes = [
+        {"id": "bg", "type": "solid_color", "params": {"color": "#203040", "width": 96, "height": 64}},
+        {"id": "soft", "type": "blur_plus", "inputs": {"image": "ref://bg"}, "params": {"radius": 3}},
+        {"id": "dot", "type": "solid_color", "params": {"color": "#ff0000", "width": 16, "height": 16}},
+        {"id": "fade", "type": "opacity", "inputs": {"image": "ref://dot"},
+         "params": {"opacity": {"keyframes": [[1, 0.0], [5, 1.0]]}}},
+        {"id": "out", "type": "compose", "inputs": {"a": "ref://soft", "b": "ref://fade"}},
+    ]
+    return Graph(Node.from_json(n) for n in nodes)
+
+
+class TestKeyframes(unittest.TestCase):
+    def test_value_at(self):
+        track = {"keyframes": [[10, 1.0], [0, 0.0]]}
+        self.assertEqual(value_at(track, -5), 0.0)
+        self.assertAlmostEqual(value_at(track, 2.5), 0.25)
+        self.assertEqual(value_at(track, 99), 1.0)
+        self.assertEqual(value_at({"keyframes": [[0, "#000000"], [2, "#ff8000"]]}, 1), "#804000")
+        self.assertEqual(value_at({"keyframes": [[0, [0, 10]], [4, [4, 30]]]}, 1), [1, 15])
+        self.assertEqual(value_at({"keyframes": [[0, 1], [4, 9]], "interp": "step"}, 3.9), 1)
+        self.assertEqual(value_at(0.5, 3), 0.5)
+
+    def test_params_at(self):
+        static = {"radius": 2}
+        self.assertIs(params_at(static, 4), static)
+        self.assertEqual(params_at(static, 4, time_dependent=True), {"radius": 2, "frame": 4})
+        with self.assertRaises(AnimationError):
+            params_at({"radius": {"keyframes": []}}, 0)
+
+    def test_parse_frames(self):
+        self.assertEqual(list(parse_frames("1:4")), [1, 2, 3, 4])
+        self.assertEqual(list(parse_frames("0:10:5")), [0, 5, 10])
+        self.assertEqual(list(parse_frames("7")), [7])
+        for bad in ("4:1", "a:b", "1:2:0", "1:2:3:4"):
+            with self.assertRaises(AnimationError):
+                parse_frames(bad)
+
+    def test_frame_path(self):
+        self.assertEqual(frame_path(Path("out/anim.png"), 7), Path("out/anim.0007.png"))
+        self.assertEqual(frame_path(Path("anim.###.png"), 7), Path("anim.007.png"))
+        self.assertEqual(frame_path(Path("f{frame:02d}.raw"), 3), Path("f03.raw"))
+
+
+class TestTemporalCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            blur.register_plugin()
+        except ValueError:
+            pass
+
+    def test_static_subgraph_computed_once(self):
+        ev = Evaluator(animated_graph(), frame=1)
+        self.assertEqual(ev.time_varying(), ["fade"])
+        ev.evaluate(["out"])
+        self.assertEqual(set(ev.last_recomputed), {"bg", "soft", "dot", "fade", "out"})
+        first = materialize(ev.evaluate(["out"])["out"])
+        self.assertEqual(ev.set_frame(3), {"fade", "out"})
+        mid = materialize(ev.evaluate(["out"])["out"])
+        self.assertEqual(ev.last_recomputed, ["fade", "out"])
+        ev.evaluate(["soft"])
+        self.assertEqual(ev.last_recomputed, [])
+        self.assertGreater(int(mid[8, 8, 0]), int(first[8, 8, 0]))
+        self.assertEqual(ev.set_frame(3), set())
+
+    def test_frames_match_fresh_evaluation(self):
+        g = animated_graph()
+        ev = Evaluator(g)
+        for frame in (1, 2, 4, 5):
+            shared = materialize(ev.evaluate(["out"], frame=frame)["out"])
+            fresh = materialize(Evaluator(animated_graph(), frame=frame).evaluate(["out"])["out"])
+            np.testing.assert_array_equal(shared, fresh)
+
+    def test_cache_keys_follow_resolved_params(self):
+        cache = NodeCache()
+        ev = Evaluator(animated_graph(), cache=cache, frame=0)
+        ev.evaluate(["out"])
+        key0 = ev.keys["fade"]
+        ev.evaluate(["out"], frame=1)  # before the first key: same value, same key
+        self.assertEqual(ev.keys["fade"], key0)
+        self.assertEqual(ev.last_recomputed, [])
+        ev.evaluate(["out"], frame=2)
+        self.assertNotEqual(ev.keys["fade"], key0)
+
+    def test_time_dependent_node_type(self):
+        g = Graph([Node("ramp", "test_frame_gray")])
+        ev = Evaluator(g, frame=2)
+        self.assertEqual(ev.time_varying(), ["ramp"])
+        self.assertEqual(materialize(ev.evaluate()["ramp"])[0, 0, 0], 20)
+        self.assertEqual(materialize(ev.evaluate(frame=5)["ramp"])[0, 0, 0], 50)
+
+    def test_bad_keyframes_name_the_node(self):
+        g = Graph([Node("dot", "solid_color", {"width": {"keyframes": "nope"}})])
+        with self.assertRaisesRegex(GraphError, "dot"):
+            Evaluator(g).evaluate()
+
+    def test_optimizer_leaves_animated_nodes(self):
+        result = optimize(animated_graph(), ["out"])
+        self.assertEqual(result.graph["fade"].type, "opacity")
+        self.assertNotIn("fade", result.folded)
+
+    def test_export_frames(self):
+        doc = Document(Path("<memory>"), {}, animated_graph(), [Layer("l0", "out")])
+        profiler = Profiler()
+        ev = Evaluator(doc.graph, profiler=profiler)
+        with tempfile.TemporaryDirectory() as tmp:
+            written = export_frames(doc, Path(tmp) / "anim.raw", range(1, 4), band_height=16, evaluator=ev)
+            self.assertEqual([p.name for p in written], ["anim.0001.raw", "anim.0002.raw", "anim.0003.raw"])
+            for (frame, expected), path in zip(render_frames(doc, range(1, 4)), written):
+                got = np.fromfile(path, dtype=np.uint8).reshape(expected.shape)
+                np.testing.assert_array_equal(got, expected)
+        runs = {nid: prof.runs + prof.tiles for nid, prof in profiler.summary().items()}
+        self.assertEqual(runs["soft"], 1)  # one tile, first frame only
+        self.assertEqual(runs["fade"], 3)
+
+    def test_export_frames_keeps_invariant_tiles(self):
+        nodes = [
+            {"id": "bg", "type": "solid_color", "params": {"color": "#203040", "width": 128, "height": 1024}},
+            {"id": "soft", "type": "blur_plus", "inputs": {"image": "ref://bg"}, "params": {"radius": 2}},
+            {"id": "fade", "type": "opacity", "inputs": {"image": "ref://soft"},
+             "params": {"opacity": {"keyframes": [[1, 0.2], [3, 1.0]]}}},
+        ]
+        doc = Document(Path("<memory>"), {}, Graph(Node.from_json(n) for n in nodes), [Layer("l0", "fade")])
+        profiler = Profiler()
+        profiled = functools.partial(Evaluator, profiler=profiler)
+        with mock.patch("node_engine.export.Evaluator", wraps=profiled) as make:
+            with tempfile.TemporaryDirectory() as tmp:
+                written = export_frames(doc, Path(tmp) / "tall.raw", range(1, 4), band_height=64, tile_size=64)
+                for (frame, expected), path in zip(render_frames(doc, range(1, 4)), written):
+                    got = np.fromfile(path, dtype=np.uint8).reshape(expected.shape)
+                    np.testing.assert_array_equal(got, expected)
+        runs = {nid: prof.runs + prof.tiles for nid, prof in profiler.summary().items()}
+        # 2 x 16 tiles: the invariant blur runs once for all frames, the fade once per frame
+        self.assertEqual(runs, {"bg": 1, "soft": 32, "fade": 3 * 32})
+        stats = make.call_args.kwargs["cache"].stats()
+        self.assertEqual(stats.pinned_bytes, 128 * 1024 * 8)  # soft, rgba16f
+        self.assertLessEqual(stats.bytes, stats.budget_bytes)
+
+    def test_cli_frames(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "basic.####.raw"
+            self.assertEqual(vxcli_main(["render", "examples/basic.vxdoc", "-o", str(out), "--frames", "1:3"]), 0)
+            expected = render_document(load_document(Path("examples/basic.vxdoc")))
+            for frame in (1, 2, 3):
+                got = np.fromfile(Path(tmp) / f"basic.{frame:04d}.raw", dtype=np.uint8).reshape(expected.shape)
+                np.testing.assert_array_equal(got, expected)
+            self.assertEqual(vxcli_main(["render", "examples/basic.vxdoc", "-o", str(out), "--frames", "3:1"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
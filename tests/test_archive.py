@@ -0,0 +1,141 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+import zlib
+from pathlib import Path
+from unittest import mock
+
+import cli.archive as archive
+from cli.archive import zip_document
+from cli.validate import check_document
+
+
+def raw_entry(path, name):
+    # Compressed bytes of an entry, as stored
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(name)
+    with open(path, "rb") as f:
+        f.seek(info.header_offset + 26)
+        skip = int.from_bytes(f.read(2), "little") + int.from_bytes(f.read(2), "little")
+        f.seek(skip, os.SEEK_CUR)
+        return f.read(info.compress_size)
+
+
+def crc_collision(data):
+    # Same length and CRC-32, different bytes: CRC-32 is linear over GF(2), so
+    # some set of flipped bits among the first 64 leaves it unchanged
+    zero = zlib.crc32(bytes(len(data)))
+    basis = {}
+    for bit in range(64):
+        flip = bytearray(len(data))
+        flip[bit // 8] ^= 1 << (bit % 8)
+        vec, mask = zlib.crc32(bytes(flip)) ^ zero, 1 << bit
+        while vec and vec.bit_length() in basis:
+            bv, bm = basis[vec.bit_length()]
+            vec, mask = vec ^ bv, mask ^ bm
+        if vec:
+            basis[vec.bit_length()] = (vec, mask)
+            continue
+        out = bytearray(data)
+        for b in range(64):
+            if mask >> b & 1:
+                out[b // 8] ^= 1 << (b % 8)
+        return bytes(out)
+
+
+class TestZipDocument(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.doc = self.tmp / "doc.vxdoc"
+        shutil.copytree("examples/basic.vxdoc", self.doc)
+        (self.doc / "assets" / "texture.bin").write_bytes(os.urandom(100_000) + bytes(100_000))
+        (self.doc / "assets" / "empty").mkdir()
+        self.out = self.tmp / "doc.zip.vxdoc"
+
+    def entries(self):
+        with zipfile.ZipFile(self.out) as zf:
+            self.assertIsNone(zf.testzip())
+            return {i.filename: zf.read(i) for i in zf.infolist()}
+
+    def test_round_trip(self):
+        st = zip_document(self.doc, self.out)
+        self.assertEqual((st.compressed, st.copied), (6, 0))
+        entries = self.entries()
+        self.assertEqual(entries["assets/texture.bin"], (self.doc / "assets" / "texture.bin").read_bytes())
+        self.assertIn("assets/empty/", entries)
+        self.assertEqual(check_document(self.out), [])
+
+    def test_only_changed_entries_are_recompressed(self):
+        zip_document(self.doc, self.out)
+        before = raw_entry(self.out, "assets/texture.bin")
+        (self.doc / "nodes" / "sample.json").write_text('{"id": "node-1", "type": "solid_color", "params": {}}')
+        (self.doc / "nodes" / "extra.json").write_text('{"id": "node-2", "type": "solid_color"}')
+        (self.doc / "collab" / "presence.json").unlink()
+        st = zip_document(self.doc, self.out, level=1)
+        self.assertEqual((st.compressed, st.copied, st.removed), (2, 4, 1))
+        self.assertEqual(st.copied_bytes, 200_000 + sum(
+            (self.doc / n).stat().st_size for n in ("manifest.json", "layers/sample.json", "assets/.gitkeep")))
+        self.assertEqual(raw_entry(self.out, "assets/texture.bin"), before)
+        entries = self.entries()
+        self.assertNotIn("collab/presence.json", entries)
+        self.assertEqual(entries["nodes/extra.json"], (self.doc / "nodes" / "extra.json").read_bytes())
+
+    def test_crc_collision_is_recompressed(self):
+        asset = self.doc / "assets" / "texture.bin"
+        original = asset.read_bytes()
+        forged = crc_collision(original)
+        self.assertNotEqual(forged, original)
+        self.assertEqual((len(forged), zlib.crc32(forged)), (len(original), zlib.crc32(original)))
+        # Archives we wrote (recorded SHA-256) and foreign ones (compared byte for byte)
+        for foreign in (False, True):
+            asset.write_bytes(original)
+            if foreign:
+                self.out.unlink()
+                with zipfile.ZipFile(self.out, "w", zipfile.ZIP_DEFLATED) as zf:
+                    zf.write(asset, "assets/texture.bin")
+            else:
+                zip_document(self.doc, self.out)
+            asset.write_bytes(forged)
+            st = zip_document(self.doc, self.out)
+            self.assertEqual(st.compressed, 6 if foreign else 1)
+            self.assertEqual(self.entries()["assets/texture.bin"], forged)
+
+    def test_existing_layouts(self):
+        # A zip of the folder (entries under a prefix) is reused too
+        with zipfile.ZipFile(self.out, "w", zipfile.ZIP_DEFLATED) as zf:
+            for path in sorted(self.doc.rglob("*")):
+                if path.is_file():
+                    zf.write(path, f"doc.vxdoc/{path.relative_to(self.doc).as_posix()}")
+        st = zip_document(self.doc, self.out)
+        self.assertEqual((st.compressed, st.copied), (0, 6))
+        self.assertIn("manifest.json", self.entries())
+        # A damaged archive is replaced
+        self.out.write_bytes(b"not a zip")
+        self.assertEqual(zip_document(self.doc, self.out).compressed, 6)
+        self.assertEqual(check_document(self.out), [])
+
+    def test_zip64_records(self):
+        with mock.patch.object(archive, "_ZIP64_MARGIN", archive._U32):
+            zip_document(self.doc, self.out)
+            st = zip_document(self.doc, self.out)
+        self.assertEqual(st.copied, 6)
+        with zipfile.ZipFile(self.out) as zf:
+            self.assertEqual({i.extract_version for i in zf.infolist() if not i.is_dir()}, {45})
+        self.assertEqual(len(self.entries()), 7)
+
+    def test_failure_keeps_old_archive(self):
+        zip_document(self.doc, self.out)
+        before = self.out.read_bytes()
+        (self.doc / "nodes" / "sample.json").write_text("{}")
+        with mock.patch.object(archive, "_deflate_entry", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                zip_document(self.doc, self.out)
+        self.assertEqual(self.out.read_bytes(), before)
+        self.assertEqual(sorted(p.name for p in self.tmp.iterdir()), ["doc.vxdoc", "doc.zip.vxdoc"])
+
+
+if __name__ == "__main__":
+    unittest.main()
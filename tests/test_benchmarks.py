@@ -0,0 +1,74 @@
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks import generators
+from benchmarks.run import compare, main as bench_main, run_scenarios
+from benchmarks.scenarios import SCENARIOS, register_plugins
+from cli.vxcli import validate_path
+from node_engine.document import load_document
+
+
+class TestGenerators(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmp.name)
+        register_plugins()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_generated_documents_validate_and_load(self):
+        docs = [
+            generators.layered_document(self.tmp / "layered.vxdoc", 12, size=32),
+            generators.deep_document(self.tmp / "deep.vxdoc", 7, size=16),
+            generators.wide_document(self.tmp / "wide.vxdoc", 3, size=16),
+            generators.stroke_document(self.tmp / "strokes.vxdoc", 5),
+            generators.asset_document(self.tmp / "assets.vxdoc", 2, 100),
+        ]
+        for doc in docs:
+            with contextlib.redirect_stderr(io.StringIO()):
+                self.assertTrue(validate_path(doc), doc)
+            self.assertTrue(load_document(doc).layers)
+
+    def test_layer_order_survives_ten_or_more_files(self):
+        doc = load_document(generators.layered_document(self.tmp / "l.vxdoc", 12, size=16, blur=False))
+        self.assertEqual([layer.id for layer in doc.layers], [f"layer-{i}" for i in range(12)])
+
+    def test_deterministic(self):
+        self.assertEqual(generators.random_strokes(3, seed=4), generators.random_strokes(3, seed=4))
+        a = generators.asset_document(self.tmp / "a.vxdoc", 1, 64)
+        b = generators.asset_document(self.tmp / "b.vxdoc", 1, 64)
+        self.assertEqual((a / "assets" / "asset-0000.bin").read_bytes(), (b / "assets" / "asset-0000.bin").read_bytes())
+
+
+class TestRunner(unittest.TestCase):
+    def test_quick_run_emits_comparable_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "bench.json"
+            rc = bench_main(["--scale", "0.05", "--repeat", "1", "--warmup", "0", "-o", str(out)])
+            self.assertEqual(rc, 0)
+            data = json.loads(out.read_text(encoding="utf-8"))
+        self.assertEqual(set(data["results"]), set(SCENARIOS))
+        for key in ("commit", "python", "numpy", "platform", "scale"):
+            self.assertIn(key, data["meta"])
+        for name, res in data["results"].items():
+            if "skipped" in res:
+                self.assertTrue(SCENARIOS[name].requires)
+                continue
+            self.assertEqual(len(res["times"]), 1)
+            self.assertLessEqual(res["min"], res["median"])
+        rows = compare(data, data)
+        self.assertTrue(rows)
+        self.assertTrue(all(row["ratio"] == 1.0 for row in rows))
+
+    def test_unknown_scenario(self):
+        with self.assertRaises(KeyError):
+            run_scenarios(["nope"])
+
+
+if __name__ == "__main__":
+    unittest.main()
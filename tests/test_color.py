@@ -0,0 +1,123 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from node_engine.color import (
+    CubeError,
+    linear_to_srgb,
+    linear_to_srgb8,
+    load_cube,
+    parse_cube,
+    srgb_to_linear,
+)
+from node_engine.evaluator import Evaluator
+from node_engine.graph import Graph, Node
+from node_engine.image import ConstantImage, materialize
+
+
+def decode(v):
+    return np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+
+def encode(v):
+    return np.where(v <= 0.0031308, v * 12.92, 1.055 * v ** (1 / 2.4) - 0.055)
+
+
+def write_cube(path, size, fn, header=""):
+    axis = np.linspace(0.0, 1.0, size)
+    lines = [header, f"LUT_3D_SIZE {size}"]
+    for b in axis:
+        for g in axis:
+            for r in axis:
+                lines.append("%.6f %.6f %.6f" % fn(r, g, b))
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+class TestTransferLuts(unittest.TestCase):
+    def test_tables_match_transfer_functions(self):
+        codes = np.arange(256, dtype=np.uint8)
+        np.testing.assert_allclose(srgb_to_linear(codes), decode(codes / 255.0), atol=1e-6)
+        x = np.linspace(0.0, 1.0, 10001)
+        np.testing.assert_allclose(srgb_to_linear(x.astype(np.float32)), decode(x), atol=2e-4)
+        np.testing.assert_allclose(linear_to_srgb(x.astype(np.float32)), encode(x), atol=2e-3)
+        half = x.astype(np.float16)
+        np.testing.assert_allclose(linear_to_srgb(half).astype(np.float64), encode(half.astype(np.float64)), atol=1e-3)
+
+    def test_eight_bit_round_trip_is_lossless(self):
+        codes = np.arange(256, dtype=np.uint8)
+        linear = srgb_to_linear(codes).astype(np.float16)
+        np.testing.assert_array_equal(linear_to_srgb8(linear), codes)
+
+    def test_nodes_round_trip_and_tile(self):
+        graph = Graph(Node.from_json(n) for n in [
+            {"id": "bg", "type": "solid_color", "params": {"color": "#3366cc", "width": 40, "height": 30}},
+            {"id": "lin", "type": "srgb_to_linear", "inputs": {"image": "ref://bg"}},
+            {"id": "back", "type": "linear_to_srgb", "inputs": {"image": "ref://lin"}},
+        ])
+        ev = Evaluator(graph)
+        out = ev.evaluate(["back"])
+        self.assertEqual(out["lin"].dtype, np.float16)
+        self.assertTrue(np.all(materialize(out["back"]) == (0x33, 0x66, 0xCC, 255)))
+        region = Evaluator(graph).evaluate_region("back", (5, 5, 20, 10), tile_size=16)
+        np.testing.assert_array_equal(region, materialize(out["back"])[5:15, 5:25])
+
+    def test_linear_to_srgb_converts_rgba8_input(self):
+        graph = Graph(Node.from_json(n) for n in [
+            {"id": "bg", "type": "solid_color", "params": {"color": [200, 100, 50, 128], "width": 24, "height": 20}},
+            {"id": "enc", "type": "linear_to_srgb", "inputs": {"image": "ref://bg"}},
+        ])
+        expected = np.round(encode(np.array([200, 100, 50]) / 255.0) * 255.0)
+        out = materialize(Evaluator(graph).evaluate(["enc"])["enc"])
+        np.testing.assert_allclose(out[..., :3], np.broadcast_to(expected, (20, 24, 3)), atol=1)
+        self.assertTrue(np.all(out[..., 3] == 128))
+        region = Evaluator(graph).evaluate_region("enc", (3, 2, 16, 12), tile_size=8)
+        np.testing.assert_array_equal(region, out[2:14, 3:19])
+
+
+class TestCubeLut(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_identity_and_swizzle(self):
+        write_cube(self.dir / "id.cube", 2, lambda r, g, b: (r, g, b), 'TITLE "identity"')
+        write_cube(self.dir / "swap.cube", 5, lambda r, g, b: (b, g, r))
+        rgb = np.random.default_rng(0).random((16, 16, 3)).astype(np.float32)
+        ident = parse_cube(self.dir / "id.cube")
+        self.assertEqual(ident.title, "identity")
+        np.testing.assert_allclose(ident.apply(rgb), rgb, atol=1e-6)
+        np.testing.assert_allclose(parse_cube(self.dir / "swap.cube").apply(rgb), rgb[..., ::-1], atol=1e-6)
+
+    def test_trilinear_between_lattice_points(self):
+        write_cube(self.dir / "sq.cube", 3, lambda r, g, b: (r * r, g * b, 1.0 - b))
+        lut = parse_cube(self.dir / "sq.cube")
+        np.testing.assert_allclose(lut.apply(np.array([[0.5, 1.0, 0.5]], np.float32)), [[0.25, 0.5, 0.5]], atol=1e-6)
+        # Halfway between r=0.5 (0.25) and r=1 (1.0) interpolates linearly
+        np.testing.assert_allclose(lut.apply(np.array([[0.75, 0.0, 0.0]], np.float32)), [[0.625, 0.0, 1.0]], atol=1e-6)
+
+    def test_node_keeps_constants_lazy(self):
+        write_cube(self.dir / "inv.cube", 2, lambda r, g, b: (1 - r, 1 - g, 1 - b))
+        path = str(self.dir / "inv.cube")
+        graph = Graph(Node.from_json(n) for n in [
+            {"id": "bg", "type": "solid_color", "params": {"color": "#ff0000", "width": 4096, "height": 4096}},
+            {"id": "grade", "type": "color_lut", "inputs": {"image": "ref://bg"}, "params": {"path": path}},
+        ])
+        out = Evaluator(graph).evaluate(["grade"])["grade"]
+        self.assertEqual(out, ConstantImage(4096, 4096, (0, 255, 255, 255)))
+        self.assertIs(load_cube(path), load_cube(path))
+
+    def test_rejects_bad_files(self):
+        (self.dir / "short.cube").write_text("LUT_3D_SIZE 2\n0 0 0\n", encoding="utf-8")
+        (self.dir / "one.cube").write_text("LUT_1D_SIZE 2\n0 0 0\n1 1 1\n", encoding="utf-8")
+        for name in ("short.cube", "one.cube"):
+            with self.assertRaises(CubeError):
+                parse_cube(self.dir / name)
+
+
+if __name__ == "__main__":
+    unittest.main()
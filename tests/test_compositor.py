@@ -0,0 +1,86 @@
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from node_engine.compositor import (
+    BLEND_MODES,
+    CompositeStats,
+    LayerInput,
+    blend,
+    blend_rgba8,
+    composite,
+    from_premultiplied,
+    to_premultiplied,
+)
+from node_engine.document import load_document
+from node_engine.image import ConstantImage
+from node_engine.render import render_document
+
+
+def px(*rgba):
+    return np.array(rgba, dtype=np.uint8).reshape(1, 1, 4)
+
+
+class TestBlendModes(unittest.TestCase):
+    def test_opaque_modes_match_reference(self):
+        b, s = px(200, 100, 50, 255), px(100, 150, 250, 255)
+        fb, fs = b[..., :3] / 255.0, s[..., :3] / 255.0
+        reference = {
+            "normal": fs,
+            "multiply": fb * fs,
+            "screen": fb + fs - fb * fs,
+            "overlay": np.where(fb <= 0.5, 2 * fb * fs, 1 - 2 * (1 - fb) * (1 - fs)),
+            "add": np.minimum(1.0, fb + fs),
+            "difference": np.abs(fb - fs),
+        }
+        for mode in BLEND_MODES:
+            out = blend_rgba8(b, s, mode)
+            expected = np.round(reference[mode] * 255).astype(np.int16)
+            self.assertTrue(np.all(np.abs(out[..., :3].astype(np.int16) - expected) <= 1), mode)
+            self.assertEqual(out[0, 0, 3], 255)
+
+    def test_transparent_backdrop_is_identity(self):
+        s = px(10, 20, 30, 128)
+        for mode in BLEND_MODES:
+            np.testing.assert_array_equal(blend_rgba8(px(0, 0, 0, 0), s, mode), s)
+
+    def test_premultiplied_round_trip(self):
+        rng = np.random.default_rng(1)
+        img = rng.integers(0, 256, (16, 16, 4), dtype=np.uint8)
+        img[..., 3] = 255
+        np.testing.assert_array_equal(from_premultiplied(to_premultiplied(img)), img)
+
+
+class TestComposite(unittest.TestCase):
+    def test_tiled_composite_matches_naive(self):
+        rng = np.random.default_rng(7)
+        layers = [LayerInput(rng.integers(0, 256, (70, 90, 4), dtype=np.uint8), 1.0, "normal")]
+        for mode in BLEND_MODES:
+            layers.append(LayerInput(rng.integers(0, 256, (70, 90, 4), dtype=np.uint8), 0.6, mode))
+        acc = to_premultiplied(layers[0].image)
+        for layer in layers[1:]:
+            acc = blend(acc, to_premultiplied(layer.image) * layer.opacity, layer.blend)
+        expected = from_premultiplied(acc)
+        out = composite(layers, 90, 70, tile_size=32)
+        self.assertLessEqual(int(np.abs(out.astype(np.int16) - expected).max()), 1)
+
+    def test_skips_transparent_and_covered_tiles(self):
+        layers = [
+            LayerInput(ConstantImage(512, 512, (255, 0, 0, 255))),
+            LayerInput(ConstantImage(512, 512, (0, 255, 0, 255))),
+            LayerInput(ConstantImage(512, 512, (0, 0, 255, 0)), blend="multiply"),
+        ]
+        stats = CompositeStats()
+        out = composite(layers, 512, 512, tile_size=256, stats=stats)
+        self.assertEqual(tuple(out[300, 300]), (0, 255, 0, 255))
+        self.assertEqual((stats.tiles, stats.skipped_transparent, stats.skipped_covered), (4, 4, 4))
+
+    def test_render_example_document(self):
+        out = render_document(load_document(Path("examples/basic.vxdoc")))
+        self.assertEqual(out.shape, (64, 64, 4))
+        self.assertEqual(tuple(out[0, 0]), (255, 0, 255, 255))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import io
+import struct
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from cli.vxcli import main as vxcli_main
+from node_engine.cache import NodeCache
+from node_engine.document import Document, Layer, load_document
+from node_engine.evaluator import Evaluator
+from node_engine.export import PNGWriter, export_document
+from node_engine.graph import Graph, Node
+from node_engine.render import band_budget, pixel_bytes, render_document
+from plugins.examples.blur_plus import plugin as blur
+
+
+def decode_png(data):
+    """Minimal RGBA8 decoder for the filters PNGWriter emits (None/Up)."""
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    pos, idat = 8, b""
+    while pos < len(data):
+        (length,) = struct.unpack(">I", data[pos:pos + 4])
+        kind, body = data[pos + 4:pos + 8], data[pos + 8:pos + 8 + length]
+        if kind == b"IHDR":
+            width, height = struct.unpack(">II", body[:8])
+        elif kind == b"IDAT":
+            idat += body
+        pos += 12 + length
+    raw = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(height, width * 4 + 1)
+    out = np.zeros((height, width * 4), dtype=np.uint8)
+    prev = np.zeros(width * 4, dtype=np.uint8)
+    for y in range(height):
+        row = raw[y, 1:] + (prev if raw[y, 0] == 2 else 0)
+        out[y] = prev = row
+    return out.reshape(height, width, 4)
+
+
+def banded_document(width, height):
+    nodes = [
+        {"id": "bg", "type": "solid_color", "params": {"color": "#203040", "width": width, "height": height}},
+        {"id": "fill", "type": "solid_color", "params": {"color": "#ff8800", "width": width // 2, "height": height}},
+        {"id": "blur", "type": "blur_plus", "inputs": {"image": "ref://fill"}, "params": {"radius": 2}},
+        {"id": "fade", "type": "opacity", "inputs": {"image": "ref://blur"}, "params": {"opacity": 0.5}},
+    ]
+    graph = Graph(Node.from_json(n) for n in nodes)
+    layers = [Layer("l0", "bg"), Layer("l1", "fade", blend="multiply")]
+    return Document(Path("<memory>"), {}, graph, layers)
+
+
+class TestExport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            blur.register_plugin()
+        except ValueError:
+            pass
+
+    def test_png_writer_round_trip(self):
+        rng = np.random.default_rng(3)
+        img = rng.integers(0, 256, (37, 21, 4), dtype=np.uint8)
+        buf = io.BytesIO()
+        writer = PNGWriter(buf, 21, 37)
+        for y in range(0, 37, 10):
+            writer.write(img[y:y + 10])
+        writer.close()
+        np.testing.assert_array_equal(decode_png(buf.getvalue()), img)
+
+    def test_banded_export_matches_render(self):
+        doc = banded_document(300, 170)
+        expected = render_document(doc)
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "out.png"
+            self.assertEqual(export_document(doc, out, band_height=48, tile_size=64), (300, 170))
+            np.testing.assert_array_equal(decode_png(out.read_bytes()), expected)
+            raw = Path(tmp) / "out.rgba"
+            export_document(doc, raw, band_height=64, tile_size=64)
+            np.testing.assert_array_equal(np.fromfile(raw, dtype=np.uint8).reshape(170, 300, 4), expected)
+
+    def test_tile_memory_bounded_by_band(self):
+        doc = banded_document(256, 4096)
+        cache = NodeCache(budget_bytes=2 * 256 * 64 * 4 * len(doc.graph))
+        with tempfile.TemporaryDirectory() as tmp:
+            export_document(doc, Path(tmp) / "tall.raw", band_height=64, tile_size=64,
+                            evaluator=Evaluator(doc.graph, cache=cache))
+        stats = cache.stats()
+        self.assertGreater(stats.evictions, 0)
+        self.assertLessEqual(stats.bytes, stats.budget_bytes)
+
+    def test_budget_follows_widest_format(self):
+        doc = banded_document(64, 64)
+        self.assertEqual(pixel_bytes(doc.graph), 8)  # blur_plus tiles are rgba16f
+        self.assertEqual(pixel_bytes(Graph([doc.graph["bg"]])), 4)
+        self.assertEqual(band_budget(64, 2, 16, pixel_bytes(doc.graph)), 2 * band_budget(64, 2, 16))
+
+    def test_cli_render(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "basic.png"
+            self.assertEqual(vxcli_main(["render", "examples/basic.vxdoc", "-o", str(out), "--band-height", "16"]), 0)
+            expected = render_document(load_document(Path("examples/basic.vxdoc")))
+            np.testing.assert_array_equal(decode_png(out.read_bytes()), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+import numpy as np
+
+from node_engine.compositor import LayerInput, composite
+from node_engine.evaluator import Evaluator
+from node_engine.formats import RGBA8, RGBA16F, RGBA32F, FormatView, as_format, check_output, convert
+from node_engine.graph import Graph, Node
+from node_engine.image import ConstantImage, materialize
+from node_engine.nodes import register_node
+from node_engine.optimizer import optimize
+from plugins.examples.blur_plus import plugin as blur
+
+
+def make_graph(*nodes):
+    return Graph(Node.from_json(n) for n in nodes)
+
+
+def blur_stack():
+    return make_graph(
+        {"id": "bg", "type": "solid_color", "params": {"color": "#336699", "width": 96, "height": 64}},
+        {"id": "blur1", "type": "blur_plus", "inputs": {"image": "ref://bg"}, "params": {"radius": 2}},
+        {"id": "blur2", "type": "blur_plus", "inputs": {"image": "ref://blur1"}, "params": {"radius": 5}},
+        {"id": "fade", "type": "opacity", "inputs": {"image": "ref://blur2"}, "params": {"opacity": 0.5}},
+        {"id": "out", "type": "compose", "inputs": {"a": "ref://bg", "b": "ref://fade"}},
+    )
+
+
+class TestFormats(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            blur.register_plugin()
+        except ValueError:
+            pass
+
+    def test_conversion_round_trip(self):
+        rng = np.random.default_rng(2)
+        img = rng.integers(0, 256, (8, 8, 4), dtype=np.uint8)
+        img[..., 3] = 255
+        for fmt in (RGBA16F, RGBA32F):
+            converted = convert(img, fmt)
+            self.assertEqual(converted.dtype, np.float16 if fmt == RGBA16F else np.float32)
+            np.testing.assert_array_equal(convert(converted, RGBA8), img)
+        self.assertIs(convert(img, RGBA8), img)
+
+    def test_lazy_inputs_convert_on_read(self):
+        view = as_format(ConstantImage(1000, 1000, (255, 0, 0, 128)), RGBA32F)
+        self.assertIsInstance(view, FormatView)
+        px = materialize(view, (10, 10, 1, 1))
+        np.testing.assert_allclose(px.ravel(), [128 / 255, 0, 0, 128 / 255], rtol=1e-6)
+
+    def test_outputs_stay_in_node_format(self):
+        ev = Evaluator(blur_stack())
+        outputs = ev.evaluate(["out"])
+        self.assertEqual(outputs["blur1"].dtype, np.float16)
+        self.assertEqual(outputs["blur2"].dtype, np.float16)
+        self.assertEqual(outputs["fade"].dtype, np.uint8)
+        region = Evaluator(blur_stack()).evaluate_region("out", (7, 9, 50, 40), tile_size=32)
+        np.testing.assert_array_equal(region, materialize(outputs["out"])[9:49, 7:57])
+
+    def test_fused_node_reads_float_inputs_directly(self):
+        g = blur_stack()
+        res = optimize(g, ["out"])
+        self.assertEqual(res.graph["out"].type, "fused_pointwise")
+        got = materialize(Evaluator(res.graph).evaluate(["out"])["out"])
+        expected = materialize(Evaluator(g).evaluate(["out"])["out"])
+        self.assertLessEqual(int(np.abs(got.astype(np.int16) - expected).max()), 1)
+
+    def test_float_node_output_is_converted(self):
+        @register_node("test_float_fill", format=RGBA32F)
+        def fill(inputs, params):
+            return np.full((4, 4, 4), 255, dtype=np.uint8)
+
+        self.assertEqual(check_output(np.zeros((2, 2, 4), np.float64), RGBA16F).dtype, np.float16)
+        g = make_graph({"id": "f", "type": "test_float_fill"})
+        out = Evaluator(g).evaluate()["f"]
+        self.assertEqual(out.dtype, np.float32)
+        self.assertTrue(np.all(out == 1.0))
+        with self.assertRaises(ValueError):
+            register_node("test_bad_format", format="rgb565")(fill)
+
+    def test_composite_float_layer(self):
+        rng = np.random.default_rng(4)
+        base = rng.integers(0, 256, (40, 40, 4), dtype=np.uint8)
+        top = rng.integers(0, 256, (40, 40, 4), dtype=np.uint8)
+        as_float = [LayerInput(base), LayerInput(convert(top, RGBA16F), 0.7, "screen")]
+        as_bytes = [LayerInput(base), LayerInput(top, 0.7, "screen")]
+        a = composite(as_float, 40, 40, tile_size=16).astype(np.int16)
+        b = composite(as_bytes, 40, 40, tile_size=16)
+        self.assertLessEqual(int(np.abs(a - b).max()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+import numpy as np
+
+from node_engine.evaluator import EvalError, Evaluator
+from node_engine.graph import Graph, Node
+from node_engine.image import materialize
+from node_engine.noise import fbm, perlin, pixel_centres, simplex
+from node_engine.optimizer import optimize
+from node_engine.tiles import TiledImage
+
+SIZE = {"width": 96, "height": 64}
+
+
+def generator_graph():
+    return Graph([
+        Node("noise", "noise", {**SIZE, "scale": 13, "seed": 7}),
+        Node("clouds", "fbm", {**SIZE, "kind": "simplex", "scale": 40, "seed": 3}),
+        Node("ramp", "linear_gradient", {**SIZE, "start": [0, 0], "end": [96, 0], "spread": "reflect"}),
+        Node("spot", "radial_gradient", {**SIZE, "radius": 20, "stops": [[0, "#ff0000"], [1, [0, 0, 255, 0]]]}),
+        Node("board", "checker", {**SIZE, "cell": 5}),
+    ])
+
+
+class TestNoise(unittest.TestCase):
+    def test_range_and_determinism(self):
+        x, y = pixel_centres((0, 0, 64, 64))
+        for noise in (perlin, simplex):
+            a = noise(x / 9.0, y / 9.0, 1)
+            self.assertLessEqual(np.abs(a).max(), 1.0)
+            self.assertGreater(a.std(), 0.1)
+            np.testing.assert_array_equal(a, noise(x / 9.0, y / 9.0, 1))
+            self.assertFalse(np.array_equal(a, noise(x / 9.0, y / 9.0, 2)))
+        with self.assertRaises(ValueError):
+            fbm(x, y, kind="worley")
+        with self.assertRaises(ValueError):
+            fbm(x, y, octaves=0)
+
+    def test_lattice_points_are_zero(self):
+        x = np.arange(-4.0, 4.0)[None, :]
+        y = np.arange(-4.0, 4.0)[:, None]
+        np.testing.assert_array_equal(perlin(x, y, 5), 0.0)
+
+
+class TestGeneratorNodes(unittest.TestCase):
+    def test_tiles_match_whole_image(self):
+        whole = Evaluator(generator_graph()).evaluate()
+        tiled = Evaluator(generator_graph())
+        for nid, img in whole.items():
+            full = materialize(img)
+            self.assertEqual(full.shape, (64, 96, 4))
+            view = tiled.view(nid, tile_size=24)
+            self.assertIsInstance(view, TiledImage)
+            np.testing.assert_array_equal(materialize(view), full)
+            region = tiled.evaluate_region(nid, (17, 9, 30, 41))
+            np.testing.assert_array_equal(materialize(region), full[9:50, 17:47])
+
+    def test_gradients(self):
+        out = {nid: materialize(img) for nid, img in Evaluator(generator_graph()).evaluate().items()}
+        ramp = out["ramp"]
+        self.assertLess(ramp[0, 0, 0], 3)
+        self.assertGreater(ramp[0, 95, 0], 252)
+        np.testing.assert_array_equal(ramp[0], ramp[63])
+        spot = out["spot"]
+        self.assertGreater(spot[32, 48, 0], 240)
+        self.assertGreater(spot[32, 48, 3], 240)
+        np.testing.assert_array_equal(spot[0, 0], [0, 0, 255, 0])
+        board = out["board"]
+        np.testing.assert_array_equal(board[0, 0], [204, 204, 204, 255])
+        np.testing.assert_array_equal(board[0, 5], [255, 255, 255, 255])
+        np.testing.assert_array_equal(board[5, 5], board[0, 0])
+
+    def test_seed_changes_noise(self):
+        g = Graph([Node("a", "noise", {**SIZE, "seed": 1}), Node("b", "noise", {**SIZE, "seed": 2})])
+        out = Evaluator(g).evaluate()
+        self.assertFalse(np.array_equal(materialize(out["a"]), materialize(out["b"])))
+
+    def test_bad_params(self):
+        for node in (Node("n", "noise", {"kind": "worley"}), Node("n", "noise", {"scale": 0}),
+                     Node("n", "checker", {"cell": 0}), Node("n", "linear_gradient", {"start": [1, 1], "end": [1, 1]}),
+                     Node("n", "radial_gradient", {"spread": "mirror"}), Node("n", "fbm", {"stops": [[0]]})):
+            with self.assertRaises(EvalError):
+                Evaluator(Graph([node])).evaluate()
+
+    def test_optimizer_leaves_generators(self):
+        result = optimize(generator_graph(), ["noise", "board"])
+        self.assertEqual(result.folded, [])
+        self.assertEqual(result.graph["noise"].type, "noise")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from cli.vxcli import main as vxcli_main
+from node_engine.cache import DiskCache, NodeCache, node_key
+from node_engine.evaluator import Evaluator
+from node_engine.graph import Graph, Node
+from node_engine.image import ConstantImage, PatchImage, materialize
+from node_engine.tiles import TiledImage
+from plugins.examples.blur_plus import plugin as blur
+
+
+def make_graph(*nodes):
+    return Graph(Node.from_json(n) for n in nodes)
+
+
+def layered_graph(opacity):
+    return make_graph(
+        {"id": "bg", "type": "solid_color", "params": {"color": "#ffffff", "width": 8, "height": 8}},
+        {"id": "fg", "type": "solid_color", "params": {"color": "#ff0000", "width": 8, "height": 8}},
+        {"id": "fade", "type": "opacity", "inputs": {"image": "ref://fg"}, "params": {"opacity": opacity}},
+        {"id": "out", "type": "compose", "inputs": {"a": "ref://bg", "b": "ref://fade"}},
+    )
+
+
+class TestNodeCache(unittest.TestCase):
+    def test_key_ignores_param_order_and_tracks_inputs(self):
+        k1 = node_key("opacity", {"a": 1, "b": 2}, {"image": "x"})
+        k2 = node_key("opacity", {"b": 2, "a": 1}, {"image": "x"})
+        self.assertEqual(k1, k2)
+        self.assertNotEqual(k1, node_key("opacity", {"a": 1, "b": 2}, {"image": "y"}))
+
+    def test_lru_eviction_under_budget(self):
+        buf = np.zeros((4, 4, 4), dtype=np.uint8)  # 64 bytes
+        cache = NodeCache(budget_bytes=128)
+        cache.put("a", buf.copy())
+        cache.put("b", buf.copy())
+        self.assertIsNotNone(cache.get("a"))  # a becomes most recent
+        cache.put("c", buf.copy())
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.evictions, stats.entries, stats.bytes), (1, 1, 2, 128))
+
+    def test_pinned_tiles_outlive_the_budget(self):
+        buf = np.zeros((4, 4, 4), dtype=np.uint8)  # 64 bytes
+        cache = NodeCache(budget_bytes=64)
+        cache.put("k@4:0,0", buf.copy())
+        cache.pin(["k"])  # moves what is already cached
+        cache.put("k@4:0,1", buf.copy())
+        for i in range(3):
+            cache.put(f"other{i}", buf.copy())
+        self.assertIn("k@4:0,0", cache)
+        self.assertIn("k@4:0,1", cache)
+        stats = cache.stats()
+        self.assertEqual((stats.bytes, stats.pinned_bytes, stats.evictions), (64, 128, 2))
+        cache.unpin(["k"])
+        self.assertNotIn("k@4:0,0", cache)
+        self.assertEqual(cache.stats().pinned_bytes, 0)
+        cache.put("k@4:0,0", buf.copy())
+        self.assertNotIn("other2", cache)  # back under the LRU
+
+    def test_rerender_reuses_unchanged_subgraphs(self):
+        cache = NodeCache()
+        Evaluator(layered_graph(0.5), cache=cache).evaluate(["out"])
+        ev = Evaluator(layered_graph(0.25), cache=cache)
+        ev.evaluate(["out"])
+        # Only the edited opacity node and its consumer ran again
+        self.assertEqual(set(ev.timings), {"fade", "out"})
+        ev = Evaluator(layered_graph(0.25), cache=cache)
+        outputs = ev.evaluate(["out"])
+        self.assertEqual(ev.timings, {})
+        self.assertEqual(set(outputs), {"out"})
+        self.assertGreater(cache.stats().hit_rate, 0.0)
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_round_trip_survives_restart(self):
+        rng = np.random.default_rng(1)
+        arr = rng.integers(0, 256, (5, 7, 4), dtype=np.uint8)
+        half = rng.random((3, 2, 4)).astype(np.float16)
+        patch = PatchImage(ConstantImage(20, 10, (1, 2, 3, 4)), arr, 3, 2)
+        disk = DiskCache(self.root)
+        for key, img in (("a", arr), ("h", half), ("c", ConstantImage(9, 8, (5, 6, 7, 8))), ("p", patch)):
+            self.assertTrue(disk.put(key, img))
+        self.assertFalse(disk.put("lazy", TiledImage(4, 4, lambda rect: arr)))  # only stored materialized
+
+        reopened = DiskCache(self.root)
+        self.assertEqual(len(reopened), 4)
+        got = reopened.get("a")
+        np.testing.assert_array_equal(got, arr)
+        self.assertFalse(got.flags.writeable)
+        self.assertEqual(reopened.get("h").dtype, np.float16)
+        self.assertEqual(reopened.get("c"), ConstantImage(9, 8, (5, 6, 7, 8)))
+        np.testing.assert_array_equal(materialize(reopened.get("p")), materialize(patch))
+        self.assertIsNone(reopened.get("missing"))
+        self.assertEqual((reopened.stats().hits, reopened.stats().misses), (4, 1))
+
+    def test_size_eviction_is_lru(self):
+        buf = np.zeros((4, 4, 4), dtype=np.uint8)  # 64 bytes + 64 byte header
+        disk = DiskCache(self.root, budget_bytes=3 * 128)
+        for key in "abc":
+            disk.put(key, buf)
+        self.assertIsNotNone(disk.get("a"))
+        disk.put("d", buf)
+        self.assertEqual([k in disk for k in "abcd"], [True, False, True, True])
+        self.assertLessEqual(disk.stats().bytes, 3 * 128)
+        self.assertEqual(len(DiskCache(self.root, budget_bytes=3 * 128)), 3)
+
+    def test_corrupt_entry_is_a_miss(self):
+        disk = DiskCache(self.root)
+        disk.put("a", np.zeros((2, 2, 4), dtype=np.uint8))
+        (path,) = [p for p in disk.root.rglob("*.vxc")]
+        path.write_bytes(path.read_bytes()[:70])
+        self.assertIsNone(DiskCache(self.root).get("a"))
+
+    def test_fresh_process_reuses_disk_results(self):
+        graph = lambda: layered_graph(0.5)  # noqa: E731
+        cache = NodeCache(disk=DiskCache(self.root))
+        Evaluator(graph(), cache=cache).evaluate(["out"])
+        cache = NodeCache(disk=DiskCache(self.root))  # as after a restart
+        ev = Evaluator(graph(), cache=cache)
+        outputs = ev.evaluate(["out"])
+        self.assertEqual(ev.timings, {})
+        self.assertEqual(materialize(outputs["out"]).shape, (8, 8, 4))
+        self.assertEqual(cache.stats().disk_hits, 1)
+
+    def test_plugin_version_is_part_of_the_key(self):
+        try:
+            blur.register_plugin()
+        except ValueError:
+            pass
+        g = make_graph(
+            {"id": "bg", "type": "solid_color", "params": {"width": 8, "height": 8}},
+            {"id": "soft", "type": "blur_plus", "inputs": {"image": "ref://bg"}, "params": {"radius": 1}},
+        )
+        ev = Evaluator(g)
+        ev.evaluate()
+        self.assertEqual(ev.keys["soft"], node_key("blur_plus@1.0.0", {"radius": 1}, {"image": ev.keys["bg"]}))
+
+    def test_cli_render_reuses_cache_dir(self):
+        cache_dir = str(self.root / "cache")
+        out = str(self.root / "basic.raw")
+        args = ["render", "examples/basic.vxdoc", "-o", out, "--cache-dir", cache_dir]
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(vxcli_main(args), 0)
+        first = Path(out).read_bytes()
+        os.remove(out)
+        buf = io.StringIO()
+        with contextlib.redirect_stdout(buf):
+            self.assertEqual(vxcli_main(args), 0)
+        self.assertEqual(Path(out).read_bytes(), first)
+        self.assertRegex(buf.getvalue(), r"disk cache: [1-9]\d* hits, 0 misses")
+
+
+if __name__ == "__main__":
+    unittest.main()
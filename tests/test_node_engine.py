@@ -0,0 +1,122 @@
+import unittest
+from pathlib import Path
+
+from node_engine.document import load_document
+from node_engine.evaluator import Evaluator, evaluate_path
+from node_engine.graph import Graph, GraphError, Node
+from node_engine.image import ConstantImage, PatchImage, materialize
+
+
+def make_graph(*nodes):
+    return Graph(Node.from_json(n) for n in nodes)
+
+
+RED = {"id": "red", "type": "solid_color", "params": {"color": "#ff0000", "width": 8, "height": 4}}
+BLUE = {"id": "blue", "type": "solid_color", "params": {"color": "#0000ff", "width": 8, "height": 4}}
+
+
+class TestEvaluator(unittest.TestCase):
+    def test_example_vxdoc_renders(self):
+        outputs = evaluate_path(Path("examples/basic.vxdoc"))
+        img = materialize(outputs["node-1"])
+        self.assertEqual(img.shape, (64, 64, 4))
+        self.assertTrue(img.flags["C_CONTIGUOUS"])
+        self.assertEqual(tuple(img[10, 10]), (255, 0, 255, 255))
+
+    def test_compose_with_opacity(self):
+        g = make_graph(
+            RED,
+            BLUE,
+            {"id": "half", "type": "opacity", "inputs": {"image": "ref://blue"}, "params": {"opacity": 0.5}},
+            {"id": "out", "type": "compose", "inputs": {"a": "ref://red", "b": "ref://half"}},
+        )
+        ev = Evaluator(g)
+        out = ev.evaluate(["out"])["out"]
+        self.assertIsInstance(out, ConstantImage)
+        self.assertEqual(tuple(materialize(out)[0, 0]), (127, 0, 128, 255))
+        self.assertEqual(set(ev.timings), {"red", "blue", "half", "out"})
+
+    def test_detail_over_huge_fill_stays_lazy(self):
+        g = make_graph(
+            {"id": "bg", "type": "solid_color", "params": {"color": "#ffffff", "width": 16384, "height": 16384}},
+            {"id": "detail", "type": "compose", "inputs": {"a": "ref://red", "b": "ref://blue"}},
+            {"id": "fade", "type": "opacity", "inputs": {"image": "ref://detail"}, "params": {"opacity": 0.5}},
+            {"id": "out", "type": "compose", "inputs": {"a": "ref://bg", "b": "ref://fade"}},
+            {**RED, "params": {**RED["params"], "width": 16, "height": 16}},
+            BLUE,
+        )
+        out = Evaluator(g).evaluate(["out"])["out"]
+        self.assertIsInstance(out, PatchImage)
+        self.assertLess(out.nbytes, 4096)
+        px = materialize(out, (0, 0, 20, 20))
+        self.assertEqual(px.shape, (20, 20, 4))
+        self.assertEqual(tuple(px[0, 0]), (127, 127, 255, 255))
+        self.assertEqual(tuple(px[10, 10]), (255, 127, 127, 255))
+        self.assertEqual(tuple(px[19, 19]), (255, 255, 255, 255))
+
+    def test_topo_order_and_cycles(self):
+        g = make_graph(
+            {"id": "c", "type": "opacity", "inputs": {"image": "ref://b"}},
+            {"id": "b", "type": "opacity", "inputs": {"image": "ref://a"}},
+            {"id": "a", "type": "solid_color"},
+        )
+        self.assertEqual(g.topo_order(), ["a", "b", "c"])
+        g.nodes["a"].inputs["image"] = "c"
+        with self.assertRaises(GraphError):
+            g.topo_order()
+
+    def test_rejects_missing_inputs(self):
+        g = make_graph(RED, {"id": "out", "type": "compose", "inputs": {"a": "ref://red"}})
+        with self.assertRaises(GraphError):
+            Evaluator(g).evaluate()
+        with self.assertRaises(GraphError):
+            make_graph({"id": "x", "type": "opacity", "inputs": {"image": "ref://nope"}}).topo_order()
+
+    def test_load_document_layers(self):
+        doc = load_document(Path("examples/basic.vxdoc"))
+        self.assertEqual([l.source_node for l in doc.layers], ["node-1"])
+
+
+def wide_graph(n):
+    """``n`` faded layers stacked onto a background, one compose per layer."""
+    nodes = [{"id": "bg", "type": "solid_color", "params": {"color": "#000000", "width": 8, "height": 8}}]
+    prev = "bg"
+    for i in range(n):
+        nodes.append({"id": f"fill-{i}", "type": "solid_color", "params": {"color": "#ff0000", "width": 8, "height": 8}})
+        nodes.append({"id": f"fade-{i}", "type": "opacity", "inputs": {"image": f"ref://fill-{i}"}, "params": {"opacity": 0.1}})
+        nodes.append({"id": f"stack-{i}", "type": "compose", "inputs": {"a": f"ref://{prev}", "b": f"ref://fade-{i}"}})
+        prev = f"stack-{i}"
+    return make_graph(*nodes)
+
+
+class TestDirtyPropagation(unittest.TestCase):
+    def test_param_edit_recomputes_only_downstream(self):
+        ev = Evaluator(wide_graph(70))
+        ev.evaluate()
+        self.assertEqual(len(ev.last_recomputed), 211)
+        affected = ev.set_params("fade-60", {"opacity": 0.9})
+        self.assertEqual(ev.dirty, affected)
+        ev.evaluate()
+        expected = ["fade-60"] + [f"stack-{i}" for i in range(60, 70)]
+        self.assertEqual(ev.last_recomputed, expected)
+        ev.evaluate()
+        self.assertEqual(ev.last_recomputed, [])
+
+    def test_unchanged_edit_is_a_no_op(self):
+        ev = Evaluator(wide_graph(3))
+        ev.evaluate()
+        self.assertEqual(ev.set_params("fade-1", {"opacity": 0.1}), set())
+
+    def test_sync_reloaded_graph(self):
+        ev = Evaluator(wide_graph(5))
+        ev.evaluate()
+        edited = wide_graph(5)
+        edited.nodes["fill-4"].params["color"] = "#00ff00"
+        self.assertEqual(ev.sync(edited), {"fill-4", "fade-4", "stack-4"})
+        out = ev.evaluate(["stack-4"])
+        self.assertEqual(sorted(ev.last_recomputed), ["fade-4", "fill-4", "stack-4"])
+        self.assertEqual(materialize(out["stack-4"])[0, 0, 1], 26)
+
+
+if __name__ == "__main__":
+    unittest.main()
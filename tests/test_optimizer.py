@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+
+from node_engine.evaluator import Evaluator
+from node_engine.graph import Graph, Node
+from node_engine.image import materialize
+from node_engine.optimizer import optimize
+from plugins.examples.blur_plus import plugin as blur
+
+
+def make_graph(*nodes):
+    return Graph(Node.from_json(n) for n in nodes)
+
+
+def layer_stack(n):
+    """Blurred (array-valued) layers faded and stacked onto a background."""
+    nodes = [
+        {"id": "bg", "type": "solid_color", "params": {"color": "#102030", "width": 48, "height": 32}},
+        {"id": "base", "type": "blur_plus", "inputs": {"image": "ref://bg"}, "params": {"radius": 1}},
+    ]
+    prev = "base"
+    for i in range(n):
+        nodes += [
+            {"id": f"fill-{i}", "type": "solid_color", "params": {"color": f"#{40 * i:02x}80c0", "width": 40, "height": 32}},
+            {"id": f"blur-{i}", "type": "blur_plus", "inputs": {"image": f"ref://fill-{i}"}, "params": {"radius": 1}},
+            {"id": f"fade-{i}", "type": "opacity", "inputs": {"image": f"ref://blur-{i}"}, "params": {"opacity": 0.4}},
+            {"id": f"stack-{i}", "type": "compose", "inputs": {"a": f"ref://{prev}", "b": f"ref://fade-{i}"},
+             "params": {"mode": "multiply" if i % 2 else "normal"}},
+        ]
+        prev = f"stack-{i}"
+    return make_graph(*nodes), prev
+
+
+class TestOptimizer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            blur.register_plugin()
+        except ValueError:
+            pass
+
+    def test_folds_constants_and_drops_dead_nodes(self):
+        g = make_graph(
+            {"id": "a", "type": "solid_color", "params": {"color": "#ff0000", "width": 4, "height": 4}},
+            {"id": "b", "type": "solid_color", "params": {"color": "#0000ff", "width": 4, "height": 4}},
+            {"id": "half", "type": "opacity", "inputs": {"image": "ref://b"}, "params": {"opacity": 0.5}},
+            {"id": "out", "type": "compose", "inputs": {"a": "ref://a", "b": "ref://half"}},
+            {"id": "unused", "type": "solid_color"},
+        )
+        res = optimize(g, ["out"])
+        self.assertEqual(list(res.graph.nodes), ["out"])
+        self.assertEqual(res.graph["out"].type, "solid_color")
+        self.assertEqual(sorted(res.folded), ["half", "out"])
+        self.assertIn("unused", res.removed)
+        before = materialize(Evaluator(g).evaluate(["out"])["out"])
+        after = materialize(Evaluator(res.graph).evaluate(["out"])["out"])
+        np.testing.assert_array_equal(before, after)
+        self.assertIn("unused", g)  # input graph untouched
+
+    def test_fuses_layer_stack_into_one_pass(self):
+        g, out = layer_stack(4)
+        res = optimize(g, [out])
+        fused = res.graph[out]
+        self.assertEqual(fused.type, "fused_pointwise")
+        self.assertEqual(len(fused.params["program"]), 8)
+        self.assertEqual(list(fused.inputs)[0], "in0")
+        self.assertEqual(fused.inputs["in0"], "base")
+        expected = materialize(Evaluator(g).evaluate([out])[out])
+        got = materialize(Evaluator(res.graph).evaluate([out])[out])
+        self.assertEqual(got.shape, expected.shape)
+        self.assertLessEqual(int(np.abs(got.astype(np.int16) - expected).max()), 1)
+        region = Evaluator(res.graph).evaluate_region(out, (5, 3, 30, 20), tile_size=16)
+        np.testing.assert_array_equal(region, got[3:23, 5:35])
+
+    def test_roots_and_shared_nodes_are_not_absorbed(self):
+        g, out = layer_stack(3)
+        res = optimize(g, [out, "stack-0"])
+        self.assertIn("stack-0", res.graph)
+        self.assertEqual(sorted(res.fused[out]), ["fade-1", "fade-2", "stack-1"])
+        self.assertEqual(res.graph[out].inputs["in0"], "stack-0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+
+from cli.pack import AssetStore, PackError, file_digest, pack_document, unpack_document
+from cli.validate import check_document
+
+
+def asset_doc(path, assets):
+    shutil.copytree("examples/basic.vxdoc", path)
+    for rel, data in assets.items():
+        (path / "assets" / rel).parent.mkdir(parents=True, exist_ok=True)
+        (path / "assets" / rel).write_bytes(data)
+    return path
+
+
+class TestAssetStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.store = AssetStore(self.tmp / "store")
+
+    def test_dedupes_across_documents_and_revisions(self):
+        texture = os.urandom(50_000)
+        v1 = asset_doc(self.tmp / "v1.vxdoc", {"wood.bin": texture, "tex/stone.bin": b"stone"})
+        v2 = asset_doc(self.tmp / "v2.vxdoc", {"wood.bin": texture, "tex/stone.bin": b"stone2"})
+        first = pack_document(v1, self.store, self.tmp / "v1-packed.vxdoc")
+        second = pack_document(v2, self.store)
+        self.assertEqual((first.files, first.new_files), (2, 2))
+        self.assertEqual((second.files, second.new_files, second.new_bytes), (2, 1, 6))
+        objects = [p for p in (self.store.root).rglob("*") if p.is_file()]
+        self.assertEqual(len(objects), 3)
+
+        # Packed in place: assets moved out, manifest references them by hash
+        manifest = json.loads((v2 / "manifest.json").read_text())
+        self.assertEqual(manifest["assets"]["wood.bin"], {"sha256": file_digest(v1 / "assets" / "wood.bin")[0], "size": 50_000})
+        self.assertEqual(sorted(p.name for p in (v2 / "assets").iterdir()), [".gitkeep"])
+        self.assertTrue((v1 / "assets" / "wood.bin").exists())
+        self.assertEqual(sorted(p.name for p in (self.tmp / "v1-packed.vxdoc" / "assets").iterdir()), [".gitkeep"])
+        self.assertEqual(check_document(v2), [])
+
+    def test_unpack_round_trip(self):
+        doc = asset_doc(self.tmp / "doc.vxdoc", {"a.bin": b"a" * 1000, "sub/b.bin": b"b"})
+        pack_document(doc, self.store)
+        (doc / "assets" / "loose.bin").write_bytes(b"new")
+        for mode in ("auto", "hardlink", "copy"):
+            out = self.tmp / f"out-{mode}.vxdoc"
+            st = unpack_document(doc, self.store, out, mode=mode)
+            self.assertEqual(st.files, 2)
+            self.assertEqual((out / "assets" / "a.bin").read_bytes(), b"a" * 1000)
+            self.assertEqual((out / "assets" / "sub" / "b.bin").read_bytes(), b"b")
+            self.assertEqual((out / "assets" / "loose.bin").read_bytes(), b"new")
+            self.assertTrue((out / "assets" / ".gitkeep").exists())
+            self.assertNotIn("assets", json.loads((out / "manifest.json").read_text()))
+            self.assertEqual(check_document(out), [])
+        linked = self.tmp / "out-hardlink.vxdoc" / "assets" / "a.bin"
+        self.assertEqual(linked.stat().st_ino, self.store.path(file_digest(linked)[0]).stat().st_ino)
+        self.assertFalse(linked.stat().st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+    def test_errors(self):
+        doc = asset_doc(self.tmp / "doc.vxdoc", {"a.bin": b"a"})
+        pack_document(doc, self.store)
+        other = AssetStore(self.tmp / "other")
+        with self.assertRaises(PackError):
+            unpack_document(doc, other, self.tmp / "out.vxdoc")
+        self.assertFalse((self.tmp / "out.vxdoc").exists())
+        with self.assertRaises(PackError):
+            unpack_document(doc, self.store, self.tmp / "out.vxdoc", mode="symlink")
+        self.assertFalse((self.tmp / "out.vxdoc").exists())
+
+        manifest = json.loads((doc / "manifest.json").read_text())
+        manifest["assets"] = {"../../evil.bin": manifest["assets"]["a.bin"]}
+        (doc / "manifest.json").write_text(json.dumps(manifest))
+        with self.assertRaises(PackError):
+            unpack_document(doc, self.store, self.tmp / "out.vxdoc")
+        manifest["assets"] = {"a.bin": {"sha256": "nothex"}}
+        (doc / "manifest.json").write_text(json.dumps(manifest))
+        with self.assertRaises(PackError):
+            pack_document(doc, self.store)
+
+
+if __name__ == "__main__":
+    unittest.main()
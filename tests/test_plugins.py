@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from plugins.examples.blur_plus import plugin as blur
 from plugins.vx.registry import get_registry
 
@@ -16,6 +18,72 @@ class TestPluginRegistry(unittest.TestCase):
         self.assertIn("blur_plus", nodes)
 
 
+def reference_blur(img, sigma):
+    """Direct 2-D Gaussian of premultiplied colour with zero padding."""
+    r = int(np.ceil(3 * sigma))
+    x = np.arange(-r, r + 1)
+    k = np.exp(-0.5 * (x / sigma) ** 2)
+    k2 = np.outer(k, k) / k.sum() ** 2
+    a = img[..., 3:4].astype(np.float64) / 255.0
+    pm = np.concatenate([img[..., :3] * a, a * 255.0], axis=-1)
+    pad = np.pad(pm, ((r, r), (r, r), (0, 0)))
+    h, w = img.shape[:2]
+    acc = sum(k2[i, j] * pad[i:i + h, j:j + w] for i in range(2 * r + 1) for j in range(2 * r + 1))
+    alpha = acc[..., 3:4] / 255.0
+    rgb = np.divide(acc[..., :3], alpha, out=np.zeros_like(acc[..., :3]), where=alpha > 0)
+    return np.concatenate([rgb, acc[..., 3:4]], axis=-1)
+
+
+def pad_tile(img, rect, halo):
+    x, y, w, h = rect
+    out = np.zeros((h + 2 * halo, w + 2 * halo, 4), dtype=np.uint8)
+    src = np.pad(img, ((halo, halo), (halo, halo), (0, 0)))
+    out[:] = src[y:y + h + 2 * halo, x:x + w + 2 * halo]
+    return out
+
+
+class TestBlurPlus(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.img = rng.integers(0, 256, (60, 70, 4), dtype=np.uint8)
+        self.img[:10, :, 3] = 0  # transparent strip must not darken its neighbours
+
+    def test_small_radius_is_exact_gaussian(self):
+        out = blur.execute(self.img, 1.5).astype(np.float64)
+        self.assertLessEqual(np.abs(out - reference_blur(self.img, 1.5)).max(), 1.0)
+
+    def test_large_radius_approximates_gaussian(self):
+        smooth = np.zeros((120, 120, 4), dtype=np.uint8)
+        smooth[30:90, 30:90] = (200, 100, 50, 255)
+        out = blur.execute(smooth, 8).astype(np.float64)
+        ref = reference_blur(smooth, 8)
+        self.assertEqual(blur.box_sizes(8), [15, 15, 17])
+        self.assertLessEqual(np.abs(out[..., 3] - ref[..., 3]).max(), 8.0)
+        # Colour is flat wherever there is coverage: no dark fringe from transparency
+        covered = out[..., 3] > 0
+        self.assertLessEqual(np.abs(out[covered][:, :3] - (200, 100, 50)).max(), 1.0)
+
+    def test_tiles_with_halo_match_whole_image(self):
+        for radius in (2, 12):
+            halo = blur.halo(radius)
+            full = blur.execute(self.img, radius)
+            rect = (20, 15, 24, 30)
+            tile = blur.execute(pad_tile(self.img, rect, halo), radius)[halo:-halo, halo:-halo]
+            np.testing.assert_array_equal(tile, full[15:45, 20:44])
+
+    def test_zero_radius_is_identity(self):
+        np.testing.assert_array_equal(blur.execute(self.img, 0), self.img)
+
+    def test_small_radius_box(self):
+        # Widths [1, 1, 1]: the cascade has no reach and leaves pixels as they are
+        for radius in (0.3, 0.5):
+            self.assertEqual(blur.box_sizes(radius), [1, 1, 1])
+            out = blur.execute(self.img, radius, method="box")
+            self.assertEqual(out.shape, self.img.shape)
+            covered = self.img[..., 3] > 0
+            np.testing.assert_array_equal(out[covered][:, 3], self.img[covered][:, 3])
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,92 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from cli.vxcli import main as vxcli_main
+from node_engine.cache import NodeCache
+from node_engine.document import Document, Layer
+from node_engine.evaluator import Evaluator
+from node_engine.graph import Graph, Node
+from node_engine.profiler import Profiler
+from node_engine.render import profile_document
+from node_engine.scheduler import Scheduler
+from plugins.examples.blur_plus import plugin as blur
+
+
+def blur_chain():
+    return Graph(Node.from_json(n) for n in [
+        {"id": "bg", "type": "solid_color", "params": {"color": "#336699", "width": 300, "height": 200}},
+        {"id": "blur", "type": "blur_plus", "inputs": {"image": "ref://bg"}, "params": {"radius": 3}},
+        {"id": "fade", "type": "opacity", "inputs": {"image": "ref://blur"}, "params": {"opacity": 0.5}},
+    ])
+
+
+class TestProfiler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            blur.register_plugin()
+        except ValueError:
+            pass
+
+    def test_records_runs_and_cache_lookups(self):
+        cache = NodeCache()
+        prof = Profiler()
+        Evaluator(blur_chain(), cache=cache).evaluate(["fade"])
+        Evaluator(blur_chain(), cache=cache, profiler=prof).evaluate(["fade"])
+        Evaluator(blur_chain(), cache=NodeCache(), profiler=prof).evaluate(["fade"])
+        summary = prof.summary()
+        self.assertEqual(summary["fade"].cache_hits, 1)
+        self.assertEqual(summary["blur"].cache_misses, 1)
+        self.assertEqual(summary["blur"].runs, 1)
+        self.assertEqual(summary["blur"].nbytes, 300 * 200 * 8)  # rgba16f output
+        self.assertGreater(summary["blur"].wall, 0.0)
+
+    def test_tiles_and_trace_formats(self):
+        prof = Profiler()
+        with Scheduler(max_workers=4) as sched:
+            ev = Evaluator(blur_chain(), scheduler=sched, profiler=prof)
+            with prof.span("region"):
+                ev.evaluate_region("fade", (0, 0, 300, 200), tile_size=64)
+        summary = prof.summary()
+        self.assertEqual(summary["fade"].tiles, ev.last_tiles["fade"])
+        self.assertEqual(summary["blur"].tiles, ev.last_tiles["blur"])
+        self.assertLessEqual(summary["fade"].self_wall, summary["fade"].wall)
+
+        trace = prof.chrome_trace()["traceEvents"]
+        spans = [e for e in trace if e["ph"] == "X"]
+        # every tile, plus the whole-node run of bg and the "region" phase
+        self.assertEqual(len(spans), ev.last_tiles["fade"] + ev.last_tiles["blur"] + 2)
+        self.assertTrue(all(e["dur"] >= 0 for e in spans))
+        self.assertIn("tile", next(e for e in spans if e["name"] == "fade")["args"])
+
+        scope = prof.speedscope()
+        for profile in scope["profiles"]:
+            depth = 0
+            for event in profile["events"]:
+                depth += 1 if event["type"] == "O" else -1
+                self.assertGreaterEqual(depth, 0)
+            self.assertEqual(depth, 0)
+
+    def test_profile_document_records_tiles_and_lookups(self):
+        doc = Document(Path("<memory>"), {}, blur_chain(), [Layer("l0", "fade")])
+        summary = profile_document(doc, tile_size=64).summary()
+        # 5 x 4 tiles of 64px over 300x200; bg is a flat fill and runs whole
+        self.assertEqual((summary["fade"].tiles, summary["blur"].tiles), (20, 20))
+        self.assertEqual(summary["bg"].runs, 1)
+        for node in ("fade", "blur"):
+            self.assertGreater(summary[node].cache_misses, 0)
+        # One lookup of the whole node, then one per tile as fade reads it
+        self.assertEqual(summary["blur"].cache_hits + summary["blur"].cache_misses, 1 + 20)
+
+    def test_cli_profile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "trace.json"
+            self.assertEqual(vxcli_main(["profile", "examples/basic.vxdoc", "-o", str(out)]), 0)
+            names = {e["name"] for e in json.loads(out.read_text())["traceEvents"]}
+            self.assertTrue({"evaluate", "composite", "cache miss"} <= names)
+
+
+if __name__ == "__main__":
+    unittest.main()
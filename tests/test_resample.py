@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+
+from node_engine.compositor import from_premultiplied, to_premultiplied
+from node_engine.evaluator import EvalError, Evaluator
+from node_engine.graph import Graph, Node
+from node_engine.image import materialize
+from node_engine.nodes import register_node
+from node_engine.optimizer import optimize
+from node_engine.resample import FILTERS, axis_weights, mipmaps, phase_weights
+from node_engine.tiles import TiledImage
+
+
+PIXELS = np.random.default_rng(2).integers(0, 256, (21, 21, 4), dtype=np.uint8)
+PIXELS[..., 3] = 255
+
+
+@register_node("test_random_pixels")
+def random_pixels(inputs, params):
+    return PIXELS
+
+
+def transform_graph():
+    return Graph([
+        Node("src", "fbm", {"width": 45, "height": 31, "scale": 9, "seed": 4}),
+        Node("big", "scale", {"factor": 2.5}, {"image": "src"}),
+        Node("small", "scale", {"width": 16, "filter": "box"}, {"image": "src"}),
+        Node("moved", "translate", {"x": 3.25, "y": -1.5}, {"image": "src"}),
+        Node("turned", "rotate", {"angle": 33, "filter": "lanczos"}, {"image": "src"}),
+        Node("flipped", "rotate", {"angle": 200, "center": [10, 7]}, {"image": "src"}),
+    ])
+
+
+class TestWeightTables(unittest.TestCase):
+    def test_tables_are_shared_and_normalised(self):
+        for name in FILTERS:
+            for scale in (0.3, 1.0, 2.5):
+                table = axis_weights(name, 40, round(40 * scale), scale)
+                self.assertIs(table, axis_weights(name, 40, round(40 * scale), scale))
+                np.testing.assert_allclose(table.weight.sum(axis=1), 1.0, rtol=1e-6)
+                self.assertGreaterEqual(table.index.min(), 0)
+                self.assertLess(table.index.max(), 40)
+            _, phases = phase_weights(name)
+            np.testing.assert_allclose(phases.sum(axis=1), 1.0, rtol=1e-6)
+        with self.assertRaises(ValueError):
+            axis_weights("nearest", 4, 4, 1.0)
+
+    def test_box_halving_averages_pairs(self):
+        pixels = to_premultiplied(np.random.default_rng(1).integers(0, 256, (8, 8, 4), dtype=np.uint8))
+        levels = mipmaps(pixels)
+        self.assertEqual([lvl.shape[:2] for lvl in levels], [(8, 8), (4, 4), (2, 2), (1, 1)])
+        expected = pixels.reshape(4, 2, 4, 2, 4).mean(axis=(1, 3))
+        np.testing.assert_allclose(levels[1], expected, atol=1e-6)
+        self.assertEqual(len(mipmaps(pixels, levels=2)), 2)
+
+
+class TestTransformNodes(unittest.TestCase):
+    def test_sizes_and_constants(self):
+        outputs = Evaluator(transform_graph()).evaluate()
+        self.assertEqual(materialize(outputs["big"]).shape, (78, 112, 4))
+        self.assertEqual(materialize(outputs["small"]).shape, (11, 16, 4))
+        self.assertEqual(materialize(outputs["turned"]).shape, (31, 45, 4))
+        g = Graph([Node("c", "solid_color", {"color": "#336699"}), Node("s", "scale", {"factor": 0.5}, {"image": "c"})])
+        flat = materialize(Evaluator(g).evaluate()["s"])
+        self.assertEqual(flat.shape, (32, 32, 4))
+        self.assertEqual(len(np.unique(flat.reshape(-1, 4), axis=0)), 1)
+        self.assertEqual(optimize(g, ["s"]).folded, ["s"])
+
+    def test_tiles_match_whole_image(self):
+        whole = Evaluator(transform_graph()).evaluate()
+        tiled = Evaluator(transform_graph())
+        for nid in ("big", "small", "moved", "turned", "flipped"):
+            view = tiled.view(nid, tile_size=16)
+            self.assertIsInstance(view, TiledImage)
+            np.testing.assert_array_equal(materialize(view), materialize(whole[nid]))
+
+    def test_exact_cases(self):
+        src = PIXELS
+        g = Graph([
+            Node("src", "test_random_pixels"),
+            Node("quarter", "rotate", {"angle": 90, "filter": "lanczos"}, {"image": "src"}),
+            Node("half", "rotate", {"angle": -180}, {"image": "src"}),
+            Node("shift", "translate", {"x": 2, "y": 5, "filter": "lanczos"}, {"image": "src"}),
+        ])
+        out = {nid: from_premultiplied(materialize(img)) for nid, img in Evaluator(g).evaluate().items() if nid != "src"}
+        np.testing.assert_array_equal(out["quarter"], np.rot90(src, -1))
+        np.testing.assert_array_equal(out["half"], src[::-1, ::-1])
+        np.testing.assert_array_equal(out["shift"][5:, 2:], src[:-5, :-2])
+        self.assertEqual(out["shift"][:5].max(), 0)
+
+    def test_bad_params(self):
+        for params in ({"filter": "nearest"}, {"factor": 0}, {"factor": [1, -2]}):
+            g = Graph([Node("c", "checker", {"width": 8, "height": 8}), Node("s", "scale", params, {"image": "c"})])
+            with self.assertRaises((EvalError, ValueError)):
+                Evaluator(g).evaluate()
+
+
+if __name__ == "__main__":
+    unittest.main()
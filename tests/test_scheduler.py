@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+
+from node_engine.evaluator import Evaluator
+from node_engine.graph import Graph, Node
+from node_engine.image import materialize
+from node_engine.scheduler import Scheduler
+from plugins.examples.blur_plus import plugin as blur
+from plugins.vx.registry import get_registry
+
+
+def make_graph(*nodes):
+    return Graph(Node.from_json(n) for n in nodes)
+
+
+def wide_graph(n, blur_type="blur_plus"):
+    nodes = [{"id": "bg", "type": "solid_color", "params": {"color": "#202020", "width": 600, "height": 400}}]
+    prev = "bg"
+    for i in range(n):
+        nodes.append({"id": f"fill-{i}", "type": "solid_color", "params": {"color": "#ff8800", "width": 600, "height": 400}})
+        nodes.append({"id": f"blur-{i}", "type": blur_type, "inputs": {"image": f"ref://fill-{i}"}, "params": {"radius": 1 + i}})
+        nodes.append({"id": f"fade-{i}", "type": "opacity", "inputs": {"image": f"ref://blur-{i}"}, "params": {"opacity": 0.3}})
+        nodes.append({"id": f"stack-{i}", "type": "compose", "inputs": {"a": f"ref://{prev}", "b": f"ref://fade-{i}"}})
+        prev = f"stack-{i}"
+    return make_graph(*nodes), prev
+
+
+class TestScheduler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            blur.register_plugin()
+        except ValueError:
+            pass
+        try:
+            get_registry().register({
+                "name": "blur_plus_proc",
+                "version": "1.0.0",
+                "type": "node",
+                "entrypoint": "plugins.examples.blur_plus.plugin.execute",
+                "parallel": "process",
+                "format": "rgba16f",
+            })
+        except ValueError:
+            pass
+
+    def test_parallel_matches_serial(self):
+        graph, out = wide_graph(8)
+        serial = Evaluator(graph)
+        expected = materialize(serial.evaluate([out])[out])
+        graph, out = wide_graph(8)
+        with Scheduler(max_workers=4) as sched:
+            ev = Evaluator(graph, scheduler=sched)
+            got = materialize(ev.evaluate([out])[out])
+        np.testing.assert_array_equal(got, expected)
+        self.assertEqual(ev.last_recomputed, serial.last_recomputed)
+
+    def test_parallel_tiles_compute_each_tile_once(self):
+        graph, out = wide_graph(3)
+        serial = Evaluator(graph)
+        expected = serial.evaluate_region(out, (10, 20, 500, 300), tile_size=64)
+        graph, out = wide_graph(3)
+        with Scheduler(max_workers=8) as sched:
+            ev = Evaluator(graph, scheduler=sched)
+            got = ev.evaluate_region(out, (10, 20, 500, 300), tile_size=64)
+        np.testing.assert_array_equal(got, expected)
+        self.assertEqual(ev.last_tiles, serial.last_tiles)
+
+    def test_run_dag_respects_dependencies(self):
+        finished = []
+        deps = {"b": ["a"], "c": ["a"], "d": ["b", "c"]}
+        with Scheduler(max_workers=4) as sched:
+            sched.run_dag(["a", "b", "c", "d"], deps, lambda nid: (lambda: nid), lambda nid, r: finished.append(r))
+        self.assertEqual(finished[0], "a")
+        self.assertEqual(finished[-1], "d")
+
+    def test_process_pool_plugin_nodes(self):
+        graph, out = wide_graph(2, blur_type="blur_plus_proc")
+        with Scheduler(max_workers=2, process_workers=2) as sched:
+            got = materialize(Evaluator(graph, scheduler=sched).evaluate([out])[out])
+        graph, out = wide_graph(2)
+        np.testing.assert_array_equal(got, materialize(Evaluator(graph).evaluate([out])[out]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from cli.schema import SCHEMA_DIR, SchemaError, Validator, load_validator
+from cli.validate import check_document
+
+
+class TestValidator(unittest.TestCase):
+    def test_reports_every_violation(self):
+        v = Validator({
+            "type": "object",
+            "required": ["id", "size"],
+            "properties": {
+                "id": {"type": "string", "minLength": 1},
+                "tags": {"type": "array", "items": {"enum": ["a", "b"]}, "maxItems": 2},
+                "level": {"type": "integer", "minimum": 0, "exclusiveMaximum": 10},
+            },
+            "additionalProperties": False,
+        })
+        self.assertEqual(v.errors({"id": "x", "size": 1}), ["/: unexpected property 'size'"])
+        errors = v.errors({"id": "", "tags": ["a", "c", "b"], "level": True, "extra": 1})
+        self.assertEqual(errors, [
+            "/: missing required property 'size'",
+            "/id: must be at least 1 characters",
+            "/tags/1: 'c' is not one of ['a', 'b']",
+            "/tags: must have at most 2 items",
+            "/level: expected integer, got boolean",
+            "/: unexpected property 'extra'",
+        ])
+        self.assertEqual(v.errors([]), ["/: expected object, got array"])
+
+    def test_refs_and_combinators(self):
+        v = Validator({
+            "$defs": {"tree": {"type": "object", "properties": {"kids": {"type": "array", "items": {"$ref": "#/$defs/tree"}}},
+                               "required": ["name"]}},
+            "oneOf": [{"$ref": "#/$defs/tree"}, {"type": "string", "pattern": "^leaf:"}],
+        })
+        self.assertTrue(v.is_valid({"name": "r", "kids": [{"name": "a", "kids": []}]}))
+        self.assertTrue(v.is_valid("leaf:x"))
+        self.assertFalse(v.is_valid({"name": "r", "kids": [{}]}))
+        self.assertEqual(v.errors(3), ["/: must match exactly one of the oneOf schemas"])
+
+    def test_bad_schemas(self):
+        for schema in ({"type": "float"}, {"format": "uri"}, {"$ref": "other.json#/x"}, ["type"]):
+            with self.assertRaises(SchemaError):
+                Validator(schema)
+        with self.assertRaises(SchemaError):
+            Validator({"$ref": "#/$defs/missing"}).errors(1)
+        with self.assertRaises(SchemaError):
+            load_validator("no-such")
+
+    def test_document_schemas_are_compiled_once(self):
+        for path in sorted(SCHEMA_DIR.glob("*.schema.json")):
+            name = path.name[: -len(".schema.json")]
+            self.assertIs(load_validator(name), load_validator(name))
+        node = load_validator("node")
+        self.assertTrue(node.is_valid(json.loads(Path("examples/basic.vxdoc/nodes/sample.json").read_text())))
+        self.assertEqual(node.errors({"id": "n", "type": "blur", "inputs": {"image": "n2"}}),
+                         ["/inputs/image: 'n2' does not match '^ref://.+'"])
+
+
+class TestDocumentSchemas(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.doc = self.tmp / "doc.vxdoc"
+        shutil.copytree("examples/basic.vxdoc", self.doc)
+
+    def test_all_files_and_violations_reported(self):
+        (self.doc / "manifest.json").write_text('{"name": "x", "type": "vxdoc2"}')
+        (self.doc / "nodes" / "bad.json").write_text('{"id": 3, "params": []}')
+        (self.doc / "layers" / "bad.json").write_text('{"id": "l", "source_node": "n", "opacity": 2, "blend": "burn"}')
+        (self.doc / "layers" / "broken.json").write_text("{")
+        issues = check_document(self.doc)
+        self.assertEqual([i.code for i in issues], ["schema"] * 7 + ["entry_json"])
+        messages = [i.message for i in issues]
+        self.assertIn("manifest.json: /: missing required property 'schema_version'", messages)
+        self.assertIn("manifest.json: /type: 'vxdoc2' is not one of ['vxdoc']", messages)
+        self.assertIn("nodes/bad.json: /id: expected string, got integer", messages)
+        self.assertIn("nodes/bad.json: /params: expected object or null, got array", messages)
+        self.assertIn("layers/bad.json: /opacity: must be <= 1", messages)
+        self.assertTrue(messages[-1].startswith("layers/broken.json not valid JSON"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import functools
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from cli.vxcli import main as vxcli_main
+from node_engine.document import Document, Layer
+from node_engine.evaluator import Evaluator
+from node_engine.export import export_sweep, variant_path
+from node_engine.graph import Graph, GraphError, Node
+from node_engine.profiler import Profiler
+from node_engine.render import render_document, render_sweep, sweep_plan
+from node_engine.sweep import SweepError, Variant, parse_sweep
+from plugins.examples.blur_plus import plugin as blur
+
+
+def template():
+    nodes = [
+        {"id": "bg", "type": "solid_color", "params": {"color": "#203040", "width": 80, "height": 48}},
+        {"id": "soft", "type": "blur_plus", "inputs": {"image": "ref://bg"}, "params": {"radius": 3}},
+        {"id": "product", "type": "solid_color", "params": {"color": "#ff0000", "width": 32, "height": 32}},
+        {"id": "shadow", "type": "blur_plus", "inputs": {"image": "ref://product"}, "params": {"radius": 2}},
+        {"id": "fade", "type": "opacity", "inputs": {"image": "ref://shadow"}, "params": {"opacity": 0.5}},
+        {"id": "out", "type": "compose", "inputs": {"a": "ref://soft", "b": "ref://fade"}},
+    ]
+    graph = Graph(Node.from_json(n) for n in nodes)
+    return Document(Path("<memory>"), {}, graph, [Layer("l0", "out")])
+
+
+def with_overrides(doc, overrides):
+    graph = Graph(Node(n.id, n.type, {**n.params, **overrides.get(n.id, {})}, dict(n.inputs))
+                  for n in doc.graph.nodes.values())
+    return Document(doc.path, doc.manifest, graph, doc.layers)
+
+
+class TestSweep(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            blur.register_plugin()
+        except ValueError:
+            pass
+
+    def test_parse_sweep(self):
+        variants = parse_sweep({
+            "variants": [{"name": "base"}],
+            "product": {"product.color": ["#00ff00", "#0000ff"], "shadow.radius": [1, 4]},
+        })
+        self.assertEqual([v.name for v in variants], ["base", "1", "2", "3", "4"])
+        self.assertEqual(variants[2].overrides, {"product": {"color": "#00ff00"}, "shadow": {"radius": 4}})
+        for bad in ({}, {"variants": [1]}, {"product": {"color": ["#fff"]}}, {"nope": []},
+                    [{"name": "a"}, {"name": "a"}], [{"name": "../x"}]):
+            with self.assertRaises(SweepError):
+                parse_sweep(bad)
+
+    def test_plan_shares_unswept_nodes(self):
+        doc = template()
+        variants = [Variant(f"v{i}", {"product": {"color": c}}) for i, c in enumerate(["#ff0000", "#00ff00", "#00ff00"])]
+        plan = sweep_plan(doc, variants)
+        ids = set(plan.graph.nodes)
+        self.assertIn("bg", ids)
+        self.assertIn("soft", ids)
+        # v0 keeps the template colour, so it reuses the original nodes; v1 and v2 share clones
+        self.assertEqual(plan.nodes[0]["out"], "out")
+        self.assertEqual(plan.nodes[1]["out"], plan.nodes[2]["out"])
+        self.assertEqual(len(plan.graph), 6 + 4)
+        self.assertEqual(plan.naive_nodes, 18)
+        self.assertEqual(sorted(plan.done_after(0)), ["fade", "out", "product", "shadow"])
+        self.assertEqual(plan.done_after(1), [])
+        # soft feeds v1's new compose; v2 reads v1's compose as its layer
+        self.assertEqual(plan.reread(["out"]), {"soft", plan.nodes[1]["out"]})
+        with self.assertRaises(GraphError):
+            sweep_plan(doc, [Variant("x", {"missing": {"radius": 1}})])
+
+    def test_render_sweep_matches_independent_renders(self):
+        doc = template()
+        variants = parse_sweep({"product": {"product.color": ["#00ff00", "#0000ff"], "shadow.radius": [1, 5]}})
+        rendered = list(render_sweep(doc, variants))
+        self.assertEqual([v.name for v, _ in rendered], [v.name for v in variants])
+        for variant, pixels in rendered:
+            np.testing.assert_array_equal(pixels, render_document(with_overrides(doc, variant.overrides)))
+
+    def test_export_sweep_and_cli(self):
+        doc = template()
+        variants = [Variant("red"), Variant("green", {"product": {"color": "#00ff00"}})]
+        self.assertEqual(variant_path(Path("out/card.png"), "red"), Path("out/card.red.png"))
+        self.assertEqual(variant_path(Path("{name}-card.raw"), "red"), Path("red-card.raw"))
+        with tempfile.TemporaryDirectory() as tmp:
+            written = export_sweep(doc, Path(tmp) / "{name}.raw", variants, band_height=16)
+            self.assertEqual([p.name for p in written], ["red.raw", "green.raw"])
+            green = np.fromfile(written[1], dtype=np.uint8).reshape(48, 80, 4)
+            np.testing.assert_array_equal(green, render_document(with_overrides(doc, variants[1].overrides)))
+
+            sweep = Path(tmp) / "params.json"
+            sweep.write_text(json.dumps([{"name": "a", "params": {"node-1": {"color": "#00ff00"}}}, {"name": "b"}]))
+            out = Path(tmp) / "basic.raw"
+            self.assertEqual(vxcli_main(["render", "examples/basic.vxdoc", "-o", str(out), "--sweep", str(sweep)]), 0)
+            self.assertTrue((Path(tmp) / "basic.a.raw").exists())
+            self.assertTrue((Path(tmp) / "basic.b.raw").exists())
+            sweep.write_text("{}")
+            self.assertEqual(vxcli_main(["render", "examples/basic.vxdoc", "-o", str(out), "--sweep", str(sweep)]), 2)
+
+    def test_export_sweep_evaluates_shared_tiles_once(self):
+        doc = with_overrides(template(), {"bg": {"height": 1024}})
+        variants = [Variant(f"v{i}", {"product": {"color": f"#00{i:02x}00"}}) for i in range(4)]
+        profiler = Profiler()
+        profiled = functools.partial(Evaluator, profiler=profiler)
+        with mock.patch("node_engine.export.Evaluator", wraps=profiled) as make:
+            with tempfile.TemporaryDirectory() as tmp:
+                written = export_sweep(doc, Path(tmp) / "{name}.raw", variants, band_height=64, tile_size=64)
+                last = np.fromfile(written[-1], dtype=np.uint8).reshape(1024, 80, 4)
+                np.testing.assert_array_equal(last, render_document(with_overrides(doc, variants[-1].overrides)))
+        runs = {nid: prof.runs + prof.tiles for nid, prof in profiler.summary().items()}
+        # 2 x 16 tiles of the shared blur, computed once for all four variants
+        self.assertEqual(runs["soft"], 32)
+        self.assertEqual(sum(n for nid, n in runs.items() if nid.startswith("out~")), 4 * 32)
+        stats = make.call_args.kwargs["cache"].stats()
+        self.assertEqual(stats.pinned_bytes, 0)  # released after the last variant
+        self.assertLessEqual(stats.bytes, stats.budget_bytes)
+
+if __name__ == "__main__":
+    unittest.main()
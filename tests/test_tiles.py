@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+
+from node_engine.evaluator import Evaluator
+from node_engine.formats import RGBA8, convert
+from node_engine.graph import Graph, Node
+from node_engine.image import materialize
+from node_engine.tiles import tile_rect, tiles_for_rect
+from plugins.examples.blur_plus import plugin as blur
+
+
+def make_graph(*nodes):
+    return Graph(Node.from_json(n) for n in nodes)
+
+
+def blur_chain():
+    return make_graph(
+        {"id": "bg", "type": "solid_color", "params": {"color": "#336699", "width": 1024, "height": 1024}},
+        {"id": "blur1", "type": "blur_plus", "inputs": {"image": "ref://bg"}, "params": {"radius": 4}},
+        {"id": "blur2", "type": "blur_plus", "inputs": {"image": "ref://blur1"}, "params": {"radius": 2}},
+        {"id": "fade", "type": "opacity", "inputs": {"image": "ref://blur2"}, "params": {"opacity": 0.5}},
+    )
+
+
+class TestTiles(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        try:
+            blur.register_plugin()
+        except ValueError:
+            pass
+
+    def test_tile_grid(self):
+        self.assertEqual(list(tiles_for_rect((250, 0, 10, 10), 256)), [(0, 0), (1, 0)])
+        self.assertEqual(tile_rect(3, 0, 1000, 1000, 256), (768, 0, 232, 256))
+
+    def test_roi_computes_only_contributing_tiles(self):
+        ev = Evaluator(blur_chain())
+        out = ev.evaluate_region("fade", (300, 300, 10, 10), tile_size=256)
+        self.assertEqual(out.shape, (10, 10, 4))
+        # blur2 reads its tile plus a 6 px halo from blur1, which spills into the 8 neighbours
+        self.assertEqual(ev.last_tiles, {"blur1": 9, "blur2": 1, "fade": 1})
+        ev.evaluate_region("fade", (260, 260, 64, 64), tile_size=256)
+        self.assertEqual(ev.last_tiles, {"blur1": 0, "blur2": 0, "fade": 0})
+
+    def test_roi_matches_full_evaluation(self):
+        full = materialize(Evaluator(blur_chain()).evaluate(["fade"])["fade"])
+        ev = Evaluator(blur_chain())
+        region = ev.evaluate_region("fade", (200, 500, 400, 300), tile_size=128)
+        np.testing.assert_array_equal(region, full[500:800, 200:600])
+
+    def test_param_edit_drops_stale_tiles(self):
+        ev = Evaluator(blur_chain())
+        ev.evaluate_region("fade", (0, 0, 16, 16))
+        ev.set_params("fade", {"opacity": 1.0})
+        out = ev.evaluate_region("fade", (0, 0, 16, 16))
+        self.assertEqual(ev.last_tiles, {"blur1": 0, "blur2": 0, "fade": 1})
+        np.testing.assert_array_equal(out, convert(ev.evaluate_region("blur2", (0, 0, 16, 16)), RGBA8))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+import numpy as np
+
+from node_engine.evaluator import EvalError, Evaluator
+from node_engine.graph import Graph, Node
+from node_engine.image import materialize
+from node_engine.vector import VectorError, flatten, parse_path, rasterize, zoom_level
+from ui_qt.tools import ToolState
+
+K = 0.5522847498  # cubic Bezier quarter-circle handle length
+
+
+def circle(cx, cy, r):
+    k = K * r
+    return [
+        ["M", cx + r, cy],
+        ["C", cx + r, cy + k, cx + k, cy + r, cx, cy + r],
+        ["C", cx - k, cy + r, cx - r, cy + k, cx - r, cy],
+        ["C", cx - r, cy - k, cx - k, cy - r, cx, cy - r],
+        ["C", cx + k, cy - r, cx + r, cy - k, cx + r, cy],
+        ["Z"],
+    ]
+
+
+class TestRasterize(unittest.TestCase):
+    def test_parse_forms(self):
+        square = [[0, 0], [4, 0], [4, 4], [0, 4]]
+        self.assertEqual(len(parse_path(square)), 1)
+        self.assertEqual(len(parse_path([square, square])), 2)
+        path = parse_path([["M", 0, 0], ["Q", 2, 4, 4, 0], ["L", 0, 0], ["M", 9, 9], ["L", 10, 9], ["L", 9, 10]])
+        self.assertEqual([len(sub) for sub in path], [2, 2])
+        self.assertEqual(path[0][0], ((0.0, 0.0), (2.0, 4.0), (4.0, 0.0)))
+        for bad in ("M 0 0", [["X", 1, 2]], [["L", 1]], [["M", "a", 0]]):
+            with self.assertRaises(VectorError):
+                parse_path(bad)
+
+    def test_exact_coverage(self):
+        square = parse_path([[2.5, 2.25], [12.5, 2.25], [12.5, 12.25], [2.5, 12.25]])
+        mask = rasterize(square, (0, 0, 16, 16))
+        self.assertAlmostEqual(float(mask.sum()), 100.0, places=4)
+        self.assertEqual(mask[5, 5], 1.0)
+        self.assertAlmostEqual(float(mask[2, 2]), 0.5 * 0.75)
+        self.assertAlmostEqual(float(mask[12, 5]), 0.25)
+        self.assertEqual(mask[0].max(), 0.0)
+
+    def test_fill_rules(self):
+        rings = parse_path([[[0, 0], [20, 0], [20, 20], [0, 20]], [[5, 5], [15, 5], [15, 15], [5, 15]]])
+        self.assertEqual(rasterize(rings, (0, 0, 20, 20)).sum(), 400.0)
+        even = rasterize(rings, (0, 0, 20, 20), rule="evenodd")
+        self.assertEqual(even.sum(), 300.0)
+        self.assertEqual(even[10, 10], 0.0)
+        with self.assertRaises(VectorError):
+            rasterize(rings, (0, 0, 4, 4), rule="winding")
+
+    def test_curves_and_tiles(self):
+        path = parse_path(circle(50, 50, 40))
+        mask = rasterize(path, (0, 0, 100, 100))
+        area = np.pi * 40 ** 2
+        self.assertAlmostEqual(float(mask.sum()) / area, 1.0, places=2)
+        np.testing.assert_array_equal(rasterize(path, (30, 17, 23, 41)), mask[17:58, 30:53])
+        # Zooming in flattens finer, so the shape gets closer to the true circle
+        big = rasterize(path, (0, 0, 400, 400), scale=4.0)
+        self.assertLess(abs(float(big.sum()) / 16 / area - 1.0), abs(float(mask.sum()) / area - 1.0))
+
+    def test_flattening_cached_per_zoom_level(self):
+        path = parse_path(circle(0, 0, 10))
+        self.assertIs(flatten(path, zoom_level(3.0)), flatten(path, zoom_level(3.9)))
+        self.assertEqual(zoom_level(3.0), zoom_level(4.0))
+        self.assertGreater(len(flatten(path, zoom_level(8.0))), len(flatten(path, zoom_level(1.0))))
+        before = flatten.cache_info().misses
+        for dx in range(5):
+            rasterize(path, (0, 0, 32, 32), scale=3.0 + dx * 0.1, offset=(dx, 16))
+        self.assertEqual(flatten.cache_info().misses, before)
+
+
+class TestFillPathNode(unittest.TestCase):
+    def test_node_tiles_and_color(self):
+        params = {"width": 64, "height": 48, "path": circle(20, 15, 12), "color": "#ff8000", "scale": 1.5,
+                  "offset": [2, 1]}
+        g = Graph([Node("shape", "fill_path", params)])
+        whole = materialize(Evaluator(g).evaluate()["shape"])
+        np.testing.assert_array_equal(whole[24, 32], [255, 128, 0, 255])
+        self.assertEqual(whole[0, 63, 3], 0)
+        np.testing.assert_array_equal(materialize(Evaluator(g).view("shape", tile_size=16)), whole)
+        with self.assertRaises(EvalError):
+            Evaluator(Graph([Node("bad", "fill_path", {"path": [["Q", 1]]})])).evaluate()
+
+    def test_tool_state_coverage(self):
+        state = ToolState(scale=2.0, origin=(10.0, 10.0))
+        state.paths = [[(0, 0), (10, 0), (10, 10), (0, 10)], [(20, 20), (21, 20)]]
+        mask = state.path_coverage(64, 48)
+        self.assertEqual(mask.shape, (48, 64))
+        self.assertEqual(mask.sum(), 400.0)  # the 10x10 square at 2x; the two-point path has no area
+        self.assertEqual(mask[10, 10], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
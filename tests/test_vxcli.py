@@ -1,15 +1,143 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
 import unittest
+import zipfile
 from pathlib import Path
+from unittest import mock
 
+from cli.validate import check_document, find_documents, validate_many
+from cli.vxcli import main as vxcli_main
 from cli.vxcli import validate_path
 
 
+def run_cli(argv):
+    out, err = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        code = vxcli_main(argv)
+    return code, out.getvalue(), err.getvalue()
+
+
 class TestVxcliValidate(unittest.TestCase):
     def test_validate_example_vxdoc(self):
         example = Path("examples/basic.vxdoc")
         self.assertTrue(validate_path(example))
 
 
+def zip_document(src, dest, prefix="", extra=()):
+    with zipfile.ZipFile(dest, "w", zipfile.ZIP_DEFLATED) as zf:
+        for path in sorted(Path(src).rglob("*")):
+            if path.is_file():
+                zf.write(path, prefix + path.relative_to(src).as_posix())
+        for name, data in extra:
+            zf.writestr(prefix + name, data, zipfile.ZIP_STORED)
+    return dest
+
+
+class TestZippedValidate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def test_zip_validates_without_reading_assets(self):
+        payload = b"A" * 200_000
+        doc = zip_document("examples/basic.vxdoc", self.tmp / "doc.vxdoc", extra=[("assets/big.bin", payload)])
+        # Corrupt the asset: reading it would now fail its CRC check
+        raw = doc.read_bytes()
+        doc.write_bytes(raw.replace(payload, b"B" * len(payload)))
+        self.assertTrue(validate_path(doc))
+        with zipfile.ZipFile(doc) as zf:
+            self.assertIsNotNone(zf.testzip())
+
+    def test_zip_layouts_and_errors(self):
+        nested = zip_document("examples/basic.vxdoc", self.tmp / "nested.vxdoc", prefix="basic.vxdoc/")
+        self.assertEqual(check_document(nested), [])
+        with zipfile.ZipFile(self.tmp / "partial.vxdoc", "w") as zf:
+            zf.writestr("manifest.json", '{"name": "x", "schema_version": 1, "type": "vxdoc"}')
+            zf.writestr("nodes/a.json", "{}")
+        codes = [i.code for i in check_document(self.tmp / "partial.vxdoc")]
+        self.assertEqual(codes, ["missing_entry"] * 3)
+        (self.tmp / "junk.vxdoc").write_bytes(b"not a zip")
+        self.assertEqual([i.code for i in check_document(self.tmp / "junk.vxdoc")], ["bad_archive"])
+        self.assertEqual(run_cli(["render", str(nested), "-o", str(self.tmp / "out.raw")])[0], 1)
+
+    def test_zip_command(self):
+        out = self.tmp / "saved.vxdoc"
+        code, stdout, _ = run_cli(["zip", "examples/basic.vxdoc", "-o", str(out)])
+        self.assertEqual(code, 0)
+        self.assertIn("5 entries compressed", stdout)
+        self.assertTrue(validate_path(out))
+        code, stdout, _ = run_cli(["zip", "examples/basic.vxdoc", "-o", str(out)])
+        self.assertIn("0 entries compressed (0.0 MB), 5 unchanged copied", stdout)
+        self.assertEqual(run_cli(["zip", str(out), "-o", str(self.tmp / "again.vxdoc")])[0], 1)
+
+
+class TestBatchValidate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        for name in ("a", "b", "nested/c"):
+            shutil.copytree("examples/basic.vxdoc", self.tmp / f"{name}.vxdoc")
+        broken = self.tmp / "nested" / "broken.vxdoc"
+        shutil.copytree("examples/basic.vxdoc", broken)
+        (broken / "manifest.json").write_text("{not json")
+        shutil.rmtree(broken / "collab")
+        zip_document("examples/basic.vxdoc", self.tmp / "nested" / "zipped.vxdoc")
+
+    def test_find_documents(self):
+        found = [Path(p).relative_to(self.tmp).as_posix() for p in find_documents([str(self.tmp)])]
+        self.assertEqual(found, ["a.vxdoc", "b.vxdoc", "nested/broken.vxdoc", "nested/c.vxdoc", "nested/zipped.vxdoc"])
+        globbed = list(find_documents([str(self.tmp / "*.vxdoc"), str(self.tmp / "a.vxdoc")]))
+        self.assertEqual([Path(p).name for p in globbed], ["a.vxdoc", "b.vxdoc"])
+
+    def test_validate_many_in_processes(self):
+        reports = {Path(r.path).name: r for r in validate_many(find_documents([str(self.tmp)]), jobs=2)}
+        self.assertEqual(len(reports), 5)
+        self.assertEqual(reports["a.vxdoc"].status, "valid")
+        self.assertEqual(reports["zipped.vxdoc"].status, "valid")
+        self.assertEqual(reports["broken.vxdoc"].status, "invalid")
+        self.assertEqual([e.code for e in reports["broken.vxdoc"].errors], ["missing_entry"])
+
+    def test_cli_json_lines_and_exit_codes(self):
+        code, out, err = run_cli(["validate", "--jobs", "2", str(self.tmp)])
+        self.assertEqual(code, 1)
+        lines = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual(sorted(line["status"] for line in lines), ["invalid", "valid", "valid", "valid", "valid"])
+        self.assertTrue(all(line["seconds"] >= 0 for line in lines))
+        self.assertIn("4 valid, 1 invalid", err)
+
+        code, out, _ = run_cli(["validate", str(self.tmp / "a.vxdoc"), str(self.tmp / "b.vxdoc")])
+        self.assertEqual((code, len(out.splitlines())), (0, 2))
+        code, out, _ = run_cli(["validate", "--json", str(self.tmp / "missing.vxdoc")])
+        self.assertEqual(code, 1)
+        self.assertEqual(json.loads(out)["errors"][0]["code"], "not_found")
+        self.assertEqual(run_cli(["validate", str(self.tmp / "*.nothing")])[0], 2)
+        self.assertEqual(run_cli(["validate", str(self.tmp / "a.vxdoc")])[:2], (0, "valid\n"))
+
+
+class TestPackCli(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def test_pack_unpack(self):
+        doc = self.tmp / "doc.vxdoc"
+        shutil.copytree("examples/basic.vxdoc", doc)
+        (doc / "assets" / "a.bin").write_bytes(b"a" * 10)
+        store = str(self.tmp / "store")
+        code, out, _ = run_cli(["pack", str(doc), "-o", str(self.tmp / "packed.vxdoc"), "--store", store])
+        self.assertEqual(code, 0)
+        self.assertIn("1 new", out)
+        code, out, _ = run_cli(["unpack", str(self.tmp / "packed.vxdoc"), "-o", str(self.tmp / "out.vxdoc"),
+                                "--store", store, "--link", "copy"])
+        self.assertEqual((code, out.split(":")[-1].strip()), (0, "1 copy"))
+        self.assertEqual((self.tmp / "out.vxdoc" / "assets" / "a.bin").read_bytes(), b"a" * 10)
+        with mock.patch.dict(os.environ, {"VX_STORE_DIR": ""}):
+            self.assertEqual(run_cli(["pack", str(doc)])[0], 2)
+
+
 if __name__ == "__main__":
     unittest.main()
-
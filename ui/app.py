@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-import json
 import sys
 import tkinter as tk
 from pathlib import Path
 from typing import Optional, Tuple, List
 
-from node_engine.simple_eval import solid_color, ImageSolid
+import numpy as np
+
+from node_engine.document import load_document
+from node_engine.image import materialize
+from node_engine.nodes import solid_color
+from node_engine.render import render_document
 
 
 class Tools:
@@ -22,7 +26,9 @@ class CanvasView(tk.Canvas):
         self.scale_factor: float = 2.0  # pixels per document unit
         self.origin: Tuple[float, float] = (100.0, 100.0)  # pan offset
         self._drag_start: Optional[Tuple[int, int]] = None
-        self._doc_image: Optional[ImageSolid] = None
+        self._doc_image: Optional[np.ndarray] = None
+        self._photo: Optional[tk.PhotoImage] = None
+        self._photo_scale: Optional[float] = None
 
         # Tool state
         self.current_tool: str = Tools.PAN
@@ -65,12 +71,30 @@ class CanvasView(tk.Canvas):
         self._cur_stroke = None
         self.redraw()
 
-    def load_image(self, img: ImageSolid) -> None:
+    def load_image(self, img: np.ndarray) -> None:
         self._doc_image = img
+        self._photo = None
         # Fit artboard to image by default
-        self.artboard = (0.0, 0.0, float(img.width), float(img.height))
+        h, w = img.shape[:2]
+        self.artboard = (0.0, 0.0, float(w), float(h))
         self.redraw()
 
+    def _photo_for_scale(self) -> tk.PhotoImage:
+        # Tk can only scale PhotoImages by integer factors; rebuild when the factor changes
+        s = self.scale_factor
+        if self._photo is None or self._photo_scale != s:
+            img = self._doc_image
+            h, w = img.shape[:2]
+            header = f"P6 {w} {h} 255 ".encode("ascii")
+            base = tk.PhotoImage(data=header + np.ascontiguousarray(img[..., :3]).tobytes(), format="PPM")
+            if s >= 1.0:
+                base = base.zoom(max(1, int(round(s))))
+            else:
+                base = base.subsample(max(1, int(round(1.0 / s))))
+            self._photo = base
+            self._photo_scale = s
+        return self._photo
+
     def _on_key(self, event):
         k = event.keysym.lower()
         if k == "space":
@@ -169,16 +193,14 @@ class CanvasView(tk.Canvas):
         ax1, ay1 = self.doc_to_screen(ax + aw, ay + ah)
         self.create_rectangle(ax0, ay0, ax1, ay1, outline="#888", width=1, dash=(4, 2))
 
-        if self._doc_image:
-            img = self._doc_image
-            sx = self.scale_factor
+        if self._doc_image is not None:
+            photo = self._photo_for_scale()
             ox, oy = self.origin
             x0 = ox
             y0 = oy
-            x1 = ox + img.width * sx
-            y1 = oy + img.height * sx
-            fill = "#%02x%02x%02x" % img.color_rgb
-            self.create_rectangle(x0, y0, x1, y1, fill=fill, outline="#000000")
+            x1 = ox + photo.width()
+            y1 = oy + photo.height()
+            self.create_image(x0, y0, image=photo, anchor=tk.NW)
             self.create_rectangle(x0, y0, x1, y1, outline="#333333", width=1)
 
         # Brush strokes (polylines)
@@ -225,18 +247,13 @@ class CanvasView(tk.Canvas):
             self.create_line(*pts, fill=color, width=2, capstyle=tk.ROUND, joinstyle=tk.ROUND)
 
 
-def load_vxdoc_solid(path: Path) -> ImageSolid:
-    # Minimal: find the first node of type solid_color in nodes/*.json
-    nodes_dir = path / "nodes"
-    for p in sorted(nodes_dir.glob("*.json")):
-        try:
-            node = json.loads(p.read_text(encoding="utf-8"))
-        except Exception:
-            continue
-        if node.get("type") == "solid_color":
-            return solid_color(node.get("params", {}))
+def load_vxdoc_image(path: Path) -> np.ndarray:
+    # Evaluate the graph and flatten the layer stack
+    doc = load_document(path)
+    if any(layer.visible for layer in doc.layers):
+        return render_document(doc)
     # Fallback
-    return solid_color({"width": 128, "height": 128, "color": "#66aaff"})
+    return materialize(solid_color({}, {"width": 128, "height": 128, "color": "#66aaff"}))
 
 
 def main(argv=None) -> int:
@@ -264,7 +281,7 @@ def main(argv=None) -> int:
     canvas = CanvasView(root)
     canvas.pack(fill=tk.BOTH, expand=True)
     try:
-        img = load_vxdoc_solid(doc_path)
+        img = load_vxdoc_image(doc_path)
     except Exception as exc:
         tk.messagebox.showerror("Load Error", str(exc))
         return 1
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import numpy as np
 from PySide6 import QtWidgets, QtGui, QtCore
 from typing import Optional, Tuple, List
 
@@ -187,6 +188,7 @@ class CanvasOverlay(QtWidgets.QWidget):
         self._draw_checker(p)
         self._draw_artboard(p)
         self._draw_strokes(p)
+        self._draw_path_fills(p)
         self._draw_paths(p)
         p.end()
 
@@ -231,6 +233,17 @@ class CanvasOverlay(QtWidgets.QWidget):
                 path.lineTo(x, y)
             p.drawPath(path)
 
+    def _draw_path_fills(self, p: QtGui.QPainter):
+        if not self.state.paths:
+            return
+        w, h = self.width(), self.height()
+        coverage = self.state.path_coverage(w, h)
+        rgba = np.zeros((h, w, 4), dtype=np.uint8)
+        rgba[..., :3] = (255, 170, 0)
+        rgba[..., 3] = np.floor(coverage * 96.0 + 0.5)
+        img = QtGui.QImage(rgba.data, w, h, 4 * w, QtGui.QImage.Format.Format_RGBA8888)
+        p.drawImage(0, 0, img)
+
     def _draw_paths(self, p: QtGui.QPainter):
         paths = self.state.paths + ([self.state.cur_path] if self.state.cur_path else [])
         for path_pts in paths:
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass, field
 from typing import List, Tuple, Optional
 
+import numpy as np
+
+from node_engine.vector import polyline_path, rasterize
+
 
 class Tools:
     PAN = "pan"
@@ -34,3 +39,22 @@ class ToolState:
         s = self.scale
         return ox + x * s, oy + y * s
 
+    def visible_rect(self, view_w: float, view_h: float) -> Tuple[int, int, int, int]:
+        """Document pixel rect (x, y, w, h) shown by a view of the given size.
+
+        This is the region-of-interest to request from the node engine.
+        """
+        x0, y0 = self.screen_to_doc(0.0, 0.0)
+        x1, y1 = self.screen_to_doc(view_w, view_h)
+        ix0, iy0 = int(math.floor(x0)), int(math.floor(y0))
+        return ix0, iy0, int(math.ceil(x1)) - ix0, int(math.ceil(y1)) - iy0
+
+    def path_coverage(self, view_w: int, view_h: int, rule: str = "nonzero") -> np.ndarray:
+        """Antialiased coverage (h x w float32) of the finished pen paths in a
+        view of the given size, each path filled as a closed polygon.
+
+        Flattened edges are cached per path and zoom level by the rasterizer,
+        so panning and repaints do not re-flatten.
+        """
+        path = polyline_path(self.paths)
+        return rasterize(path, (0, 0, int(view_w), int(view_h)), self.scale, self.origin, rule)